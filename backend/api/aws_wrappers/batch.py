@@ -0,0 +1,37 @@
+import time
+from typing import Dict, List, Optional
+from api.db_setup import dynamodb
+
+# BatchGetItem accepts at most this many keys per call
+BATCH_GET_LIMIT = 100
+
+# Retries for keys DynamoDB hands back as unprocessed (throttling, size limits)
+MAX_UNPROCESSED_RETRIES = 8
+
+
+def batch_get_items(table_name: str, keys: List[Dict], projection: Optional[str] = None,
+                    attribute_names: Optional[Dict[str, str]] = None) -> List[dict]:
+    """
+    Fetch items by key with BatchGetItem, 100 keys per call, retrying
+    unprocessed keys with exponential backoff. Result order is not guaranteed.
+    """
+    items = []
+    for start in range(0, len(keys), BATCH_GET_LIMIT):
+        table_request = {"Keys": keys[start:start + BATCH_GET_LIMIT]}
+        if projection:
+            table_request["ProjectionExpression"] = projection
+        if attribute_names:
+            table_request["ExpressionAttributeNames"] = attribute_names
+        request = {table_name: table_request}
+
+        attempt = 0
+        while request:
+            response = dynamodb.batch_get_item(RequestItems=request)
+            items.extend(response.get("Responses", {}).get(table_name, []))
+            request = response.get("UnprocessedKeys")
+            if request:
+                if attempt >= MAX_UNPROCESSED_RETRIES:
+                    raise RuntimeError(f"BatchGetItem on {table_name} kept returning unprocessed keys")
+                time.sleep(min(0.05 * (2 ** attempt), 2.0))
+                attempt += 1
+    return items
@@ -0,0 +1,222 @@
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.types import TypeSerializer
+from botocore.exceptions import ClientError
+from api.config import S3_BUCKET_NAME
+from api.db_setup import dynamodb
+from api.aws_wrappers.comments import POST_INDEX
+from api.aws_wrappers.feeds import remove_post_from_feeds
+from api.aws_wrappers.images import delete_files_from_s3, rendition_keys
+from api.aws_wrappers.post_indexes import unindex_post_topics
+
+logger = logging.getLogger(__name__)
+
+# One row per deleted post: postId (HASH), status pending|running|done|failed
+post_cleanup_table = dynamodb.Table('post_cleanup')
+posts_table = dynamodb.Table('posts')
+comments_table = dynamodb.Table('comments')
+post_likes_table = dynamodb.Table('post_likes')
+
+# Attempts per cleanup step before the job is marked failed
+CLEANUP_STEP_ATTEMPTS = 3
+
+# A running job whose worker died is picked up again after this long
+CLEANUP_LEASE = timedelta(minutes=5)
+
+# Status rows are kept this long so clients can poll them, then expired by TTL
+CLEANUP_RETENTION = timedelta(days=7)
+
+
+def _now() -> str:
+    return str(datetime.now())
+
+
+def image_keys(post: dict) -> List[str]:
+    """
+    S3 keys of the post's uploaded images, every rendition included; the "none" placeholder and foreign URLs are skipped.
+    """
+    prefix = f"https://{S3_BUCKET_NAME}.s3.amazonaws.com/"
+    keys = []
+    for url in post.get("images") or []:
+        key = url.replace(prefix, "")
+        if key.startswith("post-pictures/"):
+            keys.extend(rendition_keys(key))
+    return keys
+
+
+def delete_post_with_cleanup(post: dict) -> bool:
+    """
+    Delete the post and record a pending cleanup job for it in one transaction, so
+    there is never a job for a live post nor a deleted post without a job.
+    Returns False when the post was already deleted, e.g. by a concurrent request.
+    """
+    # Any job already on file belongs to an earlier failed attempt; the post is live, so replace it
+    job = {
+        "postId": post["postId"],
+        "status": "pending",
+        "timestamp": post.get("timestamp"),
+        "topics": list(post.get("topics") or []),
+        "images": image_keys(post),
+        "attempts": 0,
+        "requestedAt": _now(),
+        "updatedAt": _now(),
+        "expiresAt": int((datetime.now() + CLEANUP_RETENTION).timestamp()),
+    }
+    serializer = TypeSerializer()
+    try:
+        dynamodb.meta.client.transact_write_items(TransactItems=[
+            {
+                "Delete": {
+                    "TableName": "posts",
+                    "Key": {"postId": {"S": post["postId"]}},
+                    "ConditionExpression": "attribute_exists(postId)",
+                }
+            },
+            {
+                "Put": {
+                    "TableName": "post_cleanup",
+                    "Item": {name: serializer.serialize(value) for name, value in job.items()},
+                }
+            },
+        ])
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'TransactionCanceledException':
+            raise
+        reasons = [reason.get("Code") for reason in e.response.get("CancellationReasons", [])]
+        if reasons and reasons[0] == "ConditionalCheckFailed":
+            return False
+        raise
+
+
+def get_cleanup_status(post_id: str) -> Optional[dict]:
+    return post_cleanup_table.get_item(Key={"postId": post_id}, ConsistentRead=True).get("Item")
+
+
+def _claim(post_id: str) -> Optional[dict]:
+    """
+    Move a pending or failed job (or one whose lease ran out) to running.
+    Returns the job, or None when it is done or another worker holds it.
+    """
+    now = datetime.now()
+    try:
+        return post_cleanup_table.update_item(
+            Key={"postId": post_id},
+            UpdateExpression="SET #status = :running, leaseUntil = :lease, updatedAt = :now ADD attempts :one",
+            ConditionExpression="attribute_exists(postId) AND (#status IN (:pending, :failed) OR "
+                                "(#status = :running AND leaseUntil < :now))",
+            ExpressionAttributeNames={"#status": "status"},
+            ExpressionAttributeValues={
+                ":running": "running",
+                ":pending": "pending",
+                ":failed": "failed",
+                ":lease": str(now + CLEANUP_LEASE),
+                ":now": str(now),
+                ":one": 1,
+            },
+            ReturnValues="ALL_NEW",
+        )["Attributes"]
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+            return None
+        raise
+
+
+def _finish(post_id: str, status: str, error: Optional[str] = None):
+    values = {":status": status, ":now": _now()}
+    if error is None:
+        update_expression = "SET #status = :status, updatedAt = :now REMOVE leaseUntil, #error"
+    else:
+        update_expression = "SET #status = :status, updatedAt = :now, #error = :error REMOVE leaseUntil"
+        values[":error"] = error
+    post_cleanup_table.update_item(
+        Key={"postId": post_id},
+        UpdateExpression=update_expression,
+        ExpressionAttributeNames={"#status": "status", "#error": "error"},
+        ExpressionAttributeValues=values,
+    )
+
+
+def _delete_query_results(table, key_names: List[str], **query_kwargs) -> int:
+    """
+    Delete every row a (paginated) query returns with batched BatchWriteItem calls.
+    """
+    deleted = 0
+    query_kwargs["ProjectionExpression"] = ", ".join(key_names)
+    with table.batch_writer(overwrite_by_pkeys=key_names) as batch:
+        while True:
+            response = table.query(**query_kwargs)
+            for item in response.get("Items", []):
+                batch.delete_item(Key={name: item[name] for name in key_names})
+                deleted += 1
+            if "LastEvaluatedKey" not in response:
+                return deleted
+            query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def _delete_images(job: dict):
+    failed = delete_files_from_s3(job.get("images") or [])
+    if failed:
+        raise RuntimeError(f"S3 did not delete {len(failed)} images: {failed}")
+
+
+def _delete_comments(job: dict):
+    deleted = _delete_query_results(
+        comments_table, ["commentId"], IndexName=POST_INDEX, KeyConditionExpression=Key("postId").eq(job["postId"])
+    )
+    logger.info(f"Deleted {deleted} comments of post {job['postId']}")
+
+
+def _delete_likes(job: dict):
+    _delete_query_results(post_likes_table, ["postId", "username"], KeyConditionExpression=Key("postId").eq(job["postId"]))
+
+
+def _unindex_topics(job: dict):
+    unindex_post_topics({"postId": job["postId"], "timestamp": job.get("timestamp")}, job.get("topics") or [])
+
+
+def _remove_from_feeds(job: dict):
+    removed = remove_post_from_feeds(job["postId"])
+    logger.info(f"Removed post {job['postId']} from {removed} feeds")
+
+
+# Every step is idempotent, so a retried job simply runs all of them again
+CLEANUP_STEPS = [_delete_images, _delete_comments, _delete_likes, _unindex_topics, _remove_from_feeds]
+
+
+def run_post_cleanup(post_id: str) -> Optional[str]:
+    """
+    Remove what a deleted post leaves behind: S3 images, comments, likes, topic
+    index rows and feed entries. Each step is retried with backoff; the final status
+    is stored on the job and returned (None when there was nothing to claim). A job
+    whose post still exists is cancelled without touching anything.
+    """
+    job = _claim(post_id)
+    if job is None:
+        return None
+
+    # Jobs written before deletes became transactional may belong to a post whose delete failed
+    if "Item" in posts_table.get_item(Key={"postId": post_id}, ProjectionExpression="postId", ConsistentRead=True):
+        _finish(post_id, "cancelled", "Post still exists")
+        logger.warning(f"Cleanup of post {post_id} cancelled: the post still exists")
+        return "cancelled"
+
+    for step in CLEANUP_STEPS:
+        for attempt in range(CLEANUP_STEP_ATTEMPTS):
+            try:
+                step(job)
+                break
+            except Exception as e:
+                logger.warning(f"Cleanup step {step.__name__} for post {post_id} failed (attempt {attempt + 1}): {e}")
+                if attempt + 1 == CLEANUP_STEP_ATTEMPTS:
+                    _finish(post_id, "failed", f"{step.__name__}: {e}")
+                    logger.error(f"Cleanup of post {post_id} failed: {e}")
+                    return "failed"
+                time.sleep(2 ** attempt)
+
+    _finish(post_id, "done")
+    logger.info(f"Cleanup of post {post_id} finished")
+    return "done"
@@ -0,0 +1,166 @@
+import asyncio
+import logging
+import os
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+from api.aws_wrappers.dynamo import run_dynamodb
+from api.db_setup import dynamodb
+
+comments_table = dynamodb.Table('comments')
+posts_table = dynamodb.Table('posts')
+
+logger = logging.getLogger(__name__)
+
+# GSI on comments: postId (HASH) + timestamp (RANGE), replacing the hash-only PostIndex
+POST_INDEX = "PostTimeIndex"
+
+# Upper bound on post index queries in flight for a single request
+MAX_CONCURRENT_QUERIES = int(os.getenv("COMMENT_LOADER_CONCURRENCY", 8))
+
+
+def _query_post_index(post_id: str, count_only: bool = False, newest_first: bool = True,
+                      limit: Optional[int] = None) -> dict:
+    """
+    Query the post index for a single post in creation order, following
+    LastEvaluatedKey so posts with more than 1 MB of comments are not truncated.
+    Stops after `limit` comments when given.
+    """
+    query_kwargs = {
+        "IndexName": POST_INDEX,
+        "KeyConditionExpression": Key("postId").eq(post_id),
+        "ScanIndexForward": not newest_first,
+    }
+    if count_only:
+        query_kwargs["Select"] = "COUNT"
+
+    items = []
+    count = 0
+    while True:
+        if limit is not None:
+            query_kwargs["Limit"] = limit - len(items)
+        response = comments_table.query(**query_kwargs)
+        items.extend(response.get("Items", []))
+        count += response.get("Count", 0)
+        if "LastEvaluatedKey" not in response or (limit is not None and len(items) >= limit):
+            break
+        query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    return {"items": items, "count": count}
+
+
+def query_comments_page(post_id: str, limit: int, cursor: Optional[dict] = None,
+                        newest_first: bool = True) -> Tuple[List[dict], Optional[dict]]:
+    """
+    Read one page of a post's comments in creation order.
+    Returns the comments and the LastEvaluatedKey to resume from, or None when exhausted.
+    """
+    query_kwargs = {
+        "IndexName": POST_INDEX,
+        "KeyConditionExpression": Key("postId").eq(post_id),
+        "ScanIndexForward": not newest_first,
+        "Limit": limit,
+    }
+    if cursor:
+        query_kwargs["ExclusiveStartKey"] = cursor
+
+    response = comments_table.query(**query_kwargs)
+    return response.get("Items", []), response.get("LastEvaluatedKey")
+
+
+def adjust_comment_count(post_id: str, delta: int):
+    """
+    Atomically add `delta` to the post's commentCount.
+    Comments on posts that are not in the posts table (e.g. group posts) are ignored.
+    """
+    try:
+        posts_table.update_item(
+            Key={"postId": post_id},
+            UpdateExpression="ADD commentCount :delta",
+            ConditionExpression="attribute_exists(postId)",
+            ExpressionAttributeValues={":delta": delta},
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+
+
+def reconcile_comment_count(post: dict) -> bool:
+    """
+    Recount a post's comments from the post index and repair commentCount if it drifted.
+    The write is conditioned on the value read, so a concurrent comment is not overwritten;
+    the next run picks that post up again. Returns whether the count was repaired.
+    """
+    actual = _query_post_index(post["postId"], count_only=True)["count"]
+    stored = post.get("commentCount")
+    if stored is not None and int(stored) == actual:
+        return False
+    condition = "attribute_not_exists(commentCount)" if stored is None else "commentCount = :stored"
+    values = {":actual": actual}
+    if stored is not None:
+        values[":stored"] = stored
+    try:
+        posts_table.update_item(
+            Key={"postId": post["postId"]},
+            UpdateExpression="SET commentCount = :actual",
+            ConditionExpression=f"attribute_exists(postId) AND {condition}",
+            ExpressionAttributeValues=values,
+        )
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        return False
+
+
+async def _gather_per_post(post_ids: Iterable[str], load: Callable[[str], object],
+                           timeout: Optional[float] = None) -> Dict[str, object]:
+    """
+    Run `load` for every distinct post id off the event loop, with at most
+    MAX_CONCURRENT_QUERIES calls in flight, and key the results by post id.
+
+    With `timeout` all calls share one deadline: posts whose query failed or
+    had not finished by then are left out of the result instead of failing it.
+    """
+    unique_ids = list(dict.fromkeys(post_ids))
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_QUERIES)
+
+    async def run(post_id: str):
+        async with semaphore:
+            return await run_dynamodb(load, post_id, timeout=timeout)
+
+    if timeout is None:
+        results = await asyncio.gather(*(run(post_id) for post_id in unique_ids))
+        return dict(zip(unique_ids, results))
+
+    if not unique_ids:
+        return {}
+    tasks = {asyncio.ensure_future(run(post_id)): post_id for post_id in unique_ids}
+    done, pending = await asyncio.wait(tasks, timeout=timeout)
+    # Queries still queued on the semaphore never start; running ones finish in their thread unobserved
+    for task in pending:
+        task.cancel()
+
+    results = {}
+    for task in done:
+        if task.exception() is None:
+            results[tasks[task]] = task.result()
+        else:
+            logger.warning(f"Failed to load comments of post {tasks[task]}: {task.exception()}")
+    if pending:
+        logger.warning(f"Comment loading hit its {timeout}s deadline with {len(pending)} posts outstanding")
+    return results
+
+
+async def load_comments(post_ids: Iterable[str], latest: Optional[int] = None,
+                        timeout: Optional[float] = None) -> Dict[str, List[dict]]:
+    """
+    Load the comments for many posts at once, grouped by postId.
+    When `latest` is given only the newest `latest` comments of each post are returned.
+    When `timeout` is given, posts not loaded within it are missing from the result.
+    """
+    def load(post_id: str) -> List[dict]:
+        return _query_post_index(post_id, limit=latest)["items"]
+
+    return await _gather_per_post(post_ids, load, timeout)
+
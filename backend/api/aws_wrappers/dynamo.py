@@ -0,0 +1,66 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import HTTPException
+from api.db_setup import dynamodb, DYNAMODB_MAX_CONNECTIONS
+
+# Threads dedicated to DynamoDB calls made from async handlers, sized to the connection pool
+dynamodb_executor = ThreadPoolExecutor(max_workers=DYNAMODB_MAX_CONNECTIONS, thread_name_prefix="dynamodb")
+
+# Upper bound on a single read from the caller's point of view, retries included.
+# Writes get no deadline: a write may still commit after we stop waiting for it
+DYNAMODB_CALL_TIMEOUT = float(os.getenv("DYNAMODB_CALL_TIMEOUT", 10))
+
+
+async def run_dynamodb(func, *args, timeout: float = None, **kwargs):
+    """
+    Run a blocking boto3 call (or a helper made of them) on the DynamoDB thread
+    pool and await it, so the event loop keeps serving other requests.
+    Raises a 504 if it does not finish within `timeout` seconds, so use it only
+    for reads; writes go through run_dynamodb_write.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(dynamodb_executor, functools.partial(func, *args, **kwargs))
+    try:
+        return await asyncio.wait_for(future, timeout or DYNAMODB_CALL_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Database request timed out.")
+
+
+async def run_dynamodb_write(func, *args, **kwargs):
+    """
+    Like run_dynamodb but without a deadline, for calls that write. A timed-out
+    request would report failure for a write that may still commit, so these are
+    bounded only by botocore's connect and read timeouts and retries.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(dynamodb_executor, functools.partial(func, *args, **kwargs))
+
+
+class AsyncTable:
+    """
+    Awaitable counterpart of a boto3 DynamoDB Table for use in async routes.
+    Takes the same keyword arguments and returns the same responses as boto3.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        self.table = dynamodb.Table(name)
+
+    async def get_item(self, **kwargs):
+        return await run_dynamodb(self.table.get_item, **kwargs)
+
+    async def put_item(self, **kwargs):
+        return await run_dynamodb_write(self.table.put_item, **kwargs)
+
+    async def update_item(self, **kwargs):
+        return await run_dynamodb_write(self.table.update_item, **kwargs)
+
+    async def delete_item(self, **kwargs):
+        return await run_dynamodb_write(self.table.delete_item, **kwargs)
+
+    async def query(self, **kwargs):
+        return await run_dynamodb(self.table.query, **kwargs)
+
+    async def scan(self, **kwargs):
+        return await run_dynamodb(self.table.scan, **kwargs)
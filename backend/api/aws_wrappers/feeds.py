@@ -0,0 +1,304 @@
+import logging
+import os
+from collections import Counter
+from typing import Iterable, List, Optional, Set, Tuple
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+from api.cache import TTLCache
+from api.db_setup import dynamodb
+from api.aws_wrappers.batch import batch_get_items
+from api.aws_wrappers.post_indexes import batch_get_posts, query_posts_by_topics, query_timeline
+from api.nlp.trends import parse_post_time
+
+logger = logging.getLogger(__name__)
+
+users_table = dynamodb.Table('users')
+
+# Materialized feeds: username (HASH) + postId (RANGE), ranked by score through SCORE_INDEX
+user_feeds_table = dynamodb.Table('feed_entries')
+
+# LSI on feed_entries: username (HASH) + score (RANGE)
+SCORE_INDEX = "ScoreIndex"
+
+# GSI on feed_entries: feedPostId (HASH), set on entries only
+POST_FEEDS_INDEX = "PostFeedsIndex"
+
+# Adjacency list of push-mode users per interest: topic (HASH) + username (RANGE)
+user_interests_table = dynamodb.Table('user_interests')
+
+# Reserved range keys: subscriber counter per topic, entry counter per feed
+SUBSCRIBERS_KEY = "#subscribers"
+FEED_SIZE_KEY = "#size"
+
+# Feed entries kept per user; trimming runs once a feed is FEED_TRIM_SLACK over the limit
+FEED_MAX_ITEMS = int(os.getenv("FEED_MAX_ITEMS", 500))
+FEED_TRIM_SLACK = 50
+
+# Each interest a post matches ranks it like a post this many seconds newer
+FEED_TOPIC_BOOST = 6 * 60 * 60
+
+# Topics with more push-mode subscribers than this are not fanned out on write
+FANOUT_MAX_AUDIENCE = int(os.getenv("FANOUT_MAX_AUDIENCE", 1000))
+
+# Users with more interests than this read their feed with fan-out on read
+FEED_MAX_PUSH_INTERESTS = 10
+
+# Recent posts copied into a feed when a user picks new interests
+FEED_SEED_POSTS = 50
+
+_hot_topics_cache = TTLCache(maxsize=1024, ttl=300)
+
+
+def feed_score(post: dict, overlap: int) -> int:
+    return int(parse_post_time(post.get("timestamp")).timestamp()) + overlap * FEED_TOPIC_BOOST
+
+
+def is_push_user(interests: Optional[Iterable[str]]) -> bool:
+    return 0 < len(set(interests or [])) <= FEED_MAX_PUSH_INTERESTS
+
+
+def _add_counter(table, key: dict, delta: int) -> int:
+    response = table.update_item(
+        Key=key,
+        UpdateExpression="ADD #count :delta",
+        ExpressionAttributeNames={"#count": "count"},
+        ExpressionAttributeValues={":delta": delta},
+        ReturnValues="UPDATED_NEW",
+    )
+    return int(response["Attributes"]["count"])
+
+
+def set_user_interests(username: str, old_interests: Optional[Iterable[str]], new_interests: Optional[Iterable[str]]):
+    """
+    Keep a user's rows in user_interests in line with their interests. Users
+    with broad interests are left out, so they are served with fan-out on read.
+    Newly added interests seed the feed with recent matching posts.
+    """
+    old_topics = set(old_interests or []) if is_push_user(old_interests) else set()
+    new_topics = set(new_interests or []) if is_push_user(new_interests) else set()
+
+    for topic in new_topics - old_topics:
+        try:
+            user_interests_table.put_item(
+                Item={"topic": topic, "username": username},
+                ConditionExpression="attribute_not_exists(username)",
+            )
+            _add_counter(user_interests_table, {"topic": topic, "username": SUBSCRIBERS_KEY}, 1)
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                raise
+    for topic in old_topics - new_topics:
+        response = user_interests_table.delete_item(Key={"topic": topic, "username": username}, ReturnValues="ALL_OLD")
+        if "Attributes" in response:
+            _add_counter(user_interests_table, {"topic": topic, "username": SUBSCRIBERS_KEY}, -1)
+
+    if new_topics - old_topics:
+        seed_user_feed(username, new_topics)
+
+
+def remove_user_feed(username: str, interests: Optional[Iterable[str]]):
+    """
+    Drop a deleted user's interest rows and materialized feed.
+    """
+    set_user_interests(username, interests, None)
+    query_kwargs = {"KeyConditionExpression": Key("username").eq(username), "ProjectionExpression": "postId"}
+    with user_feeds_table.batch_writer() as batch:
+        while True:
+            response = user_feeds_table.query(**query_kwargs)
+            for item in response.get("Items", []):
+                batch.delete_item(Key={"username": username, "postId": item["postId"]})
+            if "LastEvaluatedKey" not in response:
+                return
+            query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def hot_topics(topics: Iterable[str]) -> Set[str]:
+    """
+    Which of `topics` have too many subscribers to fan out on write.
+    Counters are cached for a few minutes.
+    """
+    hot, unknown = set(), []
+    for topic in set(topics):
+        subscribers = _hot_topics_cache.get(topic)
+        if subscribers is None:
+            unknown.append(topic)
+        elif subscribers > FANOUT_MAX_AUDIENCE:
+            hot.add(topic)
+
+    if unknown:
+        counts = {topic: 0 for topic in unknown}
+        for item in batch_get_items(
+            "user_interests",
+            [{"topic": topic, "username": SUBSCRIBERS_KEY} for topic in unknown],
+            projection="topic, #count",
+            attribute_names={"#count": "count"},
+        ):
+            counts[item["topic"]] = int(item.get("count", 0))
+        for topic, subscribers in counts.items():
+            _hot_topics_cache.set(topic, subscribers)
+            if subscribers > FANOUT_MAX_AUDIENCE:
+                hot.add(topic)
+    return hot
+
+
+def _subscribers(topic: str) -> List[str]:
+    usernames = []
+    query_kwargs = {"KeyConditionExpression": Key("topic").eq(topic), "ProjectionExpression": "username"}
+    while True:
+        response = user_interests_table.query(**query_kwargs)
+        usernames.extend(item["username"] for item in response.get("Items", []) if item["username"] != SUBSCRIBERS_KEY)
+        if "LastEvaluatedKey" not in response:
+            return usernames
+        query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def push_to_feed(username: str, entries: List[Tuple[dict, int]]):
+    """
+    Add (post, overlap) entries to a user's feed and trim it once it outgrows FEED_MAX_ITEMS.
+    A post already in the feed is overwritten with its new score rather than added twice;
+    the size counter still counts it, which only brings the next trim forward.
+    """
+    if not entries:
+        return
+    with user_feeds_table.batch_writer(overwrite_by_pkeys=["username", "postId"]) as batch:
+        for post, overlap in entries:
+            batch.put_item(Item={
+                "username": username,
+                "postId": post["postId"],
+                "score": feed_score(post, overlap),
+                "feedPostId": post["postId"],
+            })
+    size = _add_counter(user_feeds_table, {"username": username, "postId": FEED_SIZE_KEY}, len(entries))
+    if size > FEED_MAX_ITEMS + FEED_TRIM_SLACK:
+        _trim_feed(username)
+
+
+def _trim_feed(username: str):
+    """
+    Delete everything below the top FEED_MAX_ITEMS entries and reset the counter to what is left.
+    """
+    # The "#size" row has no score, so it is not in the score index
+    query_kwargs = {
+        "IndexName": SCORE_INDEX,
+        "KeyConditionExpression": Key("username").eq(username),
+        "ProjectionExpression": "postId",
+        "ScanIndexForward": False,
+    }
+    kept = 0
+    with user_feeds_table.batch_writer(overwrite_by_pkeys=["username", "postId"]) as batch:
+        while True:
+            response = user_feeds_table.query(**query_kwargs)
+            for item in response.get("Items", []):
+                if kept < FEED_MAX_ITEMS:
+                    kept += 1
+                else:
+                    batch.delete_item(Key={"username": username, "postId": item["postId"]})
+            if "LastEvaluatedKey" not in response:
+                break
+            query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+    user_feeds_table.put_item(Item={"username": username, "postId": FEED_SIZE_KEY, "count": kept})
+
+
+def remove_post_from_feeds(post_id: str) -> int:
+    """
+    Delete a deleted post's entries from every feed it was pushed to, found through
+    POST_FEEDS_INDEX, and shrink those feeds' size counters. Returns the entries removed.
+    """
+    query_kwargs = {"IndexName": POST_FEEDS_INDEX, "KeyConditionExpression": Key("feedPostId").eq(post_id)}
+    removed = 0
+    while True:
+        response = user_feeds_table.query(**query_kwargs)
+        for item in response.get("Items", []):
+            deleted = user_feeds_table.delete_item(
+                Key={"username": item["username"], "postId": post_id}, ReturnValues="ALL_OLD"
+            )
+            # The index lags the table; only entries that were still there shrink the counter
+            if "Attributes" in deleted:
+                _add_counter(user_feeds_table, {"username": item["username"], "postId": FEED_SIZE_KEY}, -1)
+                removed += 1
+        if "LastEvaluatedKey" not in response:
+            return removed
+        query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def fan_out_post(post: dict):
+    """
+    Push a new post into the feeds of users interested in its topics, scored by
+    how many of their interests it matches. Topics with too many subscribers are
+    skipped; their readers pick the post up with fan-out on read.
+    """
+    topics = set(post.get("topics") or [])
+    overlap = Counter()
+    for topic in topics - hot_topics(topics):
+        overlap.update(_subscribers(topic))
+    overlap.pop(post.get("author"), None)
+
+    for username, matches in overlap.items():
+        try:
+            push_to_feed(username, [(post, matches)])
+        except ClientError as e:
+            logger.error(f"Failed to push post {post['postId']} to the feed of {username}: {e}")
+    logger.info(f"Fanned out post {post['postId']} to {len(overlap)} feeds")
+
+
+def seed_user_feed(username: str, interests: Iterable[str]):
+    interests = set(interests)
+    posts, _ = query_posts_by_topics(list(interests), FEED_SEED_POSTS)
+    push_to_feed(username, [
+        (post, len(interests & set(post.get("topics") or [])))
+        for post in posts if post.get("author") != username
+    ])
+
+
+def _rank(posts: List[dict], interests: Set[str]) -> List[dict]:
+    return sorted(posts, key=lambda post: feed_score(post, len(interests & set(post.get("topics") or []))), reverse=True)
+
+
+def read_user_feed(username: str, limit: int, cursor: Optional[dict] = None) -> Tuple[List[dict], Optional[dict]]:
+    """
+    Read one page of a user's personalized feed.
+
+    Push-mode users get one Query on their materialized feed. Users with broad
+    interests, or interests in topics too hot to fan out, get fan-out on read:
+    the topic index is merged at request time and each page ranked the same way.
+    Users without interests see the global timeline.
+    Returns the posts and the state to resume from, or None when exhausted.
+    """
+    user = users_table.get_item(Key={"username": username}, ProjectionExpression="interests").get("Item")
+    if user is None:
+        return [], None
+    interests = set(user.get("interests") or [])
+
+    if cursor:
+        mode = cursor.get("mode")
+    elif not interests:
+        mode = "timeline"
+    elif not is_push_user(interests) or hot_topics(interests):
+        mode = "pull"
+    else:
+        mode = "push"
+
+    if mode == "push":
+        query_kwargs = {
+            "IndexName": SCORE_INDEX,
+            "KeyConditionExpression": Key("username").eq(username),
+            "ScanIndexForward": False,
+            "Limit": limit,
+        }
+        if cursor and cursor.get("key"):
+            query_kwargs["ExclusiveStartKey"] = cursor["key"]
+        response = user_feeds_table.query(**query_kwargs)
+        post_ids = [item["postId"] for item in response.get("Items", [])]
+        if post_ids or cursor:
+            last_key = response.get("LastEvaluatedKey")
+            return batch_get_posts(post_ids), {"mode": "push", "key": last_key} if last_key else None
+        # Nothing materialized yet (e.g. before the backfill ran): serve this reader on read
+        mode = "pull"
+
+    inner = cursor.get("state") if cursor else None
+    if mode == "pull":
+        posts, inner = query_posts_by_topics(list(interests), limit, inner)
+        posts = _rank(posts, interests)
+    else:
+        posts, inner = query_timeline(limit, inner)
+    return posts, {"mode": mode, "state": inner} if inner else None
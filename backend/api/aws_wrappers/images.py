@@ -1,58 +1,181 @@
 from fastapi import File, UploadFile, HTTPException
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+import asyncio
 import boto3
+import logging
+import os
 import uuid
 from api.config import S3_BUCKET_NAME
+from api.image_processing import IMAGE_CONTENT_TYPE, IMAGE_EXTENSION, InvalidImage, process_image
 
 s3_client = boto3.client('s3')
 
-def upload_file_to_s3(file: UploadFile, file_name: str) -> str:
+logger = logging.getLogger(__name__)
+
+# Threads dedicated to S3 transfers so uploads never block the event loop
+S3_UPLOAD_WORKERS = int(os.getenv("S3_UPLOAD_WORKERS", 8))
+s3_executor = ThreadPoolExecutor(max_workers=S3_UPLOAD_WORKERS, thread_name_prefix="s3-upload")
+
+MB = 1024 * 1024
+
+# Uploads larger than this are refused before decoding
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", 20)) * MB
+
+# Renditions stored per upload prefix. The first is the one whose URL is saved on the
+# user, post or group; the others live next to it and are found with rendition_url()
+IMAGE_RENDITIONS = {
+    "profile-pictures": ("feed", "avatar"),
+    "group-pictures": ("feed", "avatar"),
+    "post-pictures": ("feed",),
+}
+
+S3_URL_PREFIX = f"https://{S3_BUCKET_NAME}.s3.amazonaws.com/"
+
+def upload_file_to_s3(body: bytes, file_name: str) -> str:
     """
-    Uploads a file to S3 and returns the file URL.
-    Replace this with your actual S3 upload logic.
+    Uploads an encoded image to S3 and returns the file URL.
+    Keys are never reused, so browsers and CDNs may cache the object indefinitely.
+    Blocking; run it in s3_executor from async code.
     """
     try:
-        s3_client.upload_fileobj(file.file, S3_BUCKET_NAME, file_name)
-        return f"https://{S3_BUCKET_NAME}.s3.amazonaws.com/{file_name}"
+        s3_client.put_object(
+            Bucket=S3_BUCKET_NAME,
+            Key=file_name,
+            Body=body,
+            ContentType=IMAGE_CONTENT_TYPE,
+            CacheControl="public, max-age=31536000, immutable",
+        )
+        return f"{S3_URL_PREFIX}{file_name}"
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to upload image: {str(e)}")
 
 def delete_file_from_s3(file_name: str):
     """
     Deletes a file from S3.
-    Replace this with your actual S3 delete logic.
     """
     try:
         s3_client.delete_object(Bucket=S3_BUCKET_NAME, Key=file_name)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete image: {str(e)}")
 
-async def upload_image(prefix: str, file: UploadFile = File(...)):
-    file_extension = file.filename.split(".")[-1] if "." in file.filename else ""
-    allowed_extensions = {"jpg", "jpeg", "png", "gif"}
+def delete_files_from_s3(file_names: List[str]):
+    """
+    Deletes many files from S3 with batched delete_objects calls (1000 keys each).
+    Returns the keys S3 reported as not deleted.
+    """
+    failed = []
+    for start in range(0, len(file_names), 1000):
+        response = s3_client.delete_objects(
+            Bucket=S3_BUCKET_NAME,
+            Delete={
+                "Objects": [{"Key": name} for name in file_names[start:start + 1000]],
+                "Quiet": True,
+            },
+        )
+        failed.extend(error["Key"] for error in response.get("Errors", []))
+    return failed
+
+def _check_image_file(file: UploadFile):
+    file_extension = file.filename.split(".")[-1].lower() if "." in file.filename else ""
+    allowed_extensions = {"jpg", "jpeg", "png", "gif", "webp"}
 
     if file_extension not in allowed_extensions:
-        raise HTTPException(status_code=400, detail="Invalid file type. Allowed: jpg, jpeg, png, gif")
-    
-    # Generate a unique file name using UUID
-    unique_id = str(uuid.uuid4())
+        raise HTTPException(status_code=400, detail="Invalid file type. Allowed: jpg, jpeg, png, gif, webp")
+
+def rendition_key(image_key: str, rendition: str) -> str:
+    return f"{image_key}/{rendition}.{IMAGE_EXTENSION}"
+
+def rendition_keys(file_name: str) -> List[str]:
+    """
+    Every S3 key stored for an uploaded image, given the key of any of its renditions.
+    Images uploaded before renditions existed are a single object.
+    """
+    parts = file_name.split("/")
+    if len(parts) == 3 and parts[0] in IMAGE_RENDITIONS and parts[2].split(".")[0] in IMAGE_RENDITIONS[parts[0]]:
+        extension = parts[2].split(".")[-1]
+        return [f"{parts[0]}/{parts[1]}/{rendition}.{extension}" for rendition in IMAGE_RENDITIONS[parts[0]]]
+    return [file_name]
+
+def rendition_url(url: Optional[str], rendition: str) -> Optional[str]:
+    """
+    URL of another rendition of an uploaded image, e.g. the avatar of a profile picture.
+    Anything else (images from before renditions existed, foreign URLs, None) is returned unchanged.
+    """
+    if not url or not url.startswith(S3_URL_PREFIX):
+        return url
+    parts = url[len(S3_URL_PREFIX):].split("/")
+    if len(parts) != 3 or rendition not in IMAGE_RENDITIONS.get(parts[0], ()):
+        return url
+    return f"{S3_URL_PREFIX}{parts[0]}/{parts[1]}/{rendition}.{parts[2].split('.')[-1]}"
 
-    # Add the prefix to the file name
-    file_name = f"{prefix}/{unique_id}.{file_extension}"
+async def _read_renditions(prefix: str, file: UploadFile) -> dict:
+    # Read at most one byte past the limit, so oversized uploads are never held in memory whole
+    data = await file.read(MAX_UPLOAD_BYTES + 1)
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail=f"Image too large. Maximum size is {MAX_UPLOAD_BYTES // MB} MB")
+    try:
+        return await process_image(data, IMAGE_RENDITIONS[prefix])
+    except InvalidImage:
+        raise HTTPException(status_code=400, detail=f"Could not read image {file.filename}")
+
+async def upload_images(prefix: str, files: List[UploadFile]) -> List[str]:
+    """
+    Re-encode several images into the renditions of their prefix (decoding runs on
+    the image process pool, which also strips metadata), upload every rendition in
+    parallel on s3_executor, and return the primary rendition's URL per image, in order.
+    If any upload fails, uploads that have not started are cancelled, the ones
+    that finished are deleted again, and the first error is raised.
+    """
+    # Validate and process every file before anything is sent
+    for file in files:
+        _check_image_file(file)
+    processed = await asyncio.gather(*(_read_renditions(prefix, file) for file in files))
 
-    # Upload the file to S3
-    file_url = upload_file_to_s3(file, file_name)
-    return file_url
+    image_keys = [f"{prefix}/{uuid.uuid4()}" for _ in files]
+    uploads = [
+        (renditions[name], rendition_key(image_key, name))
+        for image_key, renditions in zip(image_keys, processed)
+        for name in IMAGE_RENDITIONS[prefix]
+    ]
+    file_names = [name for _, name in uploads]
+
+    futures = [s3_executor.submit(upload_file_to_s3, body, name) for body, name in uploads]
+    try:
+        await asyncio.gather(*(asyncio.wrap_future(future) for future in futures))
+        return [f"{S3_URL_PREFIX}{rendition_key(image_key, IMAGE_RENDITIONS[prefix][0])}" for image_key in image_keys]
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        # Uploads already running cannot be interrupted; wait for them so nothing lands after cleanup
+        await asyncio.gather(
+            *(asyncio.wrap_future(future) for future in futures if not future.cancelled()),
+            return_exceptions=True,
+        )
+        uploaded = [name for name, future in zip(file_names, futures)
+                    if not future.cancelled() and future.exception() is None]
+        if uploaded:
+            try:
+                await asyncio.get_running_loop().run_in_executor(s3_executor, delete_files_from_s3, uploaded)
+            except Exception as cleanup_error:
+                logger.error(f"Failed to clean up uploaded images {uploaded}: {cleanup_error}")
+        raise
+
+async def upload_image(prefix: str, file: UploadFile = File(...)):
+    return (await upload_images(prefix, [file]))[0]
 
 async def delete_image(prefix: str, file_name: str):
-    file_name = file_name.replace(f"https://{S3_BUCKET_NAME}.s3.amazonaws.com/", "")
+    file_name = file_name.replace(S3_URL_PREFIX, "")
     # Ensure the file_name includes the "post-pictures/" prefix
     if not file_name.startswith(f"{prefix}/"):
         raise HTTPException(
             status_code=400,
             detail=f"File name must start with '{prefix}/'"
         )
-    
-    # Delete the file from S3
-    delete_file_from_s3(file_name)
-    
-    return {"message": "Image deleted successfully"}
\ No newline at end of file
+
+    # Delete the file from S3, with every other rendition of the image
+    failed = await asyncio.get_running_loop().run_in_executor(s3_executor, delete_files_from_s3, rendition_keys(file_name))
+    if failed:
+        raise HTTPException(status_code=500, detail=f"Failed to delete image: {failed}")
+
+    return {"message": "Image deleted successfully"}
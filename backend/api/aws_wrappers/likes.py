@@ -0,0 +1,136 @@
+import random
+import time
+from typing import Iterable, List, Set, Tuple
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import ClientError
+from fastapi import HTTPException
+from api.db_setup import dynamodb
+from api.aws_wrappers.batch import batch_get_items
+
+posts_table = dynamodb.Table('posts')
+
+# One row per like: postId (HASH) + username (RANGE); posts keep only the likes counter
+post_likes_table = dynamodb.Table('post_likes')
+
+# Attempts before giving up when concurrent toggles by the same user keep flipping the state under us
+MAX_TOGGLE_ATTEMPTS = 5
+
+
+def _transact(post_id: str, like_write: dict, delta: int) -> List[str]:
+    """
+    Write the like row and add `delta` to the post's counter in one TransactWriteItems
+    call, the counter conditioned on the post existing. Returns [] on success, or the
+    cancellation reason codes: one for the like row, then one for the counter.
+    """
+    try:
+        dynamodb.meta.client.transact_write_items(TransactItems=[
+            like_write,
+            {
+                "Update": {
+                    "TableName": "posts",
+                    "Key": {"postId": {"S": post_id}},
+                    "UpdateExpression": "ADD likes :delta",
+                    "ConditionExpression": "attribute_exists(postId)",
+                    "ExpressionAttributeValues": {":delta": {"N": str(delta)}},
+                }
+            },
+        ])
+        return []
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'TransactionCanceledException':
+            raise
+        return [reason.get("Code", "None") for reason in e.response.get("CancellationReasons", [])]
+
+
+def toggle_like(post_id: str, username: str) -> Tuple[int, bool]:
+    """
+    Like the post for `username`, or unlike it if they already do. The like row and
+    the post's counter change in one transaction, so neither can move without the
+    other, and nothing is written for a post that does not exist.
+    Returns the new like count and whether the user now likes the post.
+    """
+    key = {"postId": {"S": post_id}, "username": {"S": username}}
+    for attempt in range(MAX_TOGGLE_ATTEMPTS):
+        reasons = _transact(post_id, {
+            "Put": {"TableName": "post_likes", "Item": key, "ConditionExpression": "attribute_not_exists(postId)"}
+        }, 1)
+        is_liked = True
+        if reasons and reasons[0] == "ConditionalCheckFailed" and reasons[1] != "ConditionalCheckFailed":
+            # Already liked: remove the like instead
+            reasons = _transact(post_id, {
+                "Delete": {"TableName": "post_likes", "Key": key, "ConditionExpression": "attribute_exists(postId)"}
+            }, -1)
+            is_liked = False
+
+        if not reasons:
+            response = posts_table.get_item(Key={"postId": post_id}, ProjectionExpression="likes", ConsistentRead=True)
+            return int(response.get("Item", {}).get("likes", 0)), is_liked
+        if reasons[1] == "ConditionalCheckFailed":
+            raise HTTPException(status_code=404, detail="Post not found")
+        if not set(reasons) <= {"ConditionalCheckFailed", "TransactionConflict", "None"}:
+            raise RuntimeError(f"Like transaction for post {post_id} cancelled: {reasons}")
+
+        # A concurrent toggle by the same user won; back off with jitter and try again
+        time.sleep(random.uniform(0, 0.02 * 2 ** attempt))
+
+    raise HTTPException(status_code=409, detail="Too many concurrent like updates, please retry")
+
+
+def reconcile_like_count(post: dict) -> bool:
+    """
+    Recount a post's post_likes rows and repair its likes counter if it drifted, e.g.
+    under versions that wrote the two separately. The write is conditioned on the value
+    read, so a concurrent toggle is not overwritten. Returns whether the count was repaired.
+    """
+    actual = 0
+    query_kwargs = {"KeyConditionExpression": Key("postId").eq(post["postId"]), "Select": "COUNT"}
+    while True:
+        response = post_likes_table.query(**query_kwargs)
+        actual += response["Count"]
+        if "LastEvaluatedKey" not in response:
+            break
+        query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+    stored = post.get("likes")
+    if stored is not None and int(stored) == actual:
+        return False
+    condition = "attribute_not_exists(likes)" if stored is None else "likes = :stored"
+    values = {":actual": actual}
+    if stored is not None:
+        values[":stored"] = stored
+    try:
+        posts_table.update_item(
+            Key={"postId": post["postId"]},
+            UpdateExpression="SET likes = :actual",
+            ConditionExpression=f"attribute_exists(postId) AND {condition}",
+            ExpressionAttributeValues=values,
+        )
+        return True
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        return False
+
+
+def liked_post_ids(username: str, post_ids: Iterable[str]) -> Set[str]:
+    """
+    Which of `post_ids` the user has liked, with one BatchGetItem per 100 posts.
+    """
+    keys = [{"postId": post_id, "username": username} for post_id in dict.fromkeys(post_ids)]
+    return {item["postId"] for item in batch_get_items("post_likes", keys, projection="postId")}
+
+
+def move_liked_by_to_store(post: dict):
+    """
+    Copy a post's embedded likedBy list or set into post_likes, reset the
+    counter to the number of likers and drop likedBy from the post.
+    """
+    likers = set(post.get("likedBy") or [])
+    with post_likes_table.batch_writer(overwrite_by_pkeys=["postId", "username"]) as batch:
+        for username in likers:
+            batch.put_item(Item={"postId": post["postId"], "username": username})
+    posts_table.update_item(
+        Key={"postId": post["postId"]},
+        UpdateExpression="REMOVE likedBy SET likes = :likes",
+        ExpressionAttributeValues={":likes": len(likers)},
+    )
@@ -0,0 +1,40 @@
+import base64
+import binascii
+import json
+from decimal import Decimal
+from typing import Optional
+from fastapi import HTTPException
+
+
+def _encode_decimal(value):
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_cursor(state: Optional[dict]) -> Optional[str]:
+    """
+    Turn a pagination state (usually a DynamoDB LastEvaluatedKey) into an opaque,
+    URL-safe cursor string. Returns None when there is nothing left to page through.
+    """
+    if not state:
+        return None
+    raw = json.dumps(state, default=_encode_decimal, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[dict]:
+    """
+    Reverse encode_cursor. Numbers come back as Decimal so they can be passed
+    straight back to boto3 as ExclusiveStartKey values.
+    """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode())
+        state = json.loads(raw, parse_float=Decimal, parse_int=Decimal)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+    if not isinstance(state, dict):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+    return state
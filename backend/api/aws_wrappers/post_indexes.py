@@ -0,0 +1,297 @@
+import heapq
+from datetime import datetime
+from typing import Iterable, List, Optional, Set, Tuple
+from boto3.dynamodb.conditions import Attr, Key
+from fastapi import HTTPException
+from api.cache import TTLCache
+from api.db_setup import dynamodb
+from api.aws_wrappers.batch import batch_get_items
+
+posts_table = dynamodb.Table('posts')
+
+# Adjacency table: topic (HASH) + sortKey (RANGE, "<timestamp>#<postId>")
+post_topics_table = dynamodb.Table('post_topics')
+
+# GSI on posts: timelineBucket (HASH, "YYYY-MM") + timestamp (RANGE)
+TIMELINE_INDEX = "TimelineIndex"
+
+# GSI on posts: author (HASH) + timestamp (RANGE)
+AUTHOR_INDEX = "AuthorIndex"
+
+# month (HASH, "YYYY-MM"): one row per month that has posts
+timeline_months_table = dynamodb.Table('timeline_months')
+
+# Months with posts, newest first; other workers' new months show up within the TTL
+_timeline_months = TTLCache(maxsize=1, ttl=300)
+
+
+def timeline_bucket(timestamp: str) -> str:
+    """
+    Month bucket ("YYYY-MM") a post timestamp belongs to on the timeline index.
+    """
+    try:
+        return datetime.fromisoformat(timestamp).strftime("%Y-%m")
+    except (TypeError, ValueError):
+        return datetime.now().strftime("%Y-%m")
+
+
+def timeline_months() -> List[str]:
+    """
+    Months that have posts, newest first, from the timeline_months table.
+    """
+    months = _timeline_months.get("months")
+    if months is None:
+        months = set()
+        scan_kwargs = {"ProjectionExpression": "#month", "ExpressionAttributeNames": {"#month": "month"}}
+        while True:
+            response = timeline_months_table.scan(**scan_kwargs)
+            months.update(item["month"] for item in response.get("Items", []))
+            if "LastEvaluatedKey" not in response:
+                break
+            scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+        months = sorted(months, reverse=True)
+        _timeline_months.set("months", months)
+    return months
+
+
+def register_timeline_month(bucket: str):
+    """
+    Record that `bucket` has posts, so timeline pages walk into it.
+    """
+    if bucket in timeline_months():
+        return
+    timeline_months_table.put_item(Item={"month": bucket})
+    _timeline_months.set("months", sorted({*timeline_months(), bucket}, reverse=True))
+
+
+def previous_bucket(bucket: str) -> Optional[str]:
+    """
+    Newest month older than `bucket` that has posts, or None when there is none.
+    """
+    return next((month for month in timeline_months() if month < bucket), None)
+
+
+def _valid_bucket(bucket) -> bool:
+    try:
+        return isinstance(bucket, str) and datetime.strptime(bucket, "%Y-%m").strftime("%Y-%m") == bucket
+    except ValueError:
+        return False
+
+
+def query_timeline(limit: int, cursor: Optional[dict] = None) -> Tuple[List[dict], Optional[dict]]:
+    """
+    Read one page of posts newest first from the timeline index.
+
+    Each bucket is read with a bounded Query; when a month runs out before the
+    page is full the next-older month with posts is queried, so empty months
+    cost nothing. Returns the posts and the state to resume from, or None when
+    exhausted. Raises a 400 for a cursor whose bucket is not a "YYYY-MM" month.
+    """
+    if cursor:
+        bucket = cursor.get("bucket")
+        start_key = cursor.get("key")
+        if not _valid_bucket(bucket) or not isinstance(start_key, (dict, type(None))):
+            raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+    else:
+        bucket = datetime.now().strftime("%Y-%m")
+        start_key = None
+
+    items = []
+    while len(items) < limit and bucket:
+        query_kwargs = {
+            "IndexName": TIMELINE_INDEX,
+            "KeyConditionExpression": Key("timelineBucket").eq(bucket),
+            "ScanIndexForward": False,
+            "Limit": limit - len(items),
+        }
+        if start_key:
+            query_kwargs["ExclusiveStartKey"] = start_key
+
+        response = posts_table.query(**query_kwargs)
+        items.extend(response.get("Items", []))
+        start_key = response.get("LastEvaluatedKey")
+        if not start_key:
+            bucket = previous_bucket(bucket)
+
+    if not bucket:
+        return items, None
+    return items, {"bucket": bucket, "key": start_key}
+
+
+def iter_timeline_since(since: str, page_size: int = 100):
+    """
+    Yield posts newest first until reaching ones created before `since`.
+    """
+    cursor = None
+    while True:
+        posts, cursor = query_timeline(page_size, cursor)
+        for post in posts:
+            if post.get("timestamp", "") < since:
+                return
+            yield post
+        if cursor is None:
+            return
+
+
+def query_posts_by_author(author: str, limit: int, cursor: Optional[dict] = None) -> Tuple[List[dict], Optional[dict]]:
+    """
+    Read one page of an author's posts newest first from the author index.
+    Returns the posts and the LastEvaluatedKey to resume from, or None when exhausted.
+    Raises a 400 for a cursor that is not an author index key of this author.
+    """
+    if cursor and (
+        set(cursor) != {"author", "timestamp", "postId"}
+        or not all(isinstance(value, str) for value in cursor.values())
+        or cursor["author"] != author
+    ):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+
+    query_kwargs = {
+        "IndexName": AUTHOR_INDEX,
+        "KeyConditionExpression": Key("author").eq(author),
+        "ScanIndexForward": False,
+        "Limit": limit,
+    }
+    if cursor:
+        query_kwargs["ExclusiveStartKey"] = cursor
+
+    response = posts_table.query(**query_kwargs)
+    return response.get("Items", []), response.get("LastEvaluatedKey")
+
+
+def batch_get_posts(post_ids: List[str]) -> List[dict]:
+    """
+    Fetch posts by id with BatchGetItem and return them in the order of
+    `post_ids` (missing posts are skipped).
+    """
+    keys = [{"postId": post_id} for post_id in dict.fromkeys(post_ids)]
+    found = {item["postId"]: item for item in batch_get_items("posts", keys)}
+    return [found[post_id] for post_id in post_ids if post_id in found]
+
+
+def topic_sort_key(post: dict) -> str:
+    return f"{post['timestamp']}#{post['postId']}"
+
+
+def _valid_sort_key(sort_key) -> bool:
+    if not isinstance(sort_key, str):
+        return False
+    timestamp, _, post_id = sort_key.partition("#")
+    try:
+        datetime.fromisoformat(timestamp)
+    except ValueError:
+        return False
+    return bool(post_id)
+
+
+def index_post_topics(post: dict, topics: Optional[Iterable[str]] = None):
+    """
+    Write one post_topics row per topic of the post. Each row carries the post's
+    full topic set so AND queries can be answered from a single topic's rows.
+    """
+    all_topics = set(post.get("topics") or [])
+    with post_topics_table.batch_writer(overwrite_by_pkeys=["topic", "sortKey"]) as batch:
+        for topic in (all_topics if topics is None else topics):
+            batch.put_item(Item={
+                "topic": topic,
+                "sortKey": topic_sort_key(post),
+                "postId": post["postId"],
+                "timestamp": post["timestamp"],
+                "topics": all_topics,
+            })
+
+
+def unindex_post_topics(post: dict, topics: Optional[Iterable[str]] = None):
+    """
+    Remove the post_topics rows of a post, for all of its topics or only `topics`.
+    """
+    with post_topics_table.batch_writer(overwrite_by_pkeys=["topic", "sortKey"]) as batch:
+        for topic in (post.get("topics") or [] if topics is None else topics):
+            batch.delete_item(Key={"topic": topic, "sortKey": topic_sort_key(post)})
+
+
+def reindex_post_topics(post: dict, old_topics: Set[str]):
+    """
+    Bring post_topics in line after a post's topics changed from `old_topics`
+    to `post["topics"]`. Rows that stay are rewritten to refresh their topic set.
+    """
+    unindex_post_topics(post, set(old_topics) - set(post.get("topics") or []))
+    index_post_topics(post)
+
+
+def _query_topic(topic: str, limit: int, before: Optional[str], match_all: Set[str]) -> Tuple[List[dict], Optional[str]]:
+    """
+    Read up to `limit` rows of one topic older than `before`.
+    Returns the matching rows and the sortKey the read stopped at, or None if the topic is exhausted.
+    """
+    key_condition = Key("topic").eq(topic)
+    if before:
+        key_condition = key_condition & Key("sortKey").lt(before)
+    query_kwargs = {
+        "KeyConditionExpression": key_condition,
+        "ScanIndexForward": False,
+        "Limit": limit,
+    }
+    if match_all:
+        filter_expression = None
+        for other in match_all:
+            condition = Attr("topics").contains(other)
+            filter_expression = condition if filter_expression is None else filter_expression & condition
+        query_kwargs["FilterExpression"] = filter_expression
+
+    response = post_topics_table.query(**query_kwargs)
+    last_key = response.get("LastEvaluatedKey")
+    return response.get("Items", []), last_key["sortKey"] if last_key else None
+
+
+def query_posts_by_topics(
+    topics: List[str],
+    limit: int,
+    cursor: Optional[dict] = None,
+    match_all: bool = False,
+) -> Tuple[List[dict], Optional[dict]]:
+    """
+    Read one page of posts tagged with any (or, with match_all, every) topic, newest first.
+
+    OR pages merge the newest rows of each topic and drop duplicates; AND pages
+    walk the first topic's rows and keep those whose topic set covers the rest.
+    Returns the posts and the state to resume from, or None when exhausted.
+    Raises a 400 for a cursor whose position is not a "<timestamp>#<postId>" sort key.
+    """
+    topics = list(dict.fromkeys(topics))
+    before = cursor.get("before") if cursor else None
+    if cursor and not _valid_sort_key(before):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.")
+    driving_topics = topics[:1] if match_all else topics
+    required = set(topics[1:]) if match_all else set()
+
+    page_keys = []
+    horizon = None
+    while len(page_keys) < limit:
+        wanted = limit - len(page_keys)
+        rows_by_topic = []
+        # Newest position some topic stopped reading at; rows older than it may still be unread
+        horizon = None
+        for topic in driving_topics:
+            rows, stopped_at = _query_topic(topic, wanted, before, required)
+            rows_by_topic.append([row["sortKey"] for row in rows])
+            if stopped_at is not None and (horizon is None or stopped_at > horizon):
+                horizon = stopped_at
+
+        for sort_key in heapq.merge(*rows_by_topic, reverse=True):
+            if horizon is not None and sort_key < horizon:
+                break
+            if page_keys and page_keys[-1] == sort_key:
+                continue
+            page_keys.append(sort_key)
+            if len(page_keys) == limit:
+                break
+
+        if horizon is None:
+            break
+        before = horizon
+
+    posts = batch_get_posts([sort_key.split("#", 1)[1] for sort_key in page_keys])
+    if len(page_keys) == limit:
+        return posts, {"before": page_keys[-1]}
+    return posts, None
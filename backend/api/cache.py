@@ -0,0 +1,220 @@
+import asyncio
+import logging
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+from fastapi.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+# Shared second tier for caches that opt in, e.g. redis://localhost:6379/0; unset keeps caches in-process
+CACHE_REDIS_URL = os.getenv("CACHE_REDIS_URL")
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe in-process LRU cache whose entries also expire `ttl` seconds after being set.
+    """
+    def __init__(self, maxsize: int = 1024, ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+class RedisBackend:
+    """
+    Shared cache tier backed by Redis, so every worker process sees the same entries.
+    Values are pickled because DynamoDB items carry Decimals and sets.
+    """
+    def __init__(self, url: str, namespace: str):
+        import redis  # Optional dependency, only needed when CACHE_REDIS_URL is set
+        self.client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        self.namespace = namespace
+
+    def _key(self, key: Hashable) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: Hashable) -> Any:
+        raw = self.client.get(self._key(key))
+        return _MISSING if raw is None else pickle.loads(raw)
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        self.client.set(self._key(key), pickle.dumps(value), px=int(ttl * 1000))
+
+    def delete(self, key: Hashable):
+        self.client.delete(self._key(key))
+
+
+class _Flight:
+    def __init__(self):
+        self.future = asyncio.get_running_loop().create_future()
+        self.stale = False
+
+
+class ReadThroughCache:
+    """
+    Read-through cache for async loaders: an in-process TTLCache in front of an
+    optional shared backend. Concurrent misses for one key share a single load,
+    and writers call invalidate() so readers never wait out the TTL after a change.
+    Loaders returning None (not found) are not cached.
+    """
+    def __init__(self, name: str, maxsize: int = 1024, ttl: float = 30, shared_ttl: float = 300, shared=None):
+        self.name = name
+        self.local = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.shared = shared
+        self.shared_ttl = shared_ttl
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.loads = 0
+        self.coalesced = 0
+        self.shared_hits = 0
+        self.shared_errors = 0
+
+    async def get(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        value = self.local.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        flight = self._flights.get(key)
+        if flight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(flight.future)
+
+        flight = self._flights[key] = _Flight()
+        try:
+            value = await self._load(key, load)
+            if value is not None and not flight.stale:
+                self.local.set(key, value)
+            flight.future.set_result(value)
+            return value
+        except BaseException as e:
+            flight.future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting on it
+            flight.future.exception()
+            raise
+        finally:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    async def _load(self, key: Hashable, load: Callable[[], Awaitable[Any]]) -> Any:
+        if self.shared is not None:
+            try:
+                value = await run_in_threadpool(self.shared.get, key)
+                if value is not _MISSING:
+                    self.shared_hits += 1
+                    return value
+            except Exception as e:
+                self.shared_errors += 1
+                logger.warning(f"Shared cache read failed for {self.name}:{key}: {e}")
+
+        self.loads += 1
+        value = await load()
+        if value is not None and self.shared is not None:
+            try:
+                await run_in_threadpool(self.shared.set, key, value, self.shared_ttl)
+            except Exception as e:
+                self.shared_errors += 1
+                logger.warning(f"Shared cache write failed for {self.name}:{key}: {e}")
+        return value
+
+    async def invalidate(self, key: Hashable):
+        """
+        Drop `key` from both tiers. A load already in flight still answers its
+        waiters but its result is not stored.
+        """
+        self.local.delete(key)
+        flight = self._flights.pop(key, None)
+        if flight is not None:
+            flight.stale = True
+        if self.shared is not None:
+            try:
+                await run_in_threadpool(self.shared.delete, key)
+            except Exception as e:
+                self.shared_errors += 1
+                logger.error(f"Shared cache invalidation failed for {self.name}:{key}: {e}")
+
+    def stats(self) -> dict:
+        return {
+            **self.local.stats(),
+            "loads": self.loads,
+            "coalesced": self.coalesced,
+            "sharedHits": self.shared_hits,
+            "sharedErrors": self.shared_errors,
+            "backend": "redis" if self.shared is not None else "memory",
+        }
+
+
+# Every cache created through make_cache, reported by GET /cache/stats
+caches: Dict[str, Any] = {}
+
+
+def make_cache(name: str, **kwargs) -> ReadThroughCache:
+    """
+    Create and register a read-through cache, using Redis as the shared tier when CACHE_REDIS_URL is set.
+    """
+    shared = None
+    if CACHE_REDIS_URL:
+        try:
+            shared = RedisBackend(CACHE_REDIS_URL, namespace=name)
+        except ImportError:
+            logger.warning("CACHE_REDIS_URL is set but the redis package is not installed; using in-process cache only")
+    cache = caches[name] = ReadThroughCache(name, shared=shared, **kwargs)
+    return cache
+
+
+def cache_stats() -> dict:
+    return {name: cache.stats() for name, cache in caches.items()}
+
+
+# Single-post reads go through this cache; the posts and comments routers invalidate it on every write
+post_cache = make_cache(
+    "posts",
+    maxsize=int(os.getenv("POST_CACHE_SIZE", 2048)),
+    ttl=float(os.getenv("POST_CACHE_TTL", 30)),
+)
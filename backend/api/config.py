@@ -1,9 +1,18 @@
 # backend/api/config.py
+from fastapi import Depends, HTTPException, Request
+from fastapi.security.utils import get_authorization_scheme_param
 from fastapi_login import LoginManager
+from fastapi_login.exceptions import InvalidCredentialsException
+from jose import JWTError, jwt
+from datetime import datetime, timedelta
+from uuid import uuid4
 import os
 from dotenv import load_dotenv
 import logging
 from botocore.exceptions import ClientError
+from api.aws_wrappers.dynamo import run_dynamodb
+from api.cache import TTLCache, caches
+from api.db_setup import dynamodb
 
 # Load environment variables
 load_dotenv()
@@ -14,7 +23,129 @@ STRIPE_SECRET_KEY = os.getenv("STRIPE_SECRET_KEY", "default_stripe_secret_key")
 VITE_STRIPE_PUBLISHABLE_KEY = os.getenv("VITE_STRIPE_PUBLISHABLE_KEY", "default_stripe_publishable_key")
 VITE_STRIPE_WEBHOOK_SECRET = os.getenv("VITE_STRIPE_WEBHOOK_SECRET", "default_stripe_webhook_secret")
 
-login_manager = LoginManager(SECRET_KEY, token_url="/users/login")
+# Access tokens are short-lived and carry the user's role; refresh tokens renew them without a password
+ACCESS_TOKEN_EXPIRES = timedelta(minutes=10)
+REFRESH_TOKEN_EXPIRES = timedelta(days=int(os.getenv("REFRESH_TOKEN_DAYS", 7)))
+
+# Revoked sessions: sid (HASH), expired by DynamoDB TTL once the session's tokens would have
+# expired anyway. Shared by every worker and survives restarts
+revoked_sessions_table = dynamodb.Table('revoked_sessions')
+
+# Sessions known to be revoked, so repeat requests with a dead token skip the lookup.
+# Only revocations are cached: an evicted entry costs one more read, never an un-revocation
+revoked_sessions = TTLCache(maxsize=100000, ttl=REFRESH_TOKEN_EXPIRES.total_seconds())
+
+
+def is_revoked(sid: str) -> bool:
+    if not sid:
+        return False
+    if revoked_sessions.get(sid):
+        return True
+    item = revoked_sessions_table.get_item(Key={"sid": sid}, ConsistentRead=True).get("Item")
+    # TTL deletion lags expiry, so expired rows still count as revoked until they are gone
+    if item is not None:
+        revoked_sessions.set(sid, True)
+    return item is not None
+
+
+async def check_claims(claims: dict, token_type: str = "access") -> dict:
+    """
+    Refuse tokens that are not of `token_type` or whose session was revoked.
+    Tokens issued before roles were signed in have no type and are accepted as access tokens.
+    """
+    if claims.get("type", "access") != token_type or await run_dynamodb(is_revoked, claims.get("sid")):
+        raise InvalidCredentialsException
+    return claims
+
+
+async def decode_token(token: str, token_type: str = "access") -> dict:
+    """
+    Verify a token's signature and expiry, that it is of `token_type` and that its session was not revoked.
+    """
+    try:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[login_manager.algorithm])
+    except JWTError:
+        raise InvalidCredentialsException
+    return await check_claims(claims, token_type)
+
+
+class TokenLoginManager(LoginManager):
+    """
+    LoginManager that also refuses refresh tokens and tokens of revoked sessions.
+    Depends(login_manager) decodes the token and then calls _get_current_user with
+    its payload, so the checks go there.
+    """
+    async def _get_current_user(self, payload: dict):
+        await check_claims(payload)
+        return await super()._get_current_user(payload)
+
+
+login_manager = TokenLoginManager(SECRET_KEY, token_url="/users/login")
+
+
+def create_tokens(username: str, role: str) -> dict:
+    """
+    Sign a new session's access and refresh tokens. Both share a sid, so revoking the session ends both.
+    """
+    claims = {"sub": username, "role": role, "sid": uuid4().hex}
+    return {
+        "access_token": login_manager.create_access_token(data={**claims, "type": "access"}, expires=ACCESS_TOKEN_EXPIRES),
+        "refresh_token": login_manager.create_access_token(data={**claims, "type": "refresh"}, expires=REFRESH_TOKEN_EXPIRES),
+        "token_type": "bearer",
+        "role": role,
+    }
+
+
+def claim_session(claims: dict) -> bool:
+    """
+    Revoke the session unless it already was, with one conditional put. Returns False
+    when another request, on any worker, revoked it first.
+    """
+    sid = claims.get("sid")
+    if not sid:
+        return False
+    # Any token of the session was issued before now, so it is dead within REFRESH_TOKEN_EXPIRES
+    expires_at = int((datetime.now() + REFRESH_TOKEN_EXPIRES).timestamp())
+    try:
+        revoked_sessions_table.put_item(
+            Item={"sid": sid, "expiresAt": expires_at},
+            ConditionExpression="attribute_not_exists(sid)",
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        revoked_sessions.set(sid, True)
+        return False
+    revoked_sessions.set(sid, True)
+    return True
+
+
+def revoke_session(claims: dict):
+    claim_session(claims)
+
+
+async def token_claims(request: Request) -> dict:
+    """
+    Claims of the request's verified access token, for routes that only need the
+    username and role and not the user record.
+    """
+    scheme, token = get_authorization_scheme_param(request.headers.get("Authorization"))
+    if scheme.lower() != "bearer" or not token:
+        raise InvalidCredentialsException
+    return await decode_token(token)
+
+
+async def require_admin(claims: dict = Depends(token_claims)) -> dict:
+    if claims.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Access forbidden. Admin privileges required.")
+    return claims
+
+# Users loaded for authenticated requests; the users router invalidates entries it changes
+auth_user_cache = TTLCache(
+    maxsize=int(os.getenv("AUTH_CACHE_SIZE", 4096)),
+    ttl=float(os.getenv("AUTH_CACHE_TTL", 60)),
+)
+caches["auth_users"] = auth_user_cache
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
@@ -23,16 +154,24 @@ logger.info(f"login_manager._user_callback before registration: {login_manager._
 
 @login_manager.user_loader()
 def load_user(username: str):
+    user = auth_user_cache.get(username)
+    if user is not None:
+        return dict(user)
     try:
-        from api.db_setup import dynamodb  # Import here to avoid circular imports
         response = dynamodb.Table('users').get_item(Key={"username": username})
         user = response.get("Item")
+        if user is not None:
+            auth_user_cache.set(username, user)
+            return dict(user)
         return user
     except ClientError as e:
         logger.error(f"Error loading user from DynamoDB: {e}")
         return None
 
+def invalidate_user(username: str):
+    auth_user_cache.delete(username)
+
 logger.info(f"login_manager._user_callback after registration: {login_manager._user_callback}")
 
 # Export the login_manager for use in other modules
-__all__ = ["login_manager"]
+__all__ = ["login_manager", "invalidate_user", "create_tokens", "token_claims", "require_admin"]
@@ -1,6 +1,7 @@
 import os
 import boto3
 from dotenv import load_dotenv
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 # Load environment variables from .env file
@@ -11,12 +12,21 @@ aws_access_key_id = os.getenv('aws_access_key_id')
 aws_secret_access_key = os.getenv('aws_secret_access_key')
 aws_region = os.getenv('aws_region')
 
+# Connections kept open to DynamoDB; also the size of the async DynamoDB thread pool
+DYNAMODB_MAX_CONNECTIONS = int(os.getenv('DYNAMODB_MAX_CONNECTIONS', 32))
+
 # Create a DynamoDB resource
 dynamodb = boto3.resource(
     'dynamodb',
     aws_access_key_id=aws_access_key_id,
     aws_secret_access_key=aws_secret_access_key,
-    region_name=aws_region
+    region_name=aws_region,
+    config=Config(
+        max_pool_connections=DYNAMODB_MAX_CONNECTIONS,
+        connect_timeout=float(os.getenv('DYNAMODB_CONNECT_TIMEOUT', 2)),
+        read_timeout=float(os.getenv('DYNAMODB_READ_TIMEOUT', 5)),
+        retries={'max_attempts': 3, 'mode': 'standard'}
+    )
 )
 
 def create_users_table():
@@ -95,6 +105,60 @@ def create_posts_table():
                 {
                     'AttributeName': 'postId',
                     'AttributeType': 'S'
+                },
+                {
+                    'AttributeName': 'timelineBucket',
+                    'AttributeType': 'S'  # "YYYY-MM" month of the post
+                },
+                {
+                    'AttributeName': 'timestamp',
+                    'AttributeType': 'S'
+                },
+                {
+                    'AttributeName': 'author',
+                    'AttributeType': 'S'
+                }
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    'IndexName': 'TimelineIndex',
+                    'KeySchema': [
+                        {
+                            'AttributeName': 'timelineBucket',
+                            'KeyType': 'HASH'
+                        },
+                        {
+                            'AttributeName': 'timestamp',
+                            'KeyType': 'RANGE'
+                        }
+                    ],
+                    'Projection': {
+                        'ProjectionType': 'ALL'
+                    },
+                    'ProvisionedThroughput': {
+                        'ReadCapacityUnits': 5,
+                        'WriteCapacityUnits': 5
+                    }
+                },
+                {
+                    'IndexName': 'AuthorIndex',
+                    'KeySchema': [
+                        {
+                            'AttributeName': 'author',
+                            'KeyType': 'HASH'
+                        },
+                        {
+                            'AttributeName': 'timestamp',
+                            'KeyType': 'RANGE'
+                        }
+                    ],
+                    'Projection': {
+                        'ProjectionType': 'ALL'
+                    },
+                    'ProvisionedThroughput': {
+                        'ReadCapacityUnits': 5,
+                        'WriteCapacityUnits': 5
+                    }
                 }
             ],
             ProvisionedThroughput={
@@ -133,15 +197,23 @@ def create_comments_table():
                 {
                     'AttributeName': 'author',
                     'AttributeType': 'S'  # String type for author username
+                },
+                {
+                    'AttributeName': 'timestamp',
+                    'AttributeType': 'S'  # Creation time, orders comments within a post
                 }
             ],
             GlobalSecondaryIndexes=[
                 {
-                    'IndexName': 'PostIndex',
+                    'IndexName': 'PostTimeIndex',
                     'KeySchema': [
                         {
                             'AttributeName': 'postId',
                             'KeyType': 'HASH'
+                        },
+                        {
+                            'AttributeName': 'timestamp',
+                            'KeyType': 'RANGE'
                         }
                     ],
                     'Projection': {
@@ -183,6 +255,404 @@ def create_comments_table():
         else:
             raise e
 
+def create_post_topics_table():
+    try:
+        # Inverted topic -> post index kept in sync by the posts router
+        table = dynamodb.create_table(
+            TableName='post_topics',
+            KeySchema=[
+                {
+                    'AttributeName': 'topic',
+                    'KeyType': 'HASH'  # Partition key
+                },
+                {
+                    'AttributeName': 'sortKey',
+                    'KeyType': 'RANGE'  # "<timestamp>#<postId>", newest last
+                }
+            ],
+            AttributeDefinitions=[
+                {
+                    'AttributeName': 'topic',
+                    'AttributeType': 'S'
+                },
+                {
+                    'AttributeName': 'sortKey',
+                    'AttributeType': 'S'
+                }
+            ],
+            ProvisionedThroughput={
+                'ReadCapacityUnits': 5,
+                'WriteCapacityUnits': 5
+            }
+        )
+        print("Creating post_topics table...")
+        table.meta.client.get_waiter('table_exists').wait(TableName='post_topics')
+        print("Post topics table created successfully.")
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ResourceInUseException':
+            print("Post topics table already exists.")
+        else:
+            raise e
+
+def create_post_likes_table():
+    try:
+        # One row per (post, user) like; posts only keep the likes counter
+        table = dynamodb.create_table(
+            TableName='post_likes',
+            KeySchema=[
+                {
+                    'AttributeName': 'postId',
+                    'KeyType': 'HASH'  # Partition key
+                },
+                {
+                    'AttributeName': 'username',
+                    'KeyType': 'RANGE'
+                }
+            ],
+            AttributeDefinitions=[
+                {
+                    'AttributeName': 'postId',
+                    'AttributeType': 'S'
+                },
+                {
+                    'AttributeName': 'username',
+                    'AttributeType': 'S'
+                }
+            ],
+            ProvisionedThroughput={
+                'ReadCapacityUnits': 5,
+                'WriteCapacityUnits': 5
+            }
+        )
+        print("Creating post_likes table...")
+        table.meta.client.get_waiter('table_exists').wait(TableName='post_likes')
+        print("Post likes table created successfully.")
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ResourceInUseException':
+            print("Post likes table already exists.")
+        else:
+            raise e
+
+def create_topic_trends_table():
+    try:
+        # Hourly and daily post counters per topic for the trending endpoints
+        table = dynamodb.create_table(
+            TableName='topic_trends',
+            KeySchema=[
+                {
+                    'AttributeName': 'bucket',
+                    'KeyType': 'HASH'  # "H#YYYY-MM-DDTHH" or "D#YYYY-MM-DD"
+                },
+                {
+                    'AttributeName': 'topic',
+                    'KeyType': 'RANGE'
+                }
+            ],
+            AttributeDefinitions=[
+                {
+                    'AttributeName': 'bucket',
+                    'AttributeType': 'S'
+                },
+                {
+                    'AttributeName': 'topic',
+                    'AttributeType': 'S'
+                }
+            ],
+            ProvisionedThroughput={
+                'ReadCapacityUnits': 5,
+                'WriteCapacityUnits': 5
+            }
+        )
+        print("Creating topic_trends table...")
+        table.meta.client.get_waiter('table_exists').wait(TableName='topic_trends')
+        # Expire counters once they fall out of the longest trending window
+        table.meta.client.update_time_to_live(
+            TableName='topic_trends',
+            TimeToLiveSpecification={
+                'Enabled': True,
+                'AttributeName': 'expiresAt'
+            }
+        )
+        print("Topic trends table created successfully.")
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ResourceInUseException':
+            print("Topic trends table already exists.")
+        else:
+            raise e
+
+def create_feed_entries_table():
+    try:
+        # Materialized per-user feeds, one row per (user, post) so a post is never in a feed twice.
+        # ScoreIndex ranks a user's entries by score with one Query; PostFeedsIndex finds the
+        # feeds holding a post when it is deleted. Only entries carry feedPostId, so the per-user
+        # "#size" counter rows stay out of that index
+        table = dynamodb.create_table(
+            TableName='feed_entries',
+            KeySchema=[
+                {
+                    'AttributeName': 'username',
+                    'KeyType': 'HASH'  # Partition key
+                },
+                {
+                    'AttributeName': 'postId',
+                    'KeyType': 'RANGE'
+                }
+            ],
+            AttributeDefinitions=[
+                {
+                    'AttributeName': 'username',
+                    'AttributeType': 'S'
+                },
+                {
+                    'AttributeName': 'postId',
+                    'AttributeType': 'S'
+                },
+                {
+                    'AttributeName': 'score',
+                    'AttributeType': 'N'
+                },
+                {
+                    'AttributeName': 'feedPostId',
+                    'AttributeType': 'S'
+                }
+            ],
+            LocalSecondaryIndexes=[
+                {
+                    'IndexName': 'ScoreIndex',
+                    'KeySchema': [
+                        {
+                            'AttributeName': 'username',
+                            'KeyType': 'HASH'
+                        },
+                        {
+                            'AttributeName': 'score',
+                            'KeyType': 'RANGE'
+                        }
+                    ],
+                    'Projection': {
+                        'ProjectionType': 'KEYS_ONLY'
+                    }
+                }
+            ],
+            GlobalSecondaryIndexes=[
+                {
+                    'IndexName': 'PostFeedsIndex',
+                    'KeySchema': [
+                        {
+                            'AttributeName': 'feedPostId',
+                            'KeyType': 'HASH'
+                        }
+                    ],
+                    'Projection': {
+                        'ProjectionType': 'KEYS_ONLY'
+                    },
+                    'ProvisionedThroughput': {
+                        'ReadCapacityUnits': 5,
+                        'WriteCapacityUnits': 5
+                    }
+                }
+            ],
+            ProvisionedThroughput={
+                'ReadCapacityUnits': 5,
+                'WriteCapacityUnits': 5
+            }
+        )
+        print("Creating feed_entries table...")
+        table.meta.client.get_waiter('table_exists').wait(TableName='feed_entries')
+        print("Feed entries table created successfully.")
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ResourceInUseException':
+            print("Feed entries table already exists.")
+        else:
+            raise e
+
+def create_user_interests_table():
+    try:
+        # Users per interest topic, read when fanning a new post out to feeds
+        table = dynamodb.create_table(
+            TableName='user_interests',
+            KeySchema=[
+                {
+                    'AttributeName': 'topic',
+                    'KeyType': 'HASH'  # Partition key
+                },
+                {
+                    'AttributeName': 'username',
+                    'KeyType': 'RANGE'
+                }
+            ],
+            AttributeDefinitions=[
+                {
+                    'AttributeName': 'topic',
+                    'AttributeType': 'S'
+                },
+                {
+                    'AttributeName': 'username',
+                    'AttributeType': 'S'
+                }
+            ],
+            ProvisionedThroughput={
+                'ReadCapacityUnits': 5,
+                'WriteCapacityUnits': 5
+            }
+        )
+        print("Creating user_interests table...")
+        table.meta.client.get_waiter('table_exists').wait(TableName='user_interests')
+        print("User interests table created successfully.")
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ResourceInUseException':
+            print("User interests table already exists.")
+        else:
+            raise e
+
+def create_post_cleanup_table():
+    try:
+        # One status row per deleted post while its comments, likes and images are removed
+        table = dynamodb.create_table(
+            TableName='post_cleanup',
+            KeySchema=[
+                {
+                    'AttributeName': 'postId',
+                    'KeyType': 'HASH'
+                }
+            ],
+            AttributeDefinitions=[
+                {
+                    'AttributeName': 'postId',
+                    'AttributeType': 'S'
+                }
+            ],
+            ProvisionedThroughput={
+                'ReadCapacityUnits': 5,
+                'WriteCapacityUnits': 5
+            }
+        )
+        print("Creating post_cleanup table...")
+        table.meta.client.get_waiter('table_exists').wait(TableName='post_cleanup')
+        # Finished jobs are dropped once nobody needs to poll them anymore
+        table.meta.client.update_time_to_live(
+            TableName='post_cleanup',
+            TimeToLiveSpecification={
+                'Enabled': True,
+                'AttributeName': 'expiresAt'
+            }
+        )
+        print("Post cleanup table created successfully.")
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ResourceInUseException':
+            print("Post cleanup table already exists.")
+        else:
+            raise e
+
+def create_keyword_trends_table():
+    try:
+        # One row per hour with that hour's top keyword counts, merged from every worker
+        table = dynamodb.create_table(
+            TableName='keyword_trends',
+            KeySchema=[
+                {
+                    'AttributeName': 'hour',
+                    'KeyType': 'HASH'
+                }
+            ],
+            AttributeDefinitions=[
+                {
+                    'AttributeName': 'hour',
+                    'AttributeType': 'S'
+                }
+            ],
+            ProvisionedThroughput={
+                'ReadCapacityUnits': 5,
+                'WriteCapacityUnits': 5
+            }
+        )
+        print("Creating keyword_trends table...")
+        table.meta.client.get_waiter('table_exists').wait(TableName='keyword_trends')
+        # Hours older than the longest trending window are dropped
+        table.meta.client.update_time_to_live(
+            TableName='keyword_trends',
+            TimeToLiveSpecification={
+                'Enabled': True,
+                'AttributeName': 'expiresAt'
+            }
+        )
+        print("Keyword trends table created successfully.")
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ResourceInUseException':
+            print("Keyword trends table already exists.")
+        else:
+            raise e
+
+def create_revoked_sessions_table():
+    try:
+        # One row per revoked login session (the tokens' sid claim), shared by every worker
+        table = dynamodb.create_table(
+            TableName='revoked_sessions',
+            KeySchema=[
+                {
+                    'AttributeName': 'sid',
+                    'KeyType': 'HASH'
+                }
+            ],
+            AttributeDefinitions=[
+                {
+                    'AttributeName': 'sid',
+                    'AttributeType': 'S'
+                }
+            ],
+            ProvisionedThroughput={
+                'ReadCapacityUnits': 5,
+                'WriteCapacityUnits': 5
+            }
+        )
+        print("Creating revoked_sessions table...")
+        table.meta.client.get_waiter('table_exists').wait(TableName='revoked_sessions')
+        # Rows are dropped once the session's refresh token would have expired anyway
+        table.meta.client.update_time_to_live(
+            TableName='revoked_sessions',
+            TimeToLiveSpecification={
+                'Enabled': True,
+                'AttributeName': 'expiresAt'
+            }
+        )
+        print("Revoked sessions table created successfully.")
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ResourceInUseException':
+            print("Revoked sessions table already exists.")
+        else:
+            raise e
+
+def create_timeline_months_table():
+    try:
+        # One row per month ("YYYY-MM") that has posts, so the timeline skips empty months
+        table = dynamodb.create_table(
+            TableName='timeline_months',
+            KeySchema=[
+                {
+                    'AttributeName': 'month',
+                    'KeyType': 'HASH'
+                }
+            ],
+            AttributeDefinitions=[
+                {
+                    'AttributeName': 'month',
+                    'AttributeType': 'S'
+                }
+            ],
+            ProvisionedThroughput={
+                'ReadCapacityUnits': 5,
+                'WriteCapacityUnits': 5
+            }
+        )
+        print("Creating timeline_months table...")
+        table.meta.client.get_waiter('table_exists').wait(TableName='timeline_months')
+        print("Timeline months table created successfully.")
+    except ClientError as e:
+        if e.response['Error']['Code'] == 'ResourceInUseException':
+            print("Timeline months table already exists.")
+        else:
+            raise e
+
 def create_groups_table():
     try:
         # Creating the table for groups
@@ -270,9 +740,110 @@ def create_groups_table():
             raise e
 
 
+def add_global_secondary_index(table_name, index_name, key_schema, attribute_definitions):
+    """
+    Add a GSI to an existing table without recreating it.
+    DynamoDB backfills the index from items that already carry the key attributes.
+    """
+    table = dynamodb.Table(table_name)
+    table.load()
+    existing = {index['IndexName'] for index in table.global_secondary_indexes or []}
+    if index_name in existing:
+        print(f"{index_name} already exists on {table_name}.")
+        return
+
+    table.update(
+        AttributeDefinitions=attribute_definitions,
+        GlobalSecondaryIndexUpdates=[
+            {
+                'Create': {
+                    'IndexName': index_name,
+                    'KeySchema': key_schema,
+                    'Projection': {
+                        'ProjectionType': 'ALL'
+                    },
+                    'ProvisionedThroughput': {
+                        'ReadCapacityUnits': 5,
+                        'WriteCapacityUnits': 5
+                    }
+                }
+            }
+        ]
+    )
+    print(f"Creating {index_name} on {table_name}; DynamoDB backfills it in the background.")
+
+def add_posts_timeline_index():
+    add_global_secondary_index(
+        'posts',
+        'TimelineIndex',
+        [
+            {'AttributeName': 'timelineBucket', 'KeyType': 'HASH'},
+            {'AttributeName': 'timestamp', 'KeyType': 'RANGE'}
+        ],
+        [
+            {'AttributeName': 'timelineBucket', 'AttributeType': 'S'},
+            {'AttributeName': 'timestamp', 'AttributeType': 'S'}
+        ]
+    )
+
+def add_posts_author_index():
+    add_global_secondary_index(
+        'posts',
+        'AuthorIndex',
+        [
+            {'AttributeName': 'author', 'KeyType': 'HASH'},
+            {'AttributeName': 'timestamp', 'KeyType': 'RANGE'}
+        ],
+        [
+            {'AttributeName': 'author', 'AttributeType': 'S'},
+            {'AttributeName': 'timestamp', 'AttributeType': 'S'}
+        ]
+    )
+
+def remove_global_secondary_index(table_name, index_name):
+    """
+    Drop a GSI that has been replaced, so writes stop paying for it.
+    """
+    table = dynamodb.Table(table_name)
+    table.load()
+    existing = {index['IndexName'] for index in table.global_secondary_indexes or []}
+    if index_name not in existing:
+        print(f"{index_name} does not exist on {table_name}.")
+        return
+
+    table.update(GlobalSecondaryIndexUpdates=[{'Delete': {'IndexName': index_name}}])
+    print(f"Deleting {index_name} from {table_name}.")
+
+def add_comments_post_time_index():
+    # Key schemas of existing GSIs cannot change, so the sorted index is added next to PostIndex
+    add_global_secondary_index(
+        'comments',
+        'PostTimeIndex',
+        [
+            {'AttributeName': 'postId', 'KeyType': 'HASH'},
+            {'AttributeName': 'timestamp', 'KeyType': 'RANGE'}
+        ],
+        [
+            {'AttributeName': 'postId', 'AttributeType': 'S'},
+            {'AttributeName': 'timestamp', 'AttributeType': 'S'}
+        ]
+    )
+
+def remove_comments_post_index():
+    remove_global_secondary_index('comments', 'PostIndex')
+
 
 if __name__ == "__main__":
     create_users_table()
     create_posts_table()
     create_comments_table()
+    create_post_topics_table()
+    create_post_likes_table()
+    create_topic_trends_table()
+    create_post_cleanup_table()
+    create_feed_entries_table()
+    create_user_interests_table()
+    create_timeline_months_table()
+    create_revoked_sessions_table()
+    create_keyword_trends_table()
     create_groups_table()
\ No newline at end of file
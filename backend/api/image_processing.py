@@ -0,0 +1,79 @@
+# backend/api/image_processing.py
+# Decoding and resizing of uploaded images, on a small thread pool so it stays off
+# the event loop. Pillow releases the GIL while decoding, resizing and encoding.
+import asyncio
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Tuple
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+# Rendition name -> size in pixels. Avatars are cropped to a square, feed images fit within the box
+RENDITION_SIZES = {"avatar": 128, "feed": 1080}
+SQUARE_RENDITIONS = {"avatar"}
+
+# Images with more pixels than this are rejected from their header, before any pixel data is decoded
+IMAGE_MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", 50_000_000))
+
+# WebP when this Pillow build can write it, JPEG otherwise
+IMAGE_FORMAT, IMAGE_EXTENSION, IMAGE_CONTENT_TYPE = (
+    ("WEBP", "webp", "image/webp") if features.check("webp") else ("JPEG", "jpg", "image/jpeg")
+)
+
+# Threads decoding and resizing uploads per server process; also bounds the decoded images held in memory
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", min(4, os.cpu_count() or 1)))
+image_executor = ThreadPoolExecutor(max_workers=IMAGE_WORKERS, thread_name_prefix="images")
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+def _encode(image: Image.Image) -> bytes:
+    if IMAGE_FORMAT == "JPEG" and image.mode != "RGB":
+        # JPEG has no alpha channel; flatten transparent images onto white
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A") if "A" in image.getbands() else None)
+        image = background
+    out = io.BytesIO()
+    if IMAGE_FORMAT == "WEBP":
+        image.save(out, "WEBP", quality=80, method=4)
+    else:
+        image.save(out, "JPEG", quality=82, optimize=True, progressive=True)
+    return out.getvalue()
+
+
+def make_renditions(data: bytes, renditions: Iterable[str]) -> Dict[str, bytes]:
+    """
+    Decode an uploaded image and encode each requested rendition. EXIF orientation
+    is applied and then dropped with the rest of the metadata; images are never
+    upscaled. Animated images keep only their first frame.
+    Raises InvalidImage when the data is not an image Pillow can read.
+    """
+    try:
+        with Image.open(io.BytesIO(data)) as source:
+            # Image.open only reads the header; Pillow's own bomb check would still decode up to twice its limit
+            width, height = source.size
+            if width * height > IMAGE_MAX_PIXELS:
+                raise InvalidImage(f"Image is {width}x{height}, more than {IMAGE_MAX_PIXELS} pixels")
+            source.load()
+            image = ImageOps.exif_transpose(source)
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError) as e:
+        raise InvalidImage(str(e))
+
+    image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info else "RGB")
+    encoded = {}
+    for name in renditions:
+        size = RENDITION_SIZES[name]
+        if name in SQUARE_RENDITIONS:
+            side = min(size, *image.size)
+            resized = ImageOps.fit(image, (side, side), Image.LANCZOS)
+        else:
+            resized = image.copy()
+            resized.thumbnail((size, size), Image.LANCZOS)
+        encoded[name] = _encode(resized)
+    return encoded
+
+
+async def process_image(data: bytes, renditions: Tuple[str, ...]) -> Dict[str, bytes]:
+    return await asyncio.get_running_loop().run_in_executor(image_executor, make_renditions, data, renditions)
@@ -2,6 +2,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from api.config import login_manager
+from api.cache import cache_stats
 from api.routers import users, posts, comments, chat, groups, fitness, overpass, donations, forms
 from starlette.middleware.sessions import SessionMiddleware
 import nltk
@@ -49,3 +50,10 @@ app.include_router(forms.router)
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the Veterans Society API"}
+
+@app.get("/cache/stats")
+def read_cache_stats():
+    """
+    Hit/miss counters of the read-through caches in this process.
+    """
+    return cache_stats()
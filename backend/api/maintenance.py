@@ -0,0 +1,636 @@
+# backend/api/maintenance.py
+# One-off migrations and backfills. Run from backend/:
+#   python -m api.maintenance <command>
+import asyncio
+import itertools
+import random
+import string
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from boto3.dynamodb.conditions import Attr, Key
+from fastapi import HTTPException, Request
+from api.db_setup import (
+    dynamodb, add_posts_timeline_index, add_posts_author_index, create_post_topics_table, create_topic_trends_table,
+    create_post_likes_table, create_post_cleanup_table, create_feed_entries_table, create_user_interests_table,
+    add_comments_post_time_index, remove_comments_post_index, create_timeline_months_table,
+    create_revoked_sessions_table, create_keyword_trends_table
+)
+from api.config import (
+    create_tokens, decode_token, login_manager, revoke_session, revoked_sessions, revoked_sessions_table, token_claims
+)
+from api.aws_wrappers.post_indexes import (
+    timeline_bucket, index_post_topics, batch_get_posts, timeline_months_table
+)
+from api.aws_wrappers.likes import move_liked_by_to_store, post_likes_table, reconcile_like_count, toggle_like
+from api.aws_wrappers.cleanup import post_cleanup_table, run_post_cleanup
+from api.aws_wrappers.feeds import FEED_SIZE_KEY, set_user_interests, user_feeds_table
+from api.aws_wrappers.comments import reconcile_comment_count
+from api.aws_wrappers.dynamo import run_dynamodb, run_dynamodb_write
+from api.passwords import BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, make_hash, password_executor, verify_and_update
+from api.nlp.user_search import UserSearchIndex
+from api.nlp.keywords import HOURS_KEPT, KEYWORDS_PER_HOUR, hour_key, keyword_trends_table, merge_counts, tokenize
+from api.nlp.trends import topic_trends_table, trend_buckets, TREND_RETENTION, TREND_WINDOWS, parse_post_time
+
+posts_table = dynamodb.Table('posts')
+
+
+def scan_all(table, **scan_kwargs):
+    """
+    Yield every item of a table scan, following LastEvaluatedKey.
+    """
+    while True:
+        response = table.scan(**scan_kwargs)
+        yield from response.get("Items", [])
+        if "LastEvaluatedKey" not in response:
+            return
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def query_all(table, **query_kwargs):
+    """
+    Yield every item of a table query, following LastEvaluatedKey.
+    """
+    while True:
+        response = table.query(**query_kwargs)
+        yield from response.get("Items", [])
+        if "LastEvaluatedKey" not in response:
+            return
+        query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+def backfill_timeline_buckets():
+    """
+    Set timelineBucket on posts written before the timeline index existed,
+    so they show up in the paginated feed.
+    """
+    updated = 0
+    for post in scan_all(
+        posts_table,
+        ProjectionExpression="postId, #ts",
+        FilterExpression=Attr("timelineBucket").not_exists(),
+        ExpressionAttributeNames={"#ts": "timestamp"},
+    ):
+        posts_table.update_item(
+            Key={"postId": post["postId"]},
+            UpdateExpression="SET timelineBucket = :bucket",
+            ExpressionAttributeValues={":bucket": timeline_bucket(post.get("timestamp"))},
+        )
+        updated += 1
+    print(f"Backfilled timelineBucket on {updated} posts.")
+
+
+def backfill_timeline_months():
+    """
+    Create the timeline_months table if needed and record every month that has
+    posts, so timeline pages reach posts older than the first month registered
+    by the posts router. Run after backfill-timeline. Safe to re-run.
+    """
+    create_timeline_months_table()
+    months = {
+        post["timelineBucket"]
+        for post in scan_all(posts_table, ProjectionExpression="timelineBucket")
+        if post.get("timelineBucket")
+    }
+    with timeline_months_table.batch_writer() as batch:
+        for month in months:
+            batch.put_item(Item={"month": month})
+    print(f"Registered {len(months)} timeline months.")
+
+
+def backfill_topic_index():
+    """
+    Create the post_topics table if needed and index every existing post by topic.
+    Safe to re-run: rows are keyed by topic and post, so repeats overwrite.
+    """
+    create_post_topics_table()
+    indexed = 0
+    for post in scan_all(
+        posts_table,
+        ProjectionExpression="postId, #ts, topics",
+        ExpressionAttributeNames={"#ts": "timestamp"},
+    ):
+        if post.get("timestamp"):
+            index_post_topics(post)
+            indexed += 1
+    print(f"Indexed topics for {indexed} posts.")
+
+
+def backfill_trend_counters():
+    """
+    Seed the topic_trends counters from posts created within the retention period.
+    Counts are written with SET, so re-running recomputes them instead of double counting.
+    """
+    create_topic_trends_table()
+    cutoff = datetime.now() - TREND_RETENTION
+    counts = Counter()
+    expiry = {}
+    for post in scan_all(
+        posts_table,
+        ProjectionExpression="#ts, topics",
+        ExpressionAttributeNames={"#ts": "timestamp"},
+    ):
+        created = parse_post_time(post.get("timestamp"))
+        if created < cutoff:
+            continue
+        for bucket in trend_buckets(post["timestamp"]):
+            expiry.setdefault(bucket, int((created + TREND_RETENTION).timestamp()))
+            for topic in post.get("topics", []):
+                counts[(bucket, topic)] += 1
+
+    with topic_trends_table.batch_writer() as batch:
+        for (bucket, topic), count in counts.items():
+            batch.put_item(Item={
+                "bucket": bucket,
+                "topic": topic,
+                "postCount": count,
+                "expiresAt": expiry[bucket],
+            })
+    print(f"Seeded {len(counts)} topic trend counters.")
+
+
+def backfill_keyword_trends():
+    """
+    Rebuild the shared keyword summaries from posts created within the kept hours.
+    Each hour is written with put_item, so re-running recomputes it instead of double
+    counting; counts merged by workers while this runs are overwritten for those hours.
+    """
+    create_keyword_trends_table()
+    cutoff = datetime.now() - timedelta(hours=HOURS_KEPT)
+    counts = {}
+    for post in scan_all(
+        posts_table,
+        ProjectionExpression="#ts, content",
+        ExpressionAttributeNames={"#ts": "timestamp"},
+    ):
+        created = parse_post_time(post.get("timestamp"))
+        if created >= cutoff:
+            counts.setdefault(hour_key(created), Counter()).update(tokenize(post.get("content", "")))
+
+    with keyword_trends_table.batch_writer() as batch:
+        for hour, hour_counts in counts.items():
+            batch.put_item(Item={
+                "hour": hour,
+                "counts": merge_counts({}, hour_counts, KEYWORDS_PER_HOUR),
+                "version": 1,
+                "expiresAt": int((datetime.strptime(hour, "%Y-%m-%dT%H") + TREND_RETENTION).timestamp()),
+            })
+    print(f"Rebuilt keyword summaries for {len(counts)} hours.")
+
+
+def migrate_likes_store():
+    """
+    Move likedBy lists and sets embedded in posts into the post_likes table.
+    """
+    create_post_likes_table()
+    moved = 0
+    for post in scan_all(
+        posts_table,
+        ProjectionExpression="postId, likedBy",
+        FilterExpression=Attr("likedBy").exists(),
+    ):
+        move_liked_by_to_store(post)
+        moved += 1
+    print(f"Moved likes of {moved} posts into post_likes.")
+
+
+def retry_post_cleanup():
+    """
+    Re-run post cleanup jobs that failed or were interrupted (e.g. by a restart).
+    Jobs still held by a live worker are skipped.
+    """
+    create_post_cleanup_table()
+    results = Counter()
+    for job in scan_all(
+        post_cleanup_table,
+        ProjectionExpression="postId",
+        FilterExpression=Attr("status").ne("done"),
+    ):
+        results[run_post_cleanup(job["postId"]) or "skipped"] += 1
+    print(f"Post cleanup retried: {dict(results)}")
+
+
+def backfill_user_feeds():
+    """
+    Create the feed tables if needed, subscribe every existing user to their
+    interests and seed their feeds with recent matching posts.
+    Safe to re-run: subscriptions and feed entries are keyed, so repeats overwrite.
+    """
+    create_feed_entries_table()
+    create_user_interests_table()
+    users_table = dynamodb.Table('users')
+    subscribed = 0
+    for user in scan_all(users_table, ProjectionExpression="username, interests"):
+        if user.get("interests"):
+            set_user_interests(user["username"], None, user["interests"])
+            subscribed += 1
+    print(f"Subscribed {subscribed} users to their interests.")
+
+
+def migrate_user_feeds():
+    """
+    Copy feeds from the old user_feeds table, keyed "<score>#<postId>", into
+    feed_entries, keyed by post with the score in its own attribute. A post that
+    was pushed twice keeps its best score, and each feed's size counter is reset
+    to its distinct entries. Safe to re-run; drop user_feeds afterwards.
+    """
+    create_feed_entries_table()
+    old_feeds_table = dynamodb.Table('user_feeds')
+    best = {}
+    for item in scan_all(old_feeds_table, ProjectionExpression="username, sortKey"):
+        if item["sortKey"] == FEED_SIZE_KEY:
+            continue
+        score, post_id = item["sortKey"].split("#", 1)
+        key = (item["username"], post_id)
+        best[key] = max(best.get(key, 0), int(score))
+
+    sizes = Counter(username for username, _ in best)
+    with user_feeds_table.batch_writer(overwrite_by_pkeys=["username", "postId"]) as batch:
+        for (username, post_id), score in best.items():
+            batch.put_item(Item={"username": username, "postId": post_id, "score": score, "feedPostId": post_id})
+        for username, size in sizes.items():
+            batch.put_item(Item={"username": username, "postId": FEED_SIZE_KEY, "count": size})
+    print(f"Migrated {len(best)} feed entries for {len(sizes)} users.")
+
+
+def backfill_comment_timestamps():
+    """
+    Give comments written before timestamps existed the time of their post, the
+    earliest they can have been made, so they appear on PostTimeIndex.
+    """
+    comments_table = dynamodb.Table('comments')
+    comments = list(scan_all(
+        comments_table,
+        ProjectionExpression="commentId, postId",
+        FilterExpression=Attr("timestamp").not_exists(),
+    ))
+    post_times = {
+        post["postId"]: post.get("timestamp")
+        for post in batch_get_posts(list({comment["postId"] for comment in comments}))
+    }
+    for comment in comments:
+        try:
+            comments_table.update_item(
+                Key={"commentId": comment["commentId"]},
+                UpdateExpression="SET #ts = :ts",
+                ConditionExpression="attribute_not_exists(#ts)",
+                ExpressionAttributeNames={"#ts": "timestamp"},
+                ExpressionAttributeValues={":ts": post_times.get(comment["postId"]) or str(datetime(1970, 1, 1))},
+            )
+        except comments_table.meta.client.exceptions.ConditionalCheckFailedException:
+            pass
+    print(f"Backfilled timestamp on {len(comments)} comments.")
+
+
+def reconcile_comment_counts():
+    """
+    Recount every post's comments from PostTimeIndex and repair commentCount where it drifted.
+    Safe to run at any time, e.g. from a nightly cron.
+    """
+    checked = repaired = 0
+    for post in scan_all(posts_table, ProjectionExpression="postId, commentCount"):
+        checked += 1
+        if reconcile_comment_count(post):
+            repaired += 1
+    print(f"Checked {checked} posts, repaired commentCount on {repaired}.")
+
+
+def reconcile_like_counts():
+    """
+    Recount every post's likes from post_likes and repair the likes counter where it drifted.
+    Safe to run at any time, e.g. from a nightly cron.
+    """
+    checked = repaired = 0
+    for post in scan_all(posts_table, ProjectionExpression="postId, likes"):
+        checked += 1
+        if reconcile_like_count(post):
+            repaired += 1
+    print(f"Checked {checked} posts, repaired likes on {repaired}.")
+
+
+def load_test_likes(users: int = 1000, toggles_per_user: int = 5, workers: int = 64):
+    """
+    Toggle likes on a throwaway post from many threads at once, several toggles per
+    user, then check the post's likes counter against its post_likes rows and
+    against the toggles that succeeded. Cleans up the post and its like rows.
+    Exits non-zero on a mismatch so CI can gate on it, e.g.
+    `python -m api.maintenance load-test-likes users=2000 toggles_per_user=10 workers=128`.
+    """
+    post_id = "__load_test_likes__"
+    posts_table.put_item(Item={"postId": post_id, "author": "__load_test__", "content": "", "likes": 0})
+    usernames = [f"__load_test_{i}__" for i in range(users)]
+
+    def toggle_all(username: str) -> int:
+        succeeded = 0
+        for _ in range(toggles_per_user):
+            try:
+                toggle_like(post_id, username)
+                succeeded += 1
+            except HTTPException:
+                pass
+        return succeeded
+
+    try:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            succeeded = list(executor.map(toggle_all, usernames))
+        elapsed = time.perf_counter() - started
+
+        rows = sum(1 for _ in query_all(
+            post_likes_table, KeyConditionExpression=Key("postId").eq(post_id), ProjectionExpression="username"
+        ))
+        counter = int(posts_table.get_item(Key={"postId": post_id})["Item"].get("likes", 0))
+        expected = sum(count % 2 for count in succeeded)
+        print(f"{sum(succeeded)} of {users * toggles_per_user} toggles succeeded in {elapsed:.1f}s with {workers} threads")
+        print(f"likes counter {counter}, post_likes rows {rows}, expected {expected}")
+        if counter == rows == expected:
+            print("OK: counter matches the like rows")
+        else:
+            print("MISMATCH: counter and like rows disagree")
+            sys.exit(1)
+    finally:
+        with post_likes_table.batch_writer() as batch:
+            for username in usernames:
+                batch.delete_item(Key={"postId": post_id, "username": username})
+        posts_table.delete_item(Key={"postId": post_id})
+
+
+def check_token_auth():
+    """
+    Check that routes protected with Depends(login_manager) or token_claims refuse a
+    refresh token sent as an access token, and an access token whose session was
+    revoked on another worker. Exits non-zero when any of them is accepted.
+    """
+    tokens = create_tokens("__check_token_auth__", "user")
+    claims = asyncio.run(decode_token(tokens["refresh_token"], token_type="refresh"))
+
+    def accepted(token: str, dependency) -> bool:
+        request = Request({"type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())]})
+        try:
+            asyncio.run(dependency(request))
+            return True
+        except HTTPException:
+            return False
+
+    failures = []
+    try:
+        for name, dependency in (("login_manager", login_manager), ("token_claims", token_claims)):
+            if accepted(tokens["refresh_token"], dependency):
+                failures.append(f"{name} accepted a refresh token")
+        revoke_session(claims)
+        # Forget the local copy, as a worker that did not handle the logout would
+        revoked_sessions.delete(claims["sid"])
+        for name, dependency in (("login_manager", login_manager), ("token_claims", token_claims)):
+            if accepted(tokens["access_token"], dependency):
+                failures.append(f"{name} accepted a revoked access token")
+    finally:
+        revoked_sessions_table.delete_item(Key={"sid": claims["sid"]})
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if failures:
+        sys.exit(1)
+    print("OK: refresh tokens and revoked sessions are refused")
+
+
+def benchmark_dynamodb_concurrency(requests: int = 2000, rate: int = 400):
+    """
+    Serve mixed simulated traffic (80% get_item, 20% update_item on throwaway posts)
+    arriving at `rate` requests per second on one event loop, first calling boto3
+    inline as the routers used to, then through the DynamoDB thread pool. Latency
+    counts from each request's scheduled arrival, so time spent queued behind a
+    blocked event loop is included. Prints p50/p99 for each.
+    """
+    keys = [{"postId": f"__benchmark_dynamodb_{i}__"} for i in range(100)]
+    with posts_table.batch_writer() as batch:
+        for key in keys:
+            batch.put_item(Item={**key, "author": "__benchmark__", "content": "", "likes": 0})
+
+    rng = random.Random(1)
+    operations = []
+    for _ in range(requests):
+        key = rng.choice(keys)
+        if rng.random() < 0.8:
+            operations.append((False, posts_table.get_item, {"Key": key}))
+        else:
+            operations.append((True, posts_table.update_item, {
+                "Key": key, "UpdateExpression": "ADD likes :one", "ExpressionAttributeValues": {":one": 1}
+            }))
+
+    async def inline(is_write, call, kwargs):
+        return call(**kwargs)
+
+    async def pooled(is_write, call, kwargs):
+        if is_write:
+            return await run_dynamodb_write(call, **kwargs)
+        return await run_dynamodb(call, **kwargs)
+
+    async def serve(run) -> list:
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+
+        async def request(arrival: float, operation) -> float:
+            await asyncio.sleep(arrival - loop.time())
+            await run(*operation)
+            return (loop.time() - arrival) * 1000
+
+        return sorted(await asyncio.gather(
+            *(request(start + i / rate, operation) for i, operation in enumerate(operations))
+        ))
+
+    try:
+        for label, run in (("inline boto3 (before)", inline), ("thread pool (after)", pooled)):
+            latencies = asyncio.run(serve(run))
+            p50, p99 = latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.99)]
+            print(f"{label}: p50 {p50:.1f} ms, p99 {p99:.1f} ms for {requests} requests at {rate}/s")
+    finally:
+        with posts_table.batch_writer() as batch:
+            for key in keys:
+                batch.delete_item(Key=key)
+
+
+def benchmark_password_hashing(samples: int = 20):
+    """
+    Measure password checks per second at the configured BCRYPT_ROUNDS, on one
+    thread and across the hashing threads, to size PASSWORD_HASH_WORKERS and the cost.
+    """
+    hashed = make_hash("benchmark-password")
+
+    started = time.perf_counter()
+    for _ in range(samples):
+        verify_and_update("benchmark-password", hashed)
+    single = samples / (time.perf_counter() - started)
+
+    total = samples * PASSWORD_HASH_WORKERS
+    started = time.perf_counter()
+    list(password_executor.map(verify_and_update, ["benchmark-password"] * total, [hashed] * total))
+    pooled = total / (time.perf_counter() - started)
+
+    print(f"bcrypt cost {BCRYPT_ROUNDS}: {1000 / single:.0f} ms per check, {single:.1f} logins/s on one thread")
+    print(f"{PASSWORD_HASH_WORKERS} threads: {pooled:.1f} logins/s ({pooled / PASSWORD_HASH_WORKERS:.1f} per thread)")
+
+
+def benchmark_profile_update(samples: int = 50):
+    """
+    Compare a profile save done the old way (get_item, update_item, get_item) with the
+    single conditional update_item the users router now uses, on a throwaway user.
+    """
+    users_table = dynamodb.Table('users')
+    key = {"username": "__benchmark_profile_update__"}
+    users_table.put_item(Item={**key, "firstName": "Bench", "lastName": "Mark", "interests": []})
+
+    def timed(save) -> list:
+        latencies = []
+        for i in range(samples):
+            started = time.perf_counter()
+            save(f"Bench{i}")
+            latencies.append((time.perf_counter() - started) * 1000)
+        return sorted(latencies)
+
+    def three_round_trips(name: str):
+        users_table.get_item(Key=key)
+        users_table.update_item(Key=key, UpdateExpression="SET firstName = :name", ExpressionAttributeValues={":name": name})
+        users_table.get_item(Key=key)
+
+    def one_round_trip(name: str):
+        users_table.update_item(
+            Key=key,
+            UpdateExpression="SET #firstName = :firstName",
+            ConditionExpression="attribute_exists(username)",
+            ExpressionAttributeNames={"#firstName": "firstName"},
+            ExpressionAttributeValues={":firstName": name},
+            ReturnValues="ALL_OLD",
+        )
+
+    try:
+        for label, save in (("get + update + get", three_round_trips), ("conditional update", one_round_trip)):
+            latencies = timed(save)
+            p50, p95 = latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95)]
+            print(f"{label}: p50 {p50:.1f} ms, p95 {p95:.1f} ms over {samples} saves")
+    finally:
+        users_table.delete_item(Key=key)
+
+
+def benchmark_user_search(users: int = 1_000_000, queries: int = 300):
+    """
+    Build the user search index from synthetic users and time prefix, typo and
+    full-name queries against it, printing build time and query latency percentiles.
+    Needs no AWS access; the target is p95 under 20 ms at 1M users.
+    """
+    rng = random.Random(1)
+
+    def word() -> str:
+        return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 9)))
+
+    first_names = [word() for _ in range(5000)]
+    last_names = [word() for _ in range(50000)]
+    people = [
+        {"username": f"{rng.choice(first_names)}{i}", "firstName": rng.choice(first_names).title(),
+         "lastName": rng.choice(last_names).title()}
+        for i in range(users)
+    ]
+    index = UserSearchIndex()
+    started = time.perf_counter()
+    index.ensure_fresh(lambda: people)
+    print(f"Built index of {users} users in {time.perf_counter() - started:.1f}s")
+
+    samples = []
+    for _ in range(queries):
+        person = rng.choice(people)
+        name = rng.choice([person["firstName"], person["lastName"]]).lower()
+        kind = rng.random()
+        if kind < 1 / 3:
+            samples.append(name[:rng.randint(1, len(name))])
+        elif kind < 2 / 3:
+            typo = rng.randrange(len(name))
+            samples.append(name[:typo] + rng.choice(string.ascii_lowercase) + name[typo + 1:])
+        else:
+            samples.append(f"{person['firstName']} {person['lastName']}")
+
+    latencies = []
+    for query in samples:
+        started = time.perf_counter()
+        index.search(query, 20)
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    p50, p95 = latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95)]
+    print(f"{queries} queries: p50 {p50:.2f} ms, p95 {p95:.2f} ms, max {latencies[-1]:.2f} ms")
+
+
+def benchmark_keyword_trends(posts: int = 200_000, vocabulary: int = 50_000):
+    """
+    Build hourly keyword summaries from synthetic posts spread over the kept hours,
+    as workers merge them into the keyword_trends table, and print the memory the
+    summaries hold (traced with tracemalloc), the largest item size and the cost of
+    summing them for each window. Word frequencies follow a Zipf-like curve. Needs no AWS access.
+    """
+    rng = random.Random(1)
+    words = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 10))) for _ in range(vocabulary)]
+    cumulative = list(itertools.accumulate(1 / rank for rank in range(1, vocabulary + 1)))
+    now = datetime.now()
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    buffered = {}
+    for _ in range(posts):
+        hour = hour_key(now - timedelta(seconds=rng.uniform(0, HOURS_KEPT * 3600)))
+        buffered.setdefault(hour, Counter()).update(rng.choices(words, cum_weights=cumulative, k=rng.randint(5, 30)))
+    buffered_memory = tracemalloc.get_traced_memory()[0]
+    summaries = {hour: merge_counts({}, counts, KEYWORDS_PER_HOUR) for hour, counts in buffered.items()}
+    del buffered
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    largest = max(sum(len(word) + 8 for word in summary) for summary in summaries.values())
+    print(f"Summarized {posts} posts into {len(summaries)} hours in {time.perf_counter() - started:.1f}s")
+    print(f"Buffered counts before merging: {buffered_memory / 2 ** 20:.1f} MiB; "
+          f"summaries: {current / 2 ** 20:.1f} MiB (peak {peak / 2 ** 20:.1f} MiB); largest item ~{largest / 1024:.0f} KiB")
+
+    for window, hours in TREND_WINDOWS.items():
+        keys = [hour_key(now - timedelta(hours=offset)) for offset in range(hours)]
+        started = time.perf_counter()
+        totals = Counter()
+        for key in keys:
+            totals.update(summaries.get(key, {}))
+        merge_counts({}, totals, KEYWORDS_PER_HOUR)
+        print(f"top({window}) from {len(keys)} summaries: {(time.perf_counter() - started) * 1000:.1f} ms")
+
+
+COMMANDS = {
+    "add-timeline-index": add_posts_timeline_index,
+    "backfill-timeline": backfill_timeline_buckets,
+    "backfill-timeline-months": backfill_timeline_months,
+    "add-author-index": add_posts_author_index,
+    "backfill-topic-index": backfill_topic_index,
+    "backfill-trend-counters": backfill_trend_counters,
+    "backfill-keyword-trends": backfill_keyword_trends,
+    "migrate-likes-store": migrate_likes_store,
+    "retry-post-cleanup": retry_post_cleanup,
+    "backfill-user-feeds": backfill_user_feeds,
+    "migrate-user-feeds": migrate_user_feeds,
+    "add-comment-time-index": add_comments_post_time_index,
+    "backfill-comment-timestamps": backfill_comment_timestamps,
+    "drop-comment-post-index": remove_comments_post_index,
+    "reconcile-comment-counts": reconcile_comment_counts,
+    "reconcile-like-counts": reconcile_like_counts,
+    "load-test-likes": load_test_likes,
+    "add-revoked-sessions-table": create_revoked_sessions_table,
+    "check-token-auth": check_token_auth,
+    "benchmark-dynamodb-concurrency": benchmark_dynamodb_concurrency,
+    "benchmark-password-hashing": benchmark_password_hashing,
+    "benchmark-profile-update": benchmark_profile_update,
+    "benchmark-user-search": benchmark_user_search,
+    "benchmark-keyword-trends": benchmark_keyword_trends,
+}
+
+
+if __name__ == "__main__":
+    # Optional `name=value` arguments after the command are passed to it as integer keyword arguments
+    options = [arg.partition("=") for arg in sys.argv[2:]]
+    if (len(sys.argv) < 2 or sys.argv[1] not in COMMANDS
+            or any(not sep or not value.isdigit() for _, sep, value in options)):
+        print(f"Usage: python -m api.maintenance [{'|'.join(COMMANDS)}] [name=value ...]")
+        sys.exit(1)
+    COMMANDS[sys.argv[1]](**{name: int(value) for name, _, value in options})
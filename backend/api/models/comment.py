@@ -1,9 +1,23 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Dict, List, Optional
 import uuid
+from datetime import datetime
 
 class Comment(BaseModel):
     commentId: str = Field(default_factory=lambda: str(uuid.uuid4()), description="Unique identifier for the comment")
     postId: str = Field(..., description="Unique identifier of the associated post")
     author: str = Field(..., description="Username of the comment's author")
     content: str = Field(..., description="Content of the comment")
+    timestamp: str = Field(default_factory=lambda: str(datetime.now()), description="Timestamp of the comment")
+
+class CommentPage(BaseModel):
+    comments: List[Comment] = Field(default_factory=list, description="Comments on this page, in the requested order")
+    nextCursor: Optional[str] = Field(None, description="Opaque cursor for the next page, null when there are no more comments")
+
+class CommentBatchRequest(BaseModel):
+    postIds: List[str] = Field(..., min_items=1, max_items=100, description="Posts to load comments for")
+    limit: int = Field(default=5, ge=1, le=50, description="Newest comments returned per post")
+
+class CommentBatch(BaseModel):
+    comments: Dict[str, List[Comment]] = Field(default_factory=dict, description="Newest comments per postId, newest first")
+    incomplete: List[str] = Field(default_factory=list, description="postIds that could not be loaded before the deadline; retry them individually")
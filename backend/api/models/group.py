@@ -10,4 +10,5 @@ class Group(BaseModel):
     description: str = Field(..., description="Description of the group")
     author: str = Field(..., description="Author or creator of the group")
     image: str = Field(None, description="URL of the group's image")  # Image URL field, optional
+    avatar: Optional[str] = Field(None, description="Small square rendition of the image, for group lists")
     posts: List[Post] = Field(default_factory=list, description="List of posts associated with the group")  # Default to empty list
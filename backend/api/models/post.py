@@ -11,9 +11,15 @@ class Post(BaseModel):
     topics: Set[str] = Field(default={"general"}, description="Set of topics associated with the post")
     images: Set[str] = Field(default={"none"}, description="Set of vector embeddings or image references")
     likes: int = Field(default=0, description="Number of likes on the post")
-    likedBy: List[str] = Field(default_factory=list)
+    likedBy: List[str] = Field(default_factory=list, description="The requesting viewer if they liked the post; likers are stored in post_likes")
+    isLiked: bool = Field(default=False, description="Whether the requesting viewer liked the post")
+    commentCount: int = Field(default=0, description="Number of comments on the post")
     timestamp: str = Field(default_factory=lambda: str(datetime.now()), description="Timestamp of the post")
     
+class PostPage(BaseModel):
+    posts: List[Post] = Field(default_factory=list, description="Posts on this page, newest first")
+    nextCursor: Optional[str] = Field(None, description="Opaque cursor for the next page, null when there are no more posts")
+
 class UpdatePostModel(BaseModel):
     content: Optional[str] = None
     likes: Optional[int] = None
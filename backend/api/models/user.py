@@ -1,7 +1,7 @@
 # api/models/user.py
 from fastapi import UploadFile
-from pydantic import BaseModel, EmailStr, validator
-from typing import Optional, List
+from pydantic import BaseModel, EmailStr, Field, validator
+from typing import Dict, Optional, List
 from decimal import Decimal
 
 class UserCreate(BaseModel):
@@ -51,13 +51,34 @@ class UserResponse(BaseModel):
             return int(v)
         return v
 
+class UserPage(BaseModel):
+    users: List[UserResponse] = []
+    nextCursor: Optional[str] = None  # Opaque cursor for the next page, null when there are no more users
+
 class ProfilePicResponse(BaseModel):
     profilePic: Optional[str]
 
+class PublicProfile(BaseModel):
+    username: str
+    firstName: Optional[str] = None
+    lastName: Optional[str] = None
+    profilePic: Optional[str] = None
+    isVeteran: Optional[bool] = None
+
+class UserBatchRequest(BaseModel):
+    usernames: List[str] = Field(..., min_items=1, max_items=100, description="Users to load public profiles for")
+
+class UserBatch(BaseModel):
+    users: Dict[str, PublicProfile] = Field(default_factory=dict, description="Public profile per username")
+    missing: List[str] = Field(default_factory=list, description="Requested usernames that do not exist")
+
 class LoginRequest(BaseModel):
     username: str
     password: str
 
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
 # UserUpdateRequest model for updating user data
 class UserUpdateRequest(BaseModel):
     firstName: Optional[str] = None
@@ -0,0 +1,175 @@
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+from boto3.dynamodb.conditions import Attr
+from botocore.exceptions import ClientError
+from nltk.corpus import stopwords
+import heapq
+import logging
+import nltk
+import os
+import threading
+import time
+from api.cache import TTLCache
+from api.db_setup import dynamodb
+from api.aws_wrappers.batch import batch_get_items
+from api.nlp.trends import TREND_WINDOWS, TREND_RETENTION, parse_post_time
+
+logger = logging.getLogger(__name__)
+
+# Keyword summaries shared by every worker: hour (HASH, "YYYY-MM-DDTHH") with the hour's
+# counts map and a version for optimistic merges; expired by DynamoDB TTL
+keyword_trends_table = dynamodb.Table('keyword_trends')
+
+# Distinct keywords kept per hour; each hour's item is bounded by this
+KEYWORDS_PER_HOUR = 500
+
+# Hours of summaries kept, enough for the longest trending window
+HOURS_KEPT = max(TREND_WINDOWS.values())
+
+# Keyword counts buffered by a worker are merged into the shared summaries at most this often
+KEYWORD_FLUSH_INTERVAL = float(os.getenv("KEYWORD_FLUSH_INTERVAL", 10))
+
+# Top keywords per window are read back from the shared summaries at most this often
+KEYWORD_TOP_TTL = float(os.getenv("KEYWORD_TOP_TTL", 60))
+
+# Attempts at merging into an hour other workers keep updating before its counts go back to the buffer
+MAX_MERGE_ATTEMPTS = 5
+
+
+@lru_cache(maxsize=1)
+def _stop_words() -> frozenset:
+    try:
+        return frozenset(stopwords.words('english'))
+    except LookupError:
+        nltk.download('stopwords', quiet=True)
+        return frozenset(stopwords.words('english'))
+
+
+def tokenize(content: str) -> List[str]:
+    """
+    Keywords of a post: lowercased alphanumeric words that are not stopwords.
+    """
+    stop_words = _stop_words()
+    return [word for word in str(content).lower().split() if word.isalnum() and word not in stop_words]
+
+
+def merge_counts(counts: Dict[str, int], deltas: Dict[str, int], capacity: int) -> Dict[str, int]:
+    """
+    Add `deltas` to a summary and keep its `capacity` largest positive counts.
+    Merging Space-Saving summaries this way keeps every keyword whose count
+    exceeds the total over `capacity`.
+    """
+    merged = Counter(counts)
+    for word, delta in deltas.items():
+        merged[word] += delta
+    return dict(heapq.nlargest(
+        capacity, ((word, count) for word, count in merged.items() if count > 0), key=lambda item: item[1]
+    ))
+
+
+def hour_key(when: datetime) -> str:
+    return when.strftime("%Y-%m-%dT%H")
+
+
+class KeywordTrends:
+    """
+    Per-hour keyword summaries shared by every worker through the keyword_trends
+    table. record() only buffers counts in memory; flush() merges the buffer into
+    the shared summaries, and top() reads them back, cached for KEYWORD_TOP_TTL.
+    """
+    def __init__(self, capacity: int = KEYWORDS_PER_HOUR, hours: int = HOURS_KEPT):
+        self.capacity = capacity
+        self.hours = hours
+        self._pending: Dict[str, Counter] = defaultdict(Counter)
+        self._lock = threading.Lock()
+        self._last_flush = 0.0
+        self._top = TTLCache(maxsize=len(TREND_WINDOWS), ttl=KEYWORD_TOP_TTL)
+
+    def record(self, timestamp: str, words: Iterable[str], delta: int = 1):
+        created = parse_post_time(timestamp)
+        if created < datetime.now() - timedelta(hours=self.hours):
+            return
+        with self._lock:
+            counts = self._pending[hour_key(created)]
+            for word in words:
+                counts[word] += delta
+
+    def flush(self, force: bool = False):
+        """
+        Merge the buffered counts into the shared summaries, unless the last flush
+        was less than KEYWORD_FLUSH_INTERVAL ago. Hours that cannot be merged stay buffered.
+        """
+        with self._lock:
+            if not self._pending or (not force and time.monotonic() - self._last_flush < KEYWORD_FLUSH_INTERVAL):
+                return
+            pending, self._pending = self._pending, defaultdict(Counter)
+            self._last_flush = time.monotonic()
+
+        for hour, deltas in pending.items():
+            try:
+                self._merge_hour(hour, deltas)
+            except Exception as e:
+                logger.warning(f"Failed to merge keyword counts of {hour}, keeping them buffered: {e}")
+                with self._lock:
+                    self._pending[hour].update(deltas)
+
+    def _merge_hour(self, hour: str, deltas: Counter):
+        # Read, merge and write back conditioned on the version read, so concurrent merges retry instead of losing counts
+        expires_at = int((datetime.strptime(hour, "%Y-%m-%dT%H") + TREND_RETENTION).timestamp())
+        for _ in range(MAX_MERGE_ATTEMPTS):
+            item = keyword_trends_table.get_item(Key={"hour": hour}, ConsistentRead=True).get("Item")
+            version = int(item["version"]) if item else 0
+            counts = {word: int(count) for word, count in (item or {}).get("counts", {}).items()}
+            try:
+                keyword_trends_table.put_item(
+                    Item={
+                        "hour": hour,
+                        "counts": merge_counts(counts, deltas, self.capacity),
+                        "version": version + 1,
+                        "expiresAt": expires_at,
+                    },
+                    ConditionExpression=Attr("version").eq(version) if item else Attr("hour").not_exists(),
+                )
+                return
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+                    raise
+        raise RuntimeError(f"Keyword counts of {hour} changed under {MAX_MERGE_ATTEMPTS} merge attempts")
+
+    def top(self, window: str, k: int) -> List[Tuple[str, int]]:
+        """
+        Top `k` keywords of posts created within `window`, summed over the shared
+        hourly summaries. Blocking; call it from the DynamoDB thread pool.
+        """
+        self.flush()
+        ranked = self._top.get(window)
+        if ranked is None:
+            now = datetime.now()
+            keys = [{"hour": hour_key(now - timedelta(hours=offset))} for offset in range(TREND_WINDOWS[window])]
+            totals = Counter()
+            for item in batch_get_items(
+                "keyword_trends", keys, projection="#counts", attribute_names={"#counts": "counts"}
+            ):
+                totals.update({word: int(count) for word, count in item.get("counts", {}).items()})
+            ranked = merge_counts({}, totals, self.capacity)
+            ranked = sorted(ranked.items(), key=lambda item: item[1], reverse=True)
+            self._top.set(window, ranked)
+        return ranked[:k]
+
+
+keyword_trends = KeywordTrends()
+
+
+def record_post_keywords(timestamp: str, content: str, delta: int = 1):
+    """
+    Count a post's keywords (or uncount them with delta=-1) and flush if due.
+    Runs as a background task after the post is saved, so a failure here, e.g.
+    missing NLTK data, is logged instead of failing a write that already committed.
+    """
+    try:
+        keyword_trends.record(timestamp, tokenize(content), delta)
+        keyword_trends.flush()
+    except Exception as e:
+        logger.error(f"Failed to record keywords of post from {timestamp}: {e}")
@@ -0,0 +1,27 @@
+from typing import Iterable, List
+from api.cache import TTLCache, caches
+from api.nlp.user_search import user_search_index
+
+# Most similar users remembered per user; requests for fewer are served from the same entry
+RECOMMENDATIONS_KEPT = 100
+
+# Entries expire so other users' changes show up; a user's own interest change drops theirs at once
+recommendation_cache = TTLCache(maxsize=10000, ttl=300)
+caches["recommendations"] = recommendation_cache
+
+
+def recommend_users(username: str, interests: Iterable[str], k: int) -> List[dict]:
+    """
+    Users most similar to `username` by IDF-weighted shared interests, best first.
+    Blocking on cache misses; call it from the threadpool.
+    """
+    names = recommendation_cache.get(username)
+    if names is None:
+        names = [name for name, _ in user_search_index.similar_users(username, interests, RECOMMENDATIONS_KEPT)]
+        recommendation_cache.set(username, names)
+    users = (user_search_index.get(name) for name in names[:k])
+    return [user for user in users if user is not None]
+
+
+def invalidate_recommendations(username: str):
+    recommendation_cache.delete(username)
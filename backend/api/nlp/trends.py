@@ -1,30 +1,90 @@
+import asyncio
 from collections import Counter
-from typing import List, Dict
-from nltk.corpus import stopwords
-import nltk
+from datetime import datetime, timedelta
+from typing import Iterable, List, Tuple
+from boto3.dynamodb.conditions import Key
+import heapq
+from api.db_setup import dynamodb
+from api.aws_wrappers.dynamo import run_dynamodb
 
+# Per-topic post counters: bucket (HASH, "H#YYYY-MM-DDTHH" or "D#YYYY-MM-DD") + topic (RANGE)
+topic_trends_table = dynamodb.Table('topic_trends')
 
+# Windows the trending endpoints accept, in hours
+TREND_WINDOWS = {"1h": 1, "24h": 24, "7d": 24 * 7}
 
-def get_trending_topics(posts: List[Dict]) -> List[Dict]:
-    topic_counter = Counter()
-    for post in posts:
-        topic_counter.update(post['topics'])
-    return topic_counter.most_common()
+# Counters older than the longest window are expired by DynamoDB TTL
+TREND_RETENTION = timedelta(days=8)
 
-def get_trending_keywords(posts: List[Dict]) -> List[Dict]:
+
+def parse_post_time(timestamp: str) -> datetime:
     try:
-        # Download stopwords if not already downloaded
-        nltk.download('stopwords', quiet=True)
-        stop_words = set(stopwords.words('english'))
-        word_counter = Counter()
-
-        for post in posts:
-            # Simple word splitting instead of word_tokenize
-            words = post['content'].lower().split()
-            filtered_words = [word for word in words if word.isalnum() and word not in stop_words]
-            word_counter.update(filtered_words)
-
-        return word_counter.most_common()
-    except Exception as e:
-        print(f"Error in keyword extraction: {str(e)}")
-        return []
\ No newline at end of file
+        return datetime.fromisoformat(timestamp)
+    except (TypeError, ValueError):
+        return datetime.now()
+
+
+def trend_buckets(timestamp: str) -> Tuple[str, str]:
+    """
+    Hour and day counter buckets a post timestamp falls into.
+    """
+    when = parse_post_time(timestamp)
+    return when.strftime("H#%Y-%m-%dT%H"), when.strftime("D#%Y-%m-%d")
+
+
+def window_buckets(hours: int, now: datetime = None) -> List[str]:
+    """
+    Smallest set of buckets covering the last `hours` hours: whole days where a
+    day lies entirely inside the window, single hours at the edges.
+    """
+    now = (now or datetime.now()).replace(minute=0, second=0, microsecond=0)
+    current = now - timedelta(hours=hours - 1)
+    buckets = []
+    while current <= now:
+        if current.hour == 0 and hours > 24:
+            buckets.append(current.strftime("D#%Y-%m-%d"))
+            current += timedelta(days=1)
+        else:
+            buckets.append(current.strftime("H#%Y-%m-%dT%H"))
+            current += timedelta(hours=1)
+    return buckets
+
+
+def record_topic_changes(timestamp: str, added: Iterable[str] = (), removed: Iterable[str] = ()):
+    """
+    Adjust the hour and day counters of the post's creation time:
+    +1 for every topic in `added`, -1 for every topic in `removed`.
+    """
+    expires_at = int((parse_post_time(timestamp) + TREND_RETENTION).timestamp())
+    changes = [(topic, 1) for topic in added] + [(topic, -1) for topic in removed]
+    for bucket in trend_buckets(timestamp):
+        for topic, delta in changes:
+            topic_trends_table.update_item(
+                Key={"bucket": bucket, "topic": topic},
+                UpdateExpression="ADD postCount :delta SET expiresAt = if_not_exists(expiresAt, :expires)",
+                ExpressionAttributeValues={":delta": delta, ":expires": expires_at},
+            )
+
+
+def _read_bucket(bucket: str) -> Counter:
+    counts = Counter()
+    query_kwargs = {"KeyConditionExpression": Key("bucket").eq(bucket)}
+    while True:
+        response = topic_trends_table.query(**query_kwargs)
+        for item in response.get("Items", []):
+            counts[item["topic"]] += int(item.get("postCount", 0))
+        if "LastEvaluatedKey" not in response:
+            return counts
+        query_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+
+async def get_trending_topics(window: str = "24h", k: int = 10) -> List[Tuple[str, int]]:
+    """
+    Top `k` topics by number of posts created within `window`, read from the counter
+    buckets concurrently on the shared DynamoDB thread pool.
+    """
+    buckets = window_buckets(TREND_WINDOWS[window])
+    totals = Counter()
+    for counts in await asyncio.gather(*(run_dynamodb(_read_bucket, bucket) for bucket in buckets)):
+        totals.update(counts)
+    return heapq.nlargest(k, ((topic, count) for topic, count in totals.items() if count > 0), key=lambda item: item[1])
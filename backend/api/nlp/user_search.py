@@ -0,0 +1,339 @@
+from bisect import bisect_left, insort
+from collections import defaultdict
+from itertools import islice
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from operator import itemgetter
+import heapq
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# User attributes the index keeps and returns with search results
+SUMMARY_FIELDS = ("username", "firstName", "lastName", "isVeteran", "interests", "profilePic",
+                  "employmentStatus", "workLocation", "liveLocation")
+
+# Attributes whose words are searchable
+SEARCH_FIELDS = ("username", "firstName", "lastName")
+
+# Users scored per query word; bounds work for very short prefixes like "a"
+MAX_CANDIDATES = 2000
+
+# Users scored per shared interest when recommending; bounds work for interests most users list
+MAX_INTEREST_SCAN = 5000
+
+# Rebuild from the users table this often, to pick up writes made by other workers
+REFRESH_SECONDS = 600
+
+EXACT, PREFIX, FUZZY = 3.0, 2.0, 1.0
+
+
+def _words(text) -> List[str]:
+    return [word for word in str(text or "").lower().split() if word]
+
+
+def _trigrams(term: str) -> Set[str]:
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _interests(user: Optional[dict]) -> Set[str]:
+    return set((user or {}).get("interests") or [])
+
+
+def _max_typos(word: str) -> int:
+    return 0 if len(word) < 4 else 1 if len(word) < 8 else 2
+
+
+def _within_distance(a: str, b: str, limit: int) -> bool:
+    """
+    Levenshtein distance of a and b is at most `limit`, computed only along the diagonal band.
+    """
+    if abs(len(a) - len(b)) > limit:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i] + [limit + 1] * len(b)
+        for j in range(max(1, i - limit), min(len(b), i + limit) + 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != b[j - 1]),
+            )
+        if min(current) > limit:
+            return False
+        previous = current
+    return previous[-1] <= limit
+
+
+class UserSearchIndex:
+    """
+    In-process inverted index over usernames and first/last names, plus interests.
+    Terms are kept sorted for prefix lookups and indexed by trigram for typo-tolerant
+    matches. Fed by the users router on every write and rebuilt from the users table
+    on first use and every REFRESH_SECONDS.
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._build_lock = threading.Lock()
+        self._reset()
+        self._built_at = None
+        # Writes seen while a rebuild is loading users, replayed onto the rebuilt index
+        self._pending: Optional[list] = None
+
+    def _reset(self):
+        self._users: Dict[str, dict] = {}
+        self._user_terms: Dict[str, Set[str]] = {}
+        self._postings: Dict[str, Set[str]] = defaultdict(set)
+        self._terms: List[str] = []
+        # interest -> users who list it, for similarity recommendations
+        self._interest_users: Dict[str, Set[str]] = defaultdict(set)
+        # trigram -> term length -> terms, so typo lookups only touch terms of similar length
+        self._trigram_terms: Dict[str, Dict[int, Set[str]]] = defaultdict(lambda: defaultdict(set))
+
+    def _add_term(self, term: str, username: str):
+        postings = self._postings[term]
+        if not postings:
+            insort(self._terms, term)
+            for gram in _trigrams(term):
+                self._trigram_terms[gram][len(term)].add(term)
+        postings.add(username)
+
+    def _remove_term(self, term: str, username: str):
+        postings = self._postings.get(term)
+        if postings is None:
+            return
+        postings.discard(username)
+        if not postings:
+            del self._postings[term]
+            del self._terms[bisect_left(self._terms, term)]
+            for gram in _trigrams(term):
+                self._trigram_terms[gram][len(term)].discard(term)
+
+    def upsert(self, user: dict):
+        username = user.get("username")
+        if not username:
+            return
+        terms = {word for field in SEARCH_FIELDS for word in _words(user.get(field))}
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((self.upsert, user))
+            old_terms = self._user_terms.get(username, set())
+            for term in old_terms - terms:
+                self._remove_term(term, username)
+            for term in terms - old_terms:
+                self._add_term(term, username)
+            self._user_terms[username] = terms
+            self._set_interests(username, _interests(self._users.get(username)), _interests(user))
+            self._users[username] = {field: user.get(field) for field in SUMMARY_FIELDS}
+
+    def remove(self, username: str):
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append((self.remove, username))
+            for term in self._user_terms.pop(username, set()):
+                self._remove_term(term, username)
+            self._set_interests(username, _interests(self._users.pop(username, None)), set())
+
+    def _set_interests(self, username: str, old: Set[str], new: Set[str]):
+        for interest in old - new:
+            users = self._interest_users.get(interest)
+            if users is not None:
+                users.discard(username)
+                if not users:
+                    del self._interest_users[interest]
+        for interest in new - old:
+            self._interest_users[interest].add(username)
+
+    def _prefix_terms(self, word: str) -> Iterable[str]:
+        terms = self._terms
+        for position in range(bisect_left(terms, word), len(terms)):
+            if not terms[position].startswith(word):
+                return
+            yield terms[position]
+
+    def _fuzzy_terms(self, word: str) -> Iterable[str]:
+        limit = _max_typos(word)
+        if not limit:
+            return
+        lengths = range(len(word) - limit, len(word) + limit + 1)
+
+        def frequency(gram: str) -> int:
+            by_length = self._trigram_terms.get(gram, {})
+            return sum(len(by_length.get(length, ())) for length in lengths)
+
+        # Each edit breaks at most three trigrams, so a match shares at least one of any 3 * limit + 1 of them;
+        # taking the rarest keeps the candidate set small
+        grams = sorted(_trigrams(word), key=frequency)[:3 * limit + 1]
+        seen = set()
+        for gram in grams:
+            by_length = self._trigram_terms.get(gram, {})
+            for length in lengths:
+                for term in by_length.get(length, ()):
+                    if term not in seen:
+                        seen.add(term)
+                        if _within_distance(word, term, limit):
+                            yield term
+
+    def _score_word(self, word: str, wanted: int) -> Dict[str, float]:
+        """
+        Best score per user for one query word. Typo matches are only looked up
+        when exact and prefix matches give fewer than `wanted` users.
+        """
+        scores: Dict[str, float] = {}
+
+        def credit(usernames: Iterable[str], score: float) -> bool:
+            for username in usernames:
+                if score > scores.get(username, 0):
+                    scores[username] = score
+                if len(scores) >= MAX_CANDIDATES:
+                    return False
+            return True
+
+        if not credit(self._postings.get(word, ()), EXACT):
+            return scores
+        for term in self._prefix_terms(word):
+            # Shorter completions rank above longer ones
+            if not credit(self._postings[term], PREFIX + len(word) / len(term) / 2):
+                return scores
+        if len(scores) < wanted:
+            for term in self._fuzzy_terms(word):
+                if not credit(self._postings[term], FUZZY):
+                    break
+        return scores
+
+    def search(self, query: str, limit: int = 20, exclude: Optional[str] = None) -> List[dict]:
+        """
+        Users matching any query word by exact word, prefix or small typo, best first.
+        Users matching more of the words rank higher.
+        """
+        words = list(dict.fromkeys(_words(query)))
+        if not words:
+            return []
+        with self._lock:
+            totals: Dict[str, float] = defaultdict(float)
+            for word in words:
+                for username, score in self._score_word(word, limit).items():
+                    totals[username] += score
+            totals.pop(exclude, None)
+            best = heapq.nlargest(limit, totals.items(), key=itemgetter(1))
+            best.sort(key=lambda item: (-item[1], item[0]))
+            return [dict(self._users[username]) for username, _ in best]
+
+    def similar_users(self, username: str, interests: Iterable[str], k: int) -> List[Tuple[str, float]]:
+        """
+        Top `k` other users by shared interests, each shared interest weighted by
+        its IDF so rare interests count for more than ones most users list.
+        At most MAX_INTEREST_SCAN users are scored per interest, so a popular
+        interest cannot make a call scan most of the index.
+        """
+        with self._lock:
+            total = len(self._users) or 1
+            scores: Dict[str, float] = defaultdict(float)
+            for interest in set(interests or []):
+                users = self._interest_users.get(interest)
+                if not users:
+                    continue
+                weight = math.log(1 + total / len(users))
+                for other in islice(users, MAX_INTEREST_SCAN):
+                    scores[other] += weight
+            scores.pop(username, None)
+            best = heapq.nlargest(k, scores.items(), key=itemgetter(1))
+            best.sort(key=lambda item: (-item[1], item[0]))
+            return best
+
+    def sample_users(self, count: int, exclude: Iterable[str] = ()) -> List[dict]:
+        """
+        Up to `count` arbitrary users not in `exclude`, to pad short recommendation lists.
+        """
+        exclude = set(exclude)
+        with self._lock:
+            return [dict(user) for user in islice(
+                (user for name, user in self._users.items() if name not in exclude), count
+            )]
+
+    def get(self, username: str) -> Optional[dict]:
+        with self._lock:
+            user = self._users.get(username)
+            return dict(user) if user is not None else None
+
+    def ensure_fresh(self, load_users):
+        """
+        Build the index from `load_users()` on first use, and rebuild it in a
+        background thread once it is older than REFRESH_SECONDS.
+        """
+        if self._built_at is None:
+            with self._build_lock:
+                if self._built_at is None:
+                    self._rebuild(load_users)
+            return
+        if time.monotonic() - self._built_at <= REFRESH_SECONDS or not self._build_lock.acquire(blocking=False):
+            return
+
+        def refresh():
+            try:
+                self._rebuild(load_users)
+            except Exception:
+                pass  # Already logged; the current index keeps serving until the next attempt
+            finally:
+                self._build_lock.release()
+
+        threading.Thread(target=refresh, daemon=True).start()
+
+    def warm_up(self, load_users):
+        """
+        Start the first build in a background thread; searches arriving meanwhile wait for it.
+        """
+        def build():
+            try:
+                self.ensure_fresh(load_users)
+            except Exception:
+                pass  # Already logged; the first search retries the build
+
+        threading.Thread(target=build, daemon=True).start()
+
+    def _bulk_load(self, users: Iterable[dict]):
+        """
+        Fill an empty index, sorting the term list once instead of inserting term by term.
+        """
+        for user in users:
+            username = user.get("username")
+            if not username:
+                continue
+            terms = {word for field in SEARCH_FIELDS for word in _words(user.get(field))}
+            for term in terms:
+                self._postings[term].add(username)
+            self._user_terms[username] = terms
+            self._users[username] = {field: user.get(field) for field in SUMMARY_FIELDS}
+            for interest in _interests(user):
+                self._interest_users[interest].add(username)
+        self._terms = sorted(self._postings)
+        for term in self._terms:
+            for gram in _trigrams(term):
+                self._trigram_terms[gram][len(term)].add(term)
+
+    def _rebuild(self, load_users):
+        fresh = UserSearchIndex()
+        with self._lock:
+            self._pending = []
+        try:
+            fresh._bulk_load(load_users())
+        except Exception as e:
+            logger.error(f"Failed to build user search index: {e}")
+            with self._lock:
+                self._pending = None
+            raise
+        with self._lock:
+            pending, self._pending = self._pending, None
+            self._users, self._user_terms, self._postings = fresh._users, fresh._user_terms, fresh._postings
+            self._terms, self._trigram_terms = fresh._terms, fresh._trigram_terms
+            self._interest_users = fresh._interest_users
+            for apply, argument in pending:
+                apply(argument)
+            self._built_at = time.monotonic()
+        logger.info(f"User search index built with {len(self._users)} users")
+
+
+user_search_index = UserSearchIndex()
@@ -0,0 +1,56 @@
+# backend/api/passwords.py
+# Password hashing off the event loop. bcrypt is deliberately slow CPU work, so
+# hashes and checks run on a small thread pool instead of inside async handlers.
+# bcrypt's C code releases the GIL, so threads hash in parallel without child
+# processes, which serverless runtimes such as Vercel's cannot start.
+import asyncio
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+from passlib.context import CryptContext
+
+# bcrypt cost factor; each step doubles the time per hash. Stored hashes with another cost are rehashed on login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))
+
+# Threads hashing passwords per server process. Kept small so several uvicorn workers
+# on one machine do not oversubscribe the CPU
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+
+# min/max pin the cost, so needs_update() flags hashes made under an older policy
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+
+
+def make_hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def verify_and_update(password: str, hashed: Optional[str]) -> Tuple[bool, Optional[str]]:
+    """
+    Check `password` against a stored hash. Returns whether it matched and, if the
+    hash should be replaced (older cost, or a password stored unhashed by earlier
+    versions of the update routes), the new hash to store.
+    """
+    if not hashed:
+        return False, None
+    if pwd_context.identify(hashed) is None:
+        if hmac.compare_digest(password.encode(), hashed.encode()):
+            return True, pwd_context.hash(password)
+        return False, None
+    return pwd_context.verify_and_update(password, hashed)
+
+
+async def hash_password(password: str) -> str:
+    return await asyncio.get_running_loop().run_in_executor(password_executor, make_hash, password)
+
+
+async def verify_password(password: str, hashed: Optional[str]) -> Tuple[bool, Optional[str]]:
+    return await asyncio.get_running_loop().run_in_executor(password_executor, verify_and_update, password, hashed)
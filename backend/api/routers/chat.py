@@ -1,5 +1,5 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException
-from api.db_setup import dynamodb
+from api.aws_wrappers.dynamo import AsyncTable
 from api.models.chat import MessageResponse, ChatRequest
 from boto3.dynamodb.conditions import Key, Attr
 from botocore.exceptions import ClientError
@@ -13,8 +13,8 @@ router = APIRouter(
 )
 
 # Reference to DynamoDB tables
-chatrooms_table = dynamodb.Table('chatrooms')
-messages_table = dynamodb.Table('messages')
+chatrooms_table = AsyncTable('chatrooms')
+messages_table = AsyncTable('messages')
 
 class ConnectionManager:
     def __init__(self):
@@ -41,7 +41,7 @@ async def chat_endpoint(websocket: WebSocket, room_id: str, author: str):
 
     # Check if room exists in the database
     try:
-        response = chatrooms_table.get_item(Key={'room_id': room_id})
+        response = await chatrooms_table.get_item(Key={'room_id': room_id})
     except ClientError:
         await websocket.close()
         raise HTTPException(status_code=500, detail="Internal server error.")
@@ -66,7 +66,7 @@ async def chat_endpoint(websocket: WebSocket, room_id: str, author: str):
             }
 
             try:
-                messages_table.put_item(Item=message_item)
+                await messages_table.put_item(Item=message_item)
             except ClientError:
                 raise HTTPException(status_code=500, detail="Failed to store message.")
 
@@ -78,7 +78,7 @@ async def chat_endpoint(websocket: WebSocket, room_id: str, author: str):
 @router.get("/")
 async def get_all_chat_rooms(user: str):
     try:
-        response = chatrooms_table.scan(
+        response = await chatrooms_table.scan(
             FilterExpression="contains(#users, :user)",
             ExpressionAttributeNames={"#users": "users"},
             ExpressionAttributeValues={":user": user}
@@ -92,7 +92,7 @@ async def get_all_chat_rooms(user: str):
 async def get_users_in_room(room_id: str):
     try:
         # Retrieve the item by room_id (primary key lookup)
-        response = chatrooms_table.get_item(Key={"room_id": room_id})
+        response = await chatrooms_table.get_item(Key={"room_id": room_id})
         
         # Check if the room exists
         if 'Item' not in response:
@@ -109,7 +109,7 @@ async def get_users_in_room(room_id: str):
 async def get_messages_in_room(room_id: str):
     try:
         # Query the Messages table by room_id, ordered by timestamp
-        response = messages_table.query(
+        response = await messages_table.query(
             KeyConditionExpression=Key('room_id').eq(room_id)
         )
         
@@ -128,7 +128,7 @@ async def create_chat_room(req: ChatRequest):
     }
 
     try:
-        chatrooms_table.put_item(
+        await chatrooms_table.put_item(
             Item=chatroom_item,
             ConditionExpression=Attr('room_id').not_exists()  # only if room_id does not exist
         )
@@ -145,7 +145,7 @@ async def create_chat_room(req: ChatRequest):
 async def join_chat_room(req: ChatRequest):
     try:
         # Fetch the room details
-        response = chatrooms_table.get_item(Key={'room_id': req.room_id})
+        response = await chatrooms_table.get_item(Key={'room_id': req.room_id})
         if 'Item' not in response:
             raise HTTPException(status_code=404, detail="Chat room not found.")
 
@@ -161,7 +161,7 @@ async def join_chat_room(req: ChatRequest):
 
     # Update the users set in the room
     try:
-        chatrooms_table.update_item(
+        await chatrooms_table.update_item(
             Key={'room_id': req.room_id},
             UpdateExpression="ADD #u :user_set",
             ExpressionAttributeNames={
@@ -184,7 +184,7 @@ async def join_chat_room(req: ChatRequest):
         }
 
         try:
-            messages_table.put_item(Item=message_item)
+            await messages_table.put_item(Item=message_item)
         except ClientError as e:
             print(f"Error saving system message: {str(e)}")
             raise HTTPException(status_code=500, detail="Failed to save system message.")
@@ -200,7 +200,7 @@ async def join_chat_room(req: ChatRequest):
 @router.put("/leave", response_model=MessageResponse)
 async def leave_chat_room(req: ChatRequest):
     try:
-        response = chatrooms_table.get_item(Key={'room_id': req.room_id})
+        response = await chatrooms_table.get_item(Key={'room_id': req.room_id})
         if 'Item' not in response:
             raise HTTPException(status_code=404, detail="Chat room not found.")
     except ClientError as e:
@@ -209,7 +209,7 @@ async def leave_chat_room(req: ChatRequest):
 
     # Remove user from the set using DELETE operation
     try:
-        chatrooms_table.update_item(
+        await chatrooms_table.update_item(
             Key={'room_id': req.room_id},
             UpdateExpression="DELETE #u :user_set",
             ExpressionAttributeNames={
@@ -232,7 +232,7 @@ async def leave_chat_room(req: ChatRequest):
         }
 
         try:
-            messages_table.put_item(Item=message_item)
+            await messages_table.put_item(Item=message_item)
         except ClientError as e:
             print(f"Error saving system message: {str(e)}")
             raise HTTPException(status_code=500, detail="Failed to save system message.")
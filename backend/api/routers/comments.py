@@ -1,10 +1,13 @@
-from fastapi import APIRouter, HTTPException
-from api.db_setup import dynamodb
+from fastapi import APIRouter, HTTPException, Query
+from api.aws_wrappers.dynamo import AsyncTable, run_dynamodb, run_dynamodb_write
+from api.aws_wrappers.comments import query_comments_page, adjust_comment_count, load_comments
+from api.aws_wrappers.pagination import encode_cursor, decode_cursor
 from api.config import login_manager
-from api.models.comment import Comment
-from boto3.dynamodb.conditions import Key
+from api.models.comment import Comment, CommentPage, CommentBatchRequest, CommentBatch
+from api.cache import post_cache
 from botocore.exceptions import ClientError
 import logging
+import os
 
 router = APIRouter(
     prefix="/comments",
@@ -12,11 +15,14 @@ router = APIRouter(
 )
 
 # Reference to the comments table
-comments_table = dynamodb.Table('comments')
+comments_table = AsyncTable('comments')
 
 # Used for logging
 logger = logging.getLogger(__name__)
 
+# Deadline in seconds shared by all post index queries of one batch request
+COMMENT_BATCH_DEADLINE = float(os.getenv("COMMENT_BATCH_DEADLINE", 3))
+
 @router.post("/", response_model=Comment)
 async def create_comment(comment: Comment):
     """
@@ -28,7 +34,9 @@ async def create_comment(comment: Comment):
 
     try:
         # Save the comment in DynamoDB
-        comments_table.put_item(Item=comment_item)
+        await comments_table.put_item(Item=comment_item)
+        await run_dynamodb_write(adjust_comment_count, comment.postId, 1)
+        await post_cache.invalidate(comment.postId)
     except ClientError as e:
         logger.error(f"Failed to save comment to DynamoDB: {e}")
         raise HTTPException(status_code=500, detail="Failed to save comment data.")
@@ -36,23 +44,60 @@ async def create_comment(comment: Comment):
     return comment
 
 
+@router.post("/batch", response_model=CommentBatch)
+async def get_comments_batch(request: CommentBatchRequest):
+    """
+    Retrieve the newest comments of many posts in one round trip.
+    Post index queries run in parallel (bounded) under one shared deadline.
+    """
+    comments_by_post = await load_comments(request.postIds, latest=request.limit, timeout=COMMENT_BATCH_DEADLINE)
+    return {
+        "comments": comments_by_post,
+        "incomplete": [post_id for post_id in dict.fromkeys(request.postIds) if post_id not in comments_by_post],
+    }
+
 @router.get("/{postId}", response_model=list[Comment])
-async def get_comments(postId: str):
+async def get_comments(
+    postId: str,
+    order: str = Query("oldest", regex="^(newest|oldest)$", description="'newest' or 'oldest' first")
+):
     """
     Retrieve all comments for a specific post.
+    Kept for clients that expect the full list; it pages through the post index under the hood.
     """
     logger.info(f"Fetching comments for postId: {postId}")
     try:
-        response = comments_table.scan(
-            FilterExpression=Key('postId').eq(postId)
-        )
+        items = []
+        cursor = None
+        while True:
+            page, cursor = await run_dynamodb(query_comments_page, postId, 100, cursor, order == "newest")
+            items.extend(page)
+            if cursor is None:
+                break
     except ClientError as e:
         logger.error(f"Failed to query comments from DynamoDB: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch comments.")
 
-    items = response.get('Items', [])
     return [Comment(**item) for item in items]
 
+@router.get("/{postId}/page", response_model=CommentPage)
+async def get_comments_page(
+    postId: str,
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of comments to return"),
+    cursor: str = Query(None, description="Cursor returned by the previous page"),
+    order: str = Query("newest", regex="^(newest|oldest)$", description="'newest' or 'oldest' first")
+):
+    """
+    Retrieve one page of a post's comments with a single post index query.
+    """
+    try:
+        items, next_key = await run_dynamodb(query_comments_page, postId, limit, decode_cursor(cursor), order == "newest")
+    except ClientError as e:
+        logger.error(f"Failed to query comments from DynamoDB: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch comments.")
+
+    return {"comments": items, "nextCursor": encode_cursor(next_key)}
+
 @router.delete("/{commentId}", response_model=dict)
 async def delete_comment(commentId: str):
     """
@@ -60,9 +105,15 @@ async def delete_comment(commentId: str):
     """
     logger.info(f"Deleting comment with commentId: {commentId}")
     try:
-        comments_table.delete_item(
-            Key={'commentId': commentId}
+        response = await comments_table.delete_item(
+            Key={'commentId': commentId},
+            ReturnValues="ALL_OLD"
         )
+        # Only the request that actually removed the comment decrements the count
+        deleted = response.get("Attributes")
+        if deleted:
+            await run_dynamodb_write(adjust_comment_count, deleted["postId"], -1)
+            await post_cache.invalidate(deleted["postId"])
     except ClientError as e:
         logger.error(f"Failed to delete comment from DynamoDB: {e}")
         if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
@@ -5,7 +5,8 @@ import stripe
 import os
 from datetime import datetime
 import uuid
-import boto3
+from api.aws_wrappers.dynamo import AsyncTable
+from fastapi.concurrency import run_in_threadpool
 from botocore.exceptions import ClientError
 from fastapi.encoders import jsonable_encoder
 from pydantic import BaseModel
@@ -24,15 +25,7 @@ stripe.webhook_secret = os.getenv("VITE_STRIPE_WEBHOOK_SECRET")
 print(f"Stripe secret key: {stripe.api_key}")
 print(f"Stripe webhook secret: {stripe.webhook_secret}")
 
-# Configure DynamoDB
-dynamodb = boto3.resource(
-    'dynamodb',
-    aws_access_key_id=os.getenv('aws_access_key_id'),
-    aws_secret_access_key=os.getenv('aws_secret_access_key'),
-    region_name=os.getenv('aws_region')
-)
-
-donation_table = dynamodb.Table('donations')
+donation_table = AsyncTable('donations')
 
 class PaymentIntentRequest(BaseModel):
     amount: float
@@ -60,7 +53,8 @@ async def create_payment_intent(donation: DonationCreate):
         # Create Stripe payment intent (Stripe needs cents as integer)
         stripe_amount = int(amount * 100)
         
-        intent = stripe.PaymentIntent.create(
+        intent = await run_in_threadpool(
+            stripe.PaymentIntent.create,
             amount=stripe_amount,
             currency='usd',
             automatic_payment_methods={
@@ -121,7 +115,7 @@ async def stripe_webhook(request: Request):
             
             # Update donation status in DynamoDB
             try:
-                donations = donation_table.query(
+                donations = await donation_table.query(
                     IndexName='payment_intent_id-index',
                     KeyConditionExpression='payment_intent_id = :pid',
                     ExpressionAttributeValues={
@@ -131,7 +125,7 @@ async def stripe_webhook(request: Request):
 
                 if donations.get('Items'):
                     donation = donations['Items'][0]
-                    donation_table.update_item(
+                    await donation_table.update_item(
                         Key={'id': donation['id']},
                         UpdateExpression='SET #status = :status, updated_at = :updated_at',
                         ExpressionAttributeNames={
@@ -163,7 +157,7 @@ async def stripe_webhook(request: Request):
 @router.get("/", response_model=List[DonationResponse])
 async def get_donations():
     try:
-        response = donation_table.scan()
+        response = await donation_table.scan()
         return [item for item in response.get('Items', [])]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
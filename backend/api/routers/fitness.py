@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException, Depends
 import boto3
 from boto3.dynamodb.conditions import Key
-from api.db_setup import dynamodb
+from api.aws_wrappers.dynamo import AsyncTable
 from pydantic import BaseModel
 import uuid
 
@@ -10,7 +10,7 @@ router = APIRouter(
     tags=["fitness"]
 )
 
-table = dynamodb.Table('fitness_tasks')
+table = AsyncTable('fitness_tasks')
 
 class TaskCreate(BaseModel):
     description: str
@@ -19,7 +19,7 @@ class TaskCreate(BaseModel):
 async def get_fitness_tasks(username: str):
     print(f"Getting fitness tasks for {username}")
     try:
-        response = table.query(
+        response = await table.query(
             KeyConditionExpression=Key('username').eq(username)
         )
         return response['Items']
@@ -31,14 +31,14 @@ async def check_fitness_task(username: str, task_id: str):
     print(f"Checking fitness task {task_id} for {username}")
 
     try:
-        response = table.query( KeyConditionExpression=Key('username').eq(username))
+        response = await table.query( KeyConditionExpression=Key('username').eq(username))
         if 'Items' not in response:
             raise HTTPException(status_code=404, detail="Task not found")
         
         task = next((item for item in response['Items'] if item['task_id'] == task_id), None)
         current_task = task['is_finished']
 
-        response = table.update_item(
+        response = await table.update_item(
             Key={'username': username, 'task_id': task_id},
             UpdateExpression='SET is_finished = :is_finished',
             ExpressionAttributeValues={':is_finished': not current_task},
@@ -52,7 +52,7 @@ async def check_fitness_task(username: str, task_id: str):
 async def create_fitness_task(username: str, task: TaskCreate):
     try:
         task_id = str(uuid.uuid4())
-        response = table.put_item(
+        response = await table.put_item(
             Item={
                 'username': username,
                 'task_id': task_id,
@@ -73,7 +73,7 @@ async def create_fitness_task(username: str, task: TaskCreate):
 async def delete_fitness_task(username: str, task_id: str):
     try:
         # Delete the item
-        response = table.delete_item(
+        response = await table.delete_item(
             Key={
                 'username': username,
                 'task_id': task_id
@@ -1,6 +1,7 @@
-from api.aws_wrappers.images import upload_image
+from api.aws_wrappers.images import upload_image, upload_images, rendition_url
 from fastapi import APIRouter, HTTPException, Query, Form, File, UploadFile
-from api.db_setup import dynamodb
+from api.aws_wrappers.dynamo import AsyncTable
+from fastapi.concurrency import run_in_threadpool
 from api.models.group import Group
 from boto3.dynamodb.conditions import Key
 from botocore.exceptions import ClientError
@@ -20,7 +21,7 @@ router = APIRouter(
 )
 
 # Reference to the groups table
-groups_table = dynamodb.Table("groups")
+groups_table = AsyncTable("groups")
 
 # Load environment variables from .env file
 load_dotenv()
@@ -44,7 +45,7 @@ def fetch_image_url(query: str) -> str:
         "client_id": UNSPLASH_ACCESS_KEY,
         "per_page": 1,
     }
-    response = requests.get(BASE_URL, params=params)
+    response = requests.get(BASE_URL, params=params, timeout=5)
     if response.status_code == 200:
         results = response.json().get("results", [])
         if results:
@@ -80,12 +81,12 @@ async def create_group(
         if image is not None:
             image_url = await upload_image("group-pictures", image)
         else:
-            image_url = fetch_image_url(name)
+            image_url = await run_in_threadpool(fetch_image_url, name)
 
         group_data["image"] = image_url  # Set the image URL
 
         # Store the group in DynamoDB
-        groups_table.put_item(Item=group_data)
+        await groups_table.put_item(Item=group_data)
         logger.info(f"Group created: {group_data}")
         return Group(**group_data)
     except ClientError as e:
@@ -105,12 +106,8 @@ async def add_post_to_group(
     createdAt: str = Form(None)
 ):
     try:
-        # Upload images to S3
-        image_urls = []
-        if images:
-            for image in images:
-                url = await upload_image("post-pictures", image)
-                image_urls.append(url)
+        # Upload images to S3 in parallel
+        image_urls = await upload_images("post-pictures", images) if images else []
         
         # Create post object
         post = Post(
@@ -125,7 +122,7 @@ async def add_post_to_group(
         )
         
         # Query the group from DynamoDB
-        response = groups_table.get_item(Key={"groupId": group_id})
+        response = await groups_table.get_item(Key={"groupId": group_id})
         group = response.get("Item")
         
         if not group:
@@ -138,7 +135,7 @@ async def add_post_to_group(
         posts.append(post.dict())
         
         # Update the group in DynamoDB
-        groups_table.update_item(
+        await groups_table.update_item(
             Key={"groupId": group_id},
             UpdateExpression="SET posts = :posts",
             ExpressionAttributeValues={":posts": posts}
@@ -151,9 +148,9 @@ async def add_post_to_group(
 
 # Get a group by ID
 @router.get("/{group_id}", response_model=Group)
-def get_group(group_id: str):
+async def get_group(group_id: str):
     try:
-        response = groups_table.get_item(Key={"groupId": group_id})
+        response = await groups_table.get_item(Key={"groupId": group_id})
         if "Item" not in response:
             raise HTTPException(status_code=404, detail="Group not found")
         return Group(**response["Item"])
@@ -164,11 +161,11 @@ def get_group(group_id: str):
 
 # Get all groups
 @router.get("/", response_model=List[Group])
-def list_groups():
+async def list_groups():
     try:
-        response = groups_table.scan()
+        response = await groups_table.scan()
         groups = response.get("Items", [])
-        return [Group(**group) for group in groups]
+        return [Group(**group, avatar=rendition_url(group.get("image"), "avatar")) for group in groups]
     except ClientError as e:
         logger.error(e.response["Error"]["Message"])
         raise HTTPException(status_code=500, detail="Failed to list groups")
@@ -176,9 +173,9 @@ def list_groups():
 
 # Search for a group
 @router.get("/search/", response_model=List[Group])
-def search_groups(query: Optional[str] = Query(None, description="Search query for group names or descriptions")):
+async def search_groups(query: Optional[str] = Query(None, description="Search query for group names or descriptions")):
     try:
-        response = groups_table.scan()
+        response = await groups_table.scan()
         groups = response.get("Items", [])
         if query:
             query_lower = query.lower()
@@ -186,7 +183,7 @@ def search_groups(query: Optional[str] = Query(None, description="Search query f
                 group for group in groups
                 if query_lower in group["name"].lower() or query_lower in group["description"].lower()
             ]
-        return [Group(**group) for group in groups]
+        return [Group(**group, avatar=rendition_url(group.get("image"), "avatar")) for group in groups]
     except ClientError as e:
         logger.error(e.response["Error"]["Message"])
         raise HTTPException(status_code=500, detail="Failed to search groups")
@@ -194,16 +191,16 @@ def search_groups(query: Optional[str] = Query(None, description="Search query f
 
 # Update a group, including updating posts within the group
 @router.put("/{group_id}", response_model=Group)
-def update_group(group_id: str, group: Group):
+async def update_group(group_id: str, group: Group):
     try:
         # Check if the group exists
-        existing_group_response = groups_table.get_item(Key={"groupId": group_id})
+        existing_group_response = await groups_table.get_item(Key={"groupId": group_id})
         if "Item" not in existing_group_response:
             raise HTTPException(status_code=404, detail="Group not found")
 
         # Handle updating posts
         for post in group.posts:
-            post_response = get_post(post.postId)
+            post_response = await get_post(post.postId, viewer=None)
             if post_response is None:
                 new_post = Post(
                     postId=post.postId,
@@ -213,15 +210,15 @@ def update_group(group_id: str, group: Group):
                     images=post.images,
                     likes=post.likes,
                 )
-                update_post(post.postId, new_post)
+                await update_post(post.postId, new_post)
                 logger.info(f"Post created: {new_post}")
             else:
-                updated_post = update_post(post.postId, post)
+                updated_post = await update_post(post.postId, post)
                 logger.info(f"Post updated: {updated_post}")
 
         # Update the group
         group_dict = group.dict()
-        groups_table.put_item(Item=group_dict)
+        await groups_table.put_item(Item=group_dict)
         logger.info(f"Group updated: {group_dict}")
         return group
     except ClientError as e:
@@ -233,10 +230,11 @@ def update_group(group_id: str, group: Group):
 
 # Update a group's post
 @router.put("/{group_id}/posts/{post_id}", response_model=Post)
-def update_group_post(group_id: str, post_id: str, post_update: Post):
+async def update_group_post(group_id: str, post_id: str, post_update: Post):
     try:
         # Check if the group exists
-        group = groups_table.get(group_id)
+        response = await groups_table.get_item(Key={"groupId": group_id})
+        group = response.get("Item")
         if not group:
             raise HTTPException(status_code=404, detail="Group not found")
 
@@ -251,13 +249,17 @@ def update_group_post(group_id: str, post_id: str, post_update: Post):
         updated_post_instance = Post(**updated_post)
 
         # Update the post in the database
-        update_post(post_id, updated_post_instance)
+        await update_post(post_id, updated_post_instance)
 
         # Update the group's post list
         updated_group_posts = [
             updated_post_instance.dict() if p["postId"] == post_id else p for p in group_posts
         ]
-        groups_table[group_id]["posts"] = updated_group_posts
+        await groups_table.update_item(
+            Key={"groupId": group_id},
+            UpdateExpression="SET posts = :posts",
+            ExpressionAttributeValues={":posts": updated_group_posts}
+        )
 
         logger.info(f"Post updated in group {group_id}: {updated_post_instance.dict()}")
         return updated_post_instance
@@ -267,10 +269,10 @@ def update_group_post(group_id: str, post_id: str, post_update: Post):
 
 # Delete a post from a group
 @router.delete("/{group_id}/posts/{post_id}", status_code=200)
-def delete_group_post(group_id: str, post_id: str):
+async def delete_group_post(group_id: str, post_id: str):
     try:
         # Get the group
-        response = groups_table.get_item(Key={"groupId": group_id})
+        response = await groups_table.get_item(Key={"groupId": group_id})
         if "Item" not in response:
             raise HTTPException(status_code=404, detail="Group not found")
         
@@ -287,7 +289,7 @@ def delete_group_post(group_id: str, post_id: str):
         
         # Update the group in DynamoDB
         try:
-            update_response = groups_table.update_item(
+            update_response = await groups_table.update_item(
                 Key={"groupId": group_id},
                 UpdateExpression="SET posts = :posts",
                 ExpressionAttributeValues={":posts": posts},
@@ -315,7 +317,7 @@ async def update_group_info(
     try:
         # Get existing group with proper error handling
         try:
-            response = groups_table.get_item(Key={"groupId": group_id})
+            response = await groups_table.get_item(Key={"groupId": group_id})
             existing_group = response.get("Item")
         except ClientError as e:
             logger.error(f"DynamoDB get_item error: {e.response['Error']['Message']}")
@@ -335,7 +337,7 @@ async def update_group_info(
 
         # Update database with transaction safety
         try:
-            update_response = groups_table.update_item(
+            update_response = await groups_table.update_item(
                 Key={"groupId": group_id},
                 UpdateExpression="SET #name = :name, #description = :desc, #image = :img",
                 ExpressionAttributeNames={
@@ -359,7 +361,8 @@ async def update_group_info(
             "groupId": group_id,
             "name": updated_group.get("name", name),
             "description": updated_group.get("description", description),
-            "image": updated_group.get("image", image_url)
+            "image": updated_group.get("image", image_url),
+            "avatar": rendition_url(updated_group.get("image", image_url), "avatar"),
         }
 
     except HTTPException:
@@ -370,9 +373,9 @@ async def update_group_info(
 
 # Delete a group
 @router.delete("/{group_id}", status_code=204)
-def delete_group(group_id: str):
+async def delete_group(group_id: str):
     try:
-        groups_table.delete_item(Key={"groupId": group_id})
+        await groups_table.delete_item(Key={"groupId": group_id})
         logger.info(f"Group deleted: {group_id}")
         return {"message": "Group deleted successfully"}
     except ClientError as e:
@@ -381,13 +384,13 @@ def delete_group(group_id: str):
 
 # Add this endpoint to handle likes for posts within groups
 @router.post("/{group_id}/posts/{post_id}/like", status_code=200)
-def like_group_post(group_id: str, post_id: str, like_request: LikeRequest):
+async def like_group_post(group_id: str, post_id: str, like_request: LikeRequest):
     try:
         # Log incoming request
         logger.info(f"Like request received for post {post_id} in group {group_id} from user {like_request.username}")
         
         # Check if the group exists
-        group_response = groups_table.get_item(Key={"groupId": group_id})
+        group_response = await groups_table.get_item(Key={"groupId": group_id})
         if "Item" not in group_response:
             raise HTTPException(status_code=404, detail="Group not found")
         
@@ -435,7 +438,7 @@ def like_group_post(group_id: str, post_id: str, like_request: LikeRequest):
         
         # Update the group in DynamoDB
         try:
-            update_response = groups_table.update_item(
+            update_response = await groups_table.update_item(
                 Key={"groupId": group_id},
                 UpdateExpression="SET posts = :posts",
                 ExpressionAttributeValues={":posts": posts},
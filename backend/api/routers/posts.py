@@ -1,13 +1,23 @@
-from fastapi import APIRouter, Form, HTTPException, UploadFile, File, Depends, Query
-from api.db_setup import dynamodb
+from fastapi import APIRouter, BackgroundTasks, Form, HTTPException, UploadFile, File, Depends, Query
+from api.aws_wrappers.dynamo import AsyncTable, run_dynamodb, run_dynamodb_write
+from api.cache import post_cache
 from api.config import login_manager
-from api.models.post import Post, UpdatePostModel, LikeRequest
-from boto3.dynamodb.conditions import Key
+from api.models.post import Post, PostPage, UpdatePostModel, LikeRequest
 from botocore.exceptions import ClientError
-from typing import List, Set
+from typing import List, Optional, Set
+from datetime import datetime, timedelta
 import logging
-from api.nlp.trends import get_trending_keywords, get_trending_topics
-from api.aws_wrappers.images import upload_image, delete_image
+from api.nlp.trends import get_trending_topics, record_topic_changes
+from api.nlp.keywords import keyword_trends, record_post_keywords
+from api.aws_wrappers.images import upload_images
+from api.aws_wrappers.likes import toggle_like, liked_post_ids
+from api.aws_wrappers.cleanup import delete_post_with_cleanup, run_post_cleanup, get_cleanup_status
+from api.aws_wrappers.feeds import fan_out_post, read_user_feed
+from api.aws_wrappers.pagination import encode_cursor, decode_cursor
+from api.aws_wrappers.post_indexes import (
+    query_timeline, query_posts_by_author, query_posts_by_topics, timeline_bucket,
+    register_timeline_month, index_post_topics, reindex_post_topics
+)
 
 router = APIRouter(
     prefix="/posts",
@@ -15,8 +25,7 @@ router = APIRouter(
 )
 
 # Reference to the posts table
-posts_table = dynamodb.Table('posts')
-comments_table = dynamodb.Table('comments')
+posts_table = AsyncTable('posts')
 
 # Used for logging
 logger = logging.getLogger(__name__)
@@ -24,19 +33,15 @@ logger = logging.getLogger(__name__)
 # CREATE: Add a new post
 @router.post("/", response_model=Post)
 async def create_post(
+    background_tasks: BackgroundTasks,
     author: str = Form(..., description="Username of the post's author"),
     content: str = Form(..., description="Content of the post"),
     topics: Set[str] = Form(default={"general"}, description="Set of topics associated with the post"),
     images: List[UploadFile] = File(default=[], description="List of images")
 ):
     try:
-        # Upload images to S3
-        image_urls = []
-
-        if images:
-            for image in images:
-                url = await upload_image("post-pictures", image)
-                image_urls.append(url)
+        # Upload images to S3 in parallel
+        image_urls = await upload_images("post-pictures", images) if images else []
 
         # Construct the post
         post = Post(
@@ -47,18 +52,26 @@ async def create_post(
         )
         post_dict = post.dict()
         
-        # Initialize empty likedBy array if not provided
-        if 'likedBy' not in post_dict:
-            post_dict['likedBy'] = []
+        # likedBy is a string set that only exists once someone likes the post
+        post_dict.pop('likedBy', None)
             
         # Handle empty sets for DynamoDB
         if not post_dict.get('topics'):
             post_dict['topics'] = {"general"}
         if not post_dict.get('images'):
             post_dict['images'] = {"none"}
+
+        # Place the post on the time-ordered feed index
+        post_dict['timelineBucket'] = timeline_bucket(post.timestamp)
         
         # Save post to DynamoDB
-        posts_table.put_item(Item=post.dict())
+        await posts_table.put_item(Item=post_dict)
+        await run_dynamodb_write(register_timeline_month, post_dict['timelineBucket'])
+        await run_dynamodb_write(index_post_topics, post_dict)
+        await run_dynamodb_write(record_topic_changes, post.timestamp, post_dict['topics'])
+        background_tasks.add_task(record_post_keywords, post.timestamp, post.content)
+        # Push the post into interested users' feeds after responding
+        background_tasks.add_task(fan_out_post, post_dict)
         logger.info(f"Post created successfully: {post.postId}")
         return post
     except ClientError as e:
@@ -78,45 +91,99 @@ async def create_post(
             detail=f"Unexpected error: {str(e)}"
         )
 
+async def _mark_viewer_likes(posts: List[dict], viewer: Optional[str]):
+    """
+    Report only the viewer's own like state instead of every liker.
+    likedBy holds just the viewer when they liked the post, so clients checking
+    likedBy.includes(username) keep working.
+    """
+    liked = set()
+    if viewer and posts:
+        liked = await run_dynamodb(liked_post_ids, viewer, [post["postId"] for post in posts])
+    for post in posts:
+        post["isLiked"] = post["postId"] in liked
+        post["likedBy"] = [viewer] if post["isLiked"] else []
+
 # READ: Get all posts
 @router.get("/", response_model=list[Post])
-async def get_all_posts():
+async def get_all_posts(
+    viewer: Optional[str] = Query(None, description="Username whose likes are reported in isLiked")
+):
     """
-    Fetch all posts from the DynamoDB table.
+    Fetch all posts, newest first.
+    Kept for clients that expect the full list; it pages through the timeline index under the hood.
     """
     try:
-        response = posts_table.scan()
-        posts = response.get("Items", [])
-
-        # Attach comments to each post
-        for post in posts:
-            post_id = post["postId"]
-            comments_response = comments_table.scan(
-                FilterExpression=Key("postId").eq(post_id)
-            )
-            post["comments"] = comments_response.get("Items", [])
-            # Ensure likedBy exists
-            if 'likedBy' not in post:
-                post['likedBy'] = []
+        posts = []
+        cursor = None
+        while True:
+            page, cursor = await run_dynamodb(query_timeline, 100, cursor)
+            posts.extend(page)
+            if cursor is None:
+                break
+
+        # Posts carry commentCount, so comments themselves are loaded by the client per post
+        await _mark_viewer_likes(posts, viewer)
 
         return [Post(**post) for post in posts]
     except ClientError as e:
         logger.error(f"Failed to fetch all posts from DynamoDB: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch posts.")
 
+# READ: Get one page of the feed
+@router.get("/feed", response_model=PostPage)
+async def get_feed(
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of posts to return"),
+    cursor: str = Query(None, description="Cursor returned by the previous page"),
+    viewer: Optional[str] = Query(None, description="Username whose likes are reported in isLiked")
+):
+    """
+    Fetch posts newest first, one bounded timeline query per page.
+    """
+    try:
+        posts, next_state = await run_dynamodb(query_timeline, limit, decode_cursor(cursor))
+        await _mark_viewer_likes(posts, viewer)
+        return {"posts": posts, "nextCursor": encode_cursor(next_state)}
+    except ClientError as e:
+        logger.error(f"Failed to fetch feed page from DynamoDB: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch posts.")
+
+# READ: Get one page of a user's personalized feed
+@router.get("/feed/{username}", response_model=PostPage)
+async def get_user_feed(
+    username: str,
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of posts to return"),
+    cursor: str = Query(None, description="Cursor returned by the previous page")
+):
+    """
+    Fetch posts ranked by how well their topics match the user's interests and by recency.
+    """
+    try:
+        posts, next_state = await run_dynamodb(read_user_feed, username, limit, decode_cursor(cursor))
+        await _mark_viewer_likes(posts, username)
+        return {"posts": posts, "nextCursor": encode_cursor(next_state)}
+    except ClientError as e:
+        logger.error(f"Failed to fetch feed of {username}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch feed.")
+
+async def _load_post(post_id: str) -> Optional[dict]:
+    response = await posts_table.get_item(Key={'postId': post_id})
+    return response.get('Item')
+
 # READ: Get a post by postId
 @router.get("/{post_id}", response_model=Post)
-async def get_post(post_id: str):
+async def get_post(
+    post_id: str,
+    viewer: Optional[str] = Query(None, description="Username whose likes are reported in isLiked")
+):
     try:
-        response = posts_table.get_item(Key={'postId': post_id})
-        if 'Item' not in response:
+        item = await post_cache.get(post_id, lambda: _load_post(post_id))
+        if item is None:
             raise HTTPException(status_code=404, detail="Post not found.")
-        
-        post = response['Item']
-        # Ensure likedBy exists
-        if 'likedBy' not in post:
-            post['likedBy'] = []
-            
+
+        # Copy so the viewer-specific fields never end up in the cached item
+        post = dict(item)
+        await _mark_viewer_likes([post], viewer)
         return post
     except ClientError as e:
         logger.error(f"Failed to query DynamoDB: {e}")
@@ -124,98 +191,153 @@ async def get_post(post_id: str):
 
 # READ: Get trending topics and keywords
 @router.get("/trends/trending-topics", response_model=dict)
-def trending_topics():
+async def trending_topics(
+    window: str = Query("7d", regex="^(1h|24h|7d)$", description="Time window: 1h, 24h or 7d"),
+    k: int = Query(10, ge=1, le=100, description="Number of topics to return")
+):
     try:
-        response = posts_table.scan()
-        posts = response.get("Items", [])
-        topics = get_trending_topics(posts)
+        topics = await get_trending_topics(window, k)
         return {"trending_topics": [[topic, count] for topic, count in topics]}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch trending topics: {e}")
 
 @router.get("/trends/trending-keywords", response_model=dict)
-def trending_keywords():
+async def trending_keywords(
+    window: str = Query("7d", regex="^(1h|24h|7d)$", description="Time window: 1h, 24h or 7d"),
+    k: int = Query(50, ge=1, le=500, description="Number of keywords to return")
+):
     try:
-        response = posts_table.scan()
-        posts = response.get("Items", [])
-        
-        formatted_posts = []
-        for post in posts:
-            if 'content' in post:
-                formatted_posts.append({
-                    'content': str(post['content']),
-                    'topics': post.get('topics', [])
-                })
-        
-        keywords = get_trending_keywords(formatted_posts)
+        keywords = await run_dynamodb(keyword_trends.top, window, k)
         return {"trending_keywords": [[word, count] for word, count in keywords]}
     except Exception as e:
-        print(f"Error details: {str(e)}")
+        logger.error(f"Failed to fetch trending keywords: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch trending keywords: {e}")
 
 # READ: Get all posts by an author
 @router.get("/filter/author/{author}", response_model=list[Post])
-async def get_posts_by_author(author: str):
+async def get_posts_by_author(
+    author: str,
+    viewer: Optional[str] = Query(None, description="Username whose likes are reported in isLiked")
+):
+    """
+    Fetch every post by an author, newest first, by paging through the author index.
+    """
     try:
-        response = posts_table.scan()
-        items = response.get('Items', [])
-        if not items:
-            raise HTTPException(status_code=404, detail="No posts found.")
+        items = []
+        cursor = None
+        while True:
+            page, cursor = await run_dynamodb(query_posts_by_author, author, 100, cursor)
+            items.extend(page)
+            if cursor is None:
+                break
 
-        filtered_items = [item for item in items if item.get('author') == author]
-        
-        # Ensure likedBy exists for each post
-        for item in filtered_items:
-            if 'likedBy' not in item:
-                item['likedBy'] = []
+        await _mark_viewer_likes(items, viewer)
 
-        if not filtered_items:
+        if not items:
             raise HTTPException(status_code=404, detail="No posts found for the given author.")
 
-        return filtered_items
+        return items
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching posts by author: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch posts.")
 
+@router.get("/filter/author/{author}/page", response_model=PostPage)
+async def get_posts_by_author_page(
+    author: str,
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of posts to return"),
+    cursor: str = Query(None, description="Cursor returned by the previous page"),
+    viewer: Optional[str] = Query(None, description="Username whose likes are reported in isLiked")
+):
+    """
+    Fetch one page of an author's posts, newest first.
+    """
+    try:
+        posts, next_key = await run_dynamodb(query_posts_by_author, author, limit, decode_cursor(cursor))
+        await _mark_viewer_likes(posts, viewer)
+        return {"posts": posts, "nextCursor": encode_cursor(next_key)}
+    except ClientError as e:
+        logger.error(f"Error fetching posts by author: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch posts.")
+
+def _parse_topics(topics: List[str]) -> List[str]:
+    """
+    Accept both ?topics=a,b and repeated ?topics= parameters; '+' stands for a space.
+    """
+    parsed = []
+    for value in topics:
+        for topic in value.split(','):
+            topic = topic.replace('+', ' ').strip()
+            if topic:
+                parsed.append(topic)
+    return parsed
+
 @router.get("/filter/topics", response_model=List[Post])
-async def get_posts_by_topics(topics: List[str] = Query(..., description="List of topics to filter by")):
+async def get_posts_by_topics(
+    topics: List[str] = Query(..., description="List of topics to filter by"),
+    match: str = Query("any", regex="^(any|all)$", description="'any' for posts with at least one topic, 'all' for posts with every topic"),
+    viewer: Optional[str] = Query(None, description="Username whose likes are reported in isLiked")
+):
     try:
-        if not topics:
+        topic_list = _parse_topics(topics)
+        if not topic_list:
             raise HTTPException(status_code=400, detail="At least one topic must be specified.")
-        topic_list = [topic.strip() for topic in topics[0].split(',')]
-        topic_set = {topic.replace('+', ' ').strip() for topic in topic_list}
-        response = posts_table.scan()
-        items = response.get('Items', [])
-        if not items:
-            raise HTTPException(status_code=404, detail="No posts found.")
-        topic_list = [topic.replace('+', ' ') for topic in topic_list]
 
-        filtered_items = [
-            item for item in items 
-            if "topics" in item and (
-                len(set(item["topics"]) & topic_set) > 0
+        filtered_items = []
+        cursor = None
+        while True:
+            page, cursor = await run_dynamodb(
+                query_posts_by_topics, topic_list, 100, cursor, match == "all"
             )
-        ]
+            filtered_items.extend(page)
+            if cursor is None:
+                break
 
-        # Ensure likedBy exists for each post
-        for item in filtered_items:
-            if 'likedBy' not in item:
-                item['likedBy'] = []
+        await _mark_viewer_likes(filtered_items, viewer)
 
         if not filtered_items:
             raise HTTPException(status_code=404, detail="No posts found for the given topics.")
 
         return filtered_items
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching posts: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to fetch posts.")
 
+@router.get("/filter/topics/page", response_model=PostPage)
+async def get_posts_by_topics_page(
+    topics: List[str] = Query(..., description="List of topics to filter by"),
+    match: str = Query("any", regex="^(any|all)$", description="'any' for posts with at least one topic, 'all' for posts with every topic"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of posts to return"),
+    cursor: str = Query(None, description="Cursor returned by the previous page"),
+    viewer: Optional[str] = Query(None, description="Username whose likes are reported in isLiked")
+):
+    """
+    Fetch one page of posts for the given topics, newest first.
+    """
+    topic_list = _parse_topics(topics)
+    if not topic_list:
+        raise HTTPException(status_code=400, detail="At least one topic must be specified.")
+    try:
+        posts, next_state = await run_dynamodb(
+            query_posts_by_topics, topic_list, limit, decode_cursor(cursor), match == "all"
+        )
+        await _mark_viewer_likes(posts, viewer)
+        return {"posts": posts, "nextCursor": encode_cursor(next_state)}
+    except ClientError as e:
+        logger.error(f"Error fetching posts by topics: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch posts.")
+
 # UPDATE
 @router.put("/{post_id}", response_model=dict)
-async def update_post(post_id: str, update_data: UpdatePostModel):
+async def update_post(post_id: str, update_data: UpdatePostModel, background_tasks: BackgroundTasks):
     try:
         # First check if post exists
-        response = posts_table.get_item(Key={"postId": post_id})
+        response = await posts_table.get_item(Key={"postId": post_id})
         if "Item" not in response:
             raise HTTPException(status_code=404, detail="Post not found.")
 
@@ -248,7 +370,7 @@ async def update_post(post_id: str, update_data: UpdatePostModel):
 
         # Perform the update
         try:
-            response = posts_table.update_item(
+            response = await posts_table.update_item(
                 Key={"postId": post_id},
                 UpdateExpression="SET " + ", ".join(update_expression_parts),
                 ExpressionAttributeValues=expression_attribute_values,
@@ -257,6 +379,19 @@ async def update_post(post_id: str, update_data: UpdatePostModel):
             )
             
             updated_post = response.get("Attributes", {})
+            await post_cache.invalidate(post_id)
+
+            if update_data.topics is not None:
+                old_topics = set(post.get("topics", []))
+                new_topics = set(updated_post.get("topics", []))
+                await run_dynamodb_write(reindex_post_topics, updated_post, old_topics)
+                await run_dynamodb_write(
+                    record_topic_changes, post.get("timestamp"), new_topics - old_topics, old_topics - new_topics
+                )
+
+            if update_data.content is not None:
+                background_tasks.add_task(record_post_keywords, post.get("timestamp"), post.get("content", ""), -1)
+                background_tasks.add_task(record_post_keywords, post.get("timestamp"), update_data.content)
             
             # Ensure required fields exist
             if 'likedBy' not in updated_post:
@@ -287,9 +422,13 @@ async def update_post(post_id: str, update_data: UpdatePostModel):
 
 # DELETE: Delete a post by postId
 @router.delete("/{post_id}", response_model=dict)
-async def delete_post(post_id: str, user: dict = Depends(login_manager)):
+async def delete_post(post_id: str, background_tasks: BackgroundTasks, user: dict = Depends(login_manager)):
+    """
+    Delete the post item and respond; its images, comments, likes and topic
+    index rows are removed afterwards by a background cleanup job.
+    """
     try:
-        response = posts_table.get_item(Key={"postId": post_id})
+        response = await posts_table.get_item(Key={"postId": post_id})
         if 'Item' not in response:
             raise HTTPException(status_code=404, detail="Post not found.")
 
@@ -299,84 +438,62 @@ async def delete_post(post_id: str, user: dict = Depends(login_manager)):
         if post["author"] != user["username"] and user.get("role") != "admin":
             raise HTTPException(status_code=403, detail="Access forbidden: You are not the author of this post.")
 
-        if "images" in post:
-            for image_url in post["images"]:
-                delete_image(image_url, "post-pictures")
-
-        # Delete the post
-        posts_table.delete_item(Key={"postId": post_id})
+        # Delete the post and record its cleanup job together, so neither can happen without the other
+        if not await run_dynamodb_write(delete_post_with_cleanup, post):
+            raise HTTPException(status_code=404, detail="Post not found.")
+        await post_cache.invalidate(post_id)
+        await run_dynamodb_write(record_topic_changes, post.get("timestamp"), (), post.get("topics", []))
+        background_tasks.add_task(record_post_keywords, post.get("timestamp"), post.get("content", ""), -1)
+        background_tasks.add_task(run_post_cleanup, post_id)
         logger.info(f"Post {post_id} deleted successfully by user {user['username']}.")
-        return {"message": f"Post {post_id} deleted successfully."}
+        return {"message": f"Post {post_id} deleted successfully.", "cleanupStatus": f"/posts/{post_id}/cleanup"}
     except ClientError as e:
         logger.error(f"Failed to delete post {post_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to delete post.")
 
+# READ: Progress of the cleanup that follows a post deletion
+@router.get("/{post_id}/cleanup", response_model=dict)
+async def get_post_cleanup(post_id: str):
+    try:
+        job = await run_dynamodb(get_cleanup_status, post_id)
+    except ClientError as e:
+        logger.error(f"Failed to read cleanup status of post {post_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to read cleanup status.")
+    if job is None:
+        raise HTTPException(status_code=404, detail="No cleanup job for this post.")
+    return {
+        "postId": job["postId"],
+        "status": job["status"],
+        "attempts": int(job.get("attempts", 0)),
+        "requestedAt": job.get("requestedAt"),
+        "updatedAt": job.get("updatedAt"),
+        "error": job.get("error"),
+    }
+
 
 
 @router.post("/{post_id}/like")
 async def like_post(post_id: str, like_request: LikeRequest):
     try:
-        # Log incoming request
         logger.info(f"Like request received for post {post_id} from user {like_request.username}")
-        
-        # Get the post
-        try:
-            response = posts_table.get_item(Key={'postId': post_id})
-            logger.info(f"DynamoDB response: {response}")
-        except ClientError as e:
-            logger.error(f"DynamoDB get_item error: {str(e)}")
-            raise HTTPException(status_code=500, detail="Failed to fetch post from database")
-            
-        if 'Item' not in response:
-            raise HTTPException(status_code=404, detail="Post not found")
-            
-        post = response['Item']
-        username = like_request.username
-        liked_by = post.get('likedBy', [])
-        current_likes = post.get('likes', 0)
-        
-        logger.info(f"Current state - likes: {current_likes}, likedBy: {liked_by}")
-        
-        # Toggle like status
-        if username in liked_by:
-            # Unlike the post
-            liked_by.remove(username)
-            current_likes = max(0, current_likes - 1)  # Ensure likes don't go below 0
-            logger.info(f"Removing like from user {username}")
-        else:
-            # Like the post
-            if username not in liked_by:  # Extra check to ensure no duplicate likes
-                liked_by.append(username)
-                current_likes += 1
-                logger.info(f"Adding like from user {username}")
-            
-        # Update the post
-        try:
-            update_response = posts_table.update_item(
-                Key={'postId': post_id},
-                UpdateExpression='SET likes = :likes, likedBy = :likedBy',
-                ExpressionAttributeValues={
-                    ':likes': current_likes,
-                    ':likedBy': liked_by
-                },
-                ReturnValues="ALL_NEW"
-            )
-            logger.info(f"DynamoDB update response: {update_response}")
-        except ClientError as e:
-            logger.error(f"DynamoDB update_item error: {str(e)}")
-            raise HTTPException(status_code=500, detail="Failed to update like status in database")
-        
+
+        # Toggle like status with one conditional update
+        likes, is_liked = await run_dynamodb_write(toggle_like, post_id, like_request.username)
+        await post_cache.invalidate(post_id)
+
         result = {
             "success": True,
-            "likes": current_likes,
-            "isLiked": username in liked_by
+            "likes": likes,
+            "isLiked": is_liked
         }
         logger.info(f"Returning result: {result}")
         return result
         
     except HTTPException as he:
         raise he
+    except ClientError as e:
+        logger.error(f"DynamoDB update_item error: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to update like status in database")
     except Exception as e:
         logger.error(f"Error in like_post: {str(e)}", exc_info=True)  # Added exc_info for full traceback
         raise HTTPException(status_code=500, detail=f"Failed to process like: {str(e)}")
-
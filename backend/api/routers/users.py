@@ -1,17 +1,28 @@
 # backend/api/routes/users.py
-from typing import List, Optional
-from fastapi import APIRouter, File, Form, HTTPException, Request, Depends, UploadFile
-from api.aws_wrappers.images import delete_image, upload_image
-from api.db_setup import dynamodb
-from api.config import login_manager
-from api.models.user import UserCreate, UserResponse, LoginRequest, UserUpdateRequest, ProfilePicResponse
-from fastapi.responses import RedirectResponse
-from passlib.context import CryptContext
+from typing import Dict, List, Optional
+from fastapi import APIRouter, BackgroundTasks, File, Form, HTTPException, Query, Request, Depends, UploadFile
+from api.aws_wrappers.images import delete_image, upload_image, rendition_url
+from api.aws_wrappers.dynamo import AsyncTable, run_dynamodb, run_dynamodb_write
+from api.aws_wrappers.batch import batch_get_items
+from api.cache import TTLCache, caches
+from api.aws_wrappers.feeds import set_user_interests, remove_user_feed
+from api.nlp.user_search import user_search_index, SUMMARY_FIELDS
+from api.nlp.recommendations import recommend_users, invalidate_recommendations
+from api.config import (
+    login_manager, invalidate_user, create_tokens, decode_token, revoke_session, claim_session, token_claims, require_admin
+)
+from api.passwords import hash_password, verify_password
+from api.models.user import (
+    UserCreate, UserResponse, UserPage, UserBatch, UserBatchRequest, PublicProfile, LoginRequest, RefreshRequest,
+    UserUpdateRequest, ProfilePicResponse
+)
+from api.aws_wrappers.pagination import encode_cursor, decode_cursor
+from fastapi.responses import RedirectResponse, StreamingResponse
 from boto3.dynamodb.conditions import Attr
 from fastapi.concurrency import run_in_threadpool
-from datetime import timedelta
 from botocore.exceptions import ClientError
 import logging
+import os
 from decimal import Decimal
 
 router = APIRouter(
@@ -19,39 +30,41 @@ router = APIRouter(
     tags=["users"]
 )
 
-# Initialize password context for hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # Reference to the users table
-users_table = dynamodb.Table('users')
-admins_table = dynamodb.Table('admins')
+users_table = AsyncTable('users')
+admins_table = AsyncTable('admins')
+
+# Attributes admin listings read; anything else, the password hash included, is never fetched
+ADMIN_USER_PROJECTION = {
+    "ProjectionExpression": ", ".join(f"#{field}" for field in UserResponse.__fields__),
+    "ExpressionAttributeNames": {f"#{field}": field for field in UserResponse.__fields__},
+}
+
+# Attributes returned by POST /users/batch, e.g. for author names and avatars
+PUBLIC_PROFILE_PROJECTION = {
+    "projection": ", ".join(f"#{field}" for field in PublicProfile.__fields__),
+    "attribute_names": {f"#{field}": field for field in PublicProfile.__fields__},
+}
+
+# Public profiles served by POST /users/batch; the update and delete routes drop changed users
+profile_cache = TTLCache(maxsize=10000, ttl=float(os.getenv("PROFILE_CACHE_TTL", 60)))
+caches["profiles"] = profile_cache
+
+# Users scanned per page when streaming the admin export
+EXPORT_PAGE_SIZE = 500
+
+# Items read per Scan call when listing veterans; the filter runs after this many are read
+SCAN_PAGE_SIZE = 500
 
 # Used for logging
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-# After importing login_manager
-
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
-
 # 1. FIXED PATH ROUTES (most specific, no path parameters)
 @router.post("/register", response_model=UserResponse)
-async def register_user(user: UserCreate):
-    # Check if the username already exists
+async def register_user(user: UserCreate, background_tasks: BackgroundTasks):
     logger.info(f"Attempt to register user: {user.username}")
-    try:
-        response = users_table.get_item(Key={'username': user.username})
-    except ClientError as e:
-        logger.error(f"Failed to query DynamoDB: {e}")
-        err_code = e.response['Error']['Code']
-        if err_code == 'ResourceNotFoundException':
-            raise HTTPException(status_code=500, detail="User table does not exist")
-        raise HTTPException(status_code=500, detail="Internal server error.")
-    else:
-        if 'Item' in response:
-            raise HTTPException(status_code=400, detail="Username already exists.")
-    hashed_password = get_password_hash(user.password)
+    hashed_password = await hash_password(user.password)
 
     # Prepare the user item
     user_item = {
@@ -77,19 +90,22 @@ async def register_user(user: UserCreate):
         user_item['weight'] = Decimal(user.weight) if user.weight is not None else None  # Weight in pounds
 
     try:
-        # Save the user in DynamoDB
-        users_table.put_item(Item=user_item)
+        # Save the user in DynamoDB; the condition makes the existence check and the write one atomic call
+        await users_table.put_item(Item=user_item, ConditionExpression="attribute_not_exists(username)")
     except ClientError as e:
-        logger.error(f"Failed to save user to DynamoDB: {e}")
         error_code = e.response['Error']['Code']
         if error_code == 'ConditionalCheckFailedException':
-            raise HTTPException(status_code=400, detail="Failed to register user due to a condition check failure.")
+            raise HTTPException(status_code=400, detail="Username already exists.")
+        logger.error(f"Failed to save user to DynamoDB: {e}")
+        if error_code == 'ResourceNotFoundException':
+            raise HTTPException(status_code=500, detail="User table does not exist")
         raise HTTPException(status_code=500, detail="Failed to save user data.")
 
-    return user_item
+    # Subscribe the user's feed to their interests
+    background_tasks.add_task(set_user_interests, user.username, None, user.interests)
+    user_search_index.upsert(user_item)
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return user_item
 
 @router.post("/login")
 async def login_user(request: Request, login_data: LoginRequest):
@@ -98,7 +114,7 @@ async def login_user(request: Request, login_data: LoginRequest):
     logger.info(f"Attempt to login user: {username}")
     
     try:
-        response = users_table.get_item(Key={'username': username})
+        response = await users_table.get_item(Key={'username': username})
     except ClientError as e:
         logger.error(f"Failed to query DynamoDB: {e}")
         raise HTTPException(status_code=500, detail="Internal server error.")
@@ -110,84 +126,225 @@ async def login_user(request: Request, login_data: LoginRequest):
     user_data = response['Item']
     stored_password = user_data.get('password')
 
-    if not verify_password(password, stored_password):
+    verified, new_hash = await verify_password(password, stored_password)
+    if not verified:
         logger.warning(f"Invalid password for user: {username}")
         raise HTTPException(status_code=400, detail="Invalid password.")
 
-    # Generate a token for the user
-    token = login_manager.create_access_token(
-        data={"sub": username},
-        expires=timedelta(minutes=10)
-    )
+    if new_hash:
+        # Stored under an older hashing policy; only replace it if the password was not changed meanwhile
+        try:
+            await users_table.update_item(
+                Key={'username': username},
+                UpdateExpression="SET password = :new",
+                ConditionExpression="password = :old",
+                ExpressionAttributeValues={":new": new_hash, ":old": stored_password},
+            )
+            invalidate_user(username)
+        except ClientError as e:
+            logger.warning(f"Failed to rehash password for user {username}: {e}")
+
+    # Return the tokens as JSON instead of RedirectResponse; the role is signed into them
+    return create_tokens(username, await _user_role(user_data))
 
-    role = "veteran"
+async def _user_role(user_data: dict) -> str:
+    """
+    Look the user up in the admins table. Done once per login or refresh; requests read the role from the token.
+    """
     try:
-        admin = admins_table.get_item(Key={'email': user_data.get('email')})
-        role = "admin" if 'Item' in admin else "veteran"
+        admin = await admins_table.get_item(Key={'email': user_data.get('email')})
+        return "admin" if 'Item' in admin else "veteran"
     except ClientError as e:
-        logger.error(f"This is not an admin")
+        logger.error(f"Failed to look up admin role for {user_data.get('username')}: {e}")
+        return "veteran"
 
-    # Return the token as JSON instead of RedirectResponse
-    return {"access_token": token, "token_type": "bearer", "role": role}
+@router.post("/refresh")
+async def refresh_tokens(refresh: RefreshRequest):
+    """
+    Exchange a refresh token for a new access and refresh token pair.
+    The old session is revoked, so each refresh token works once.
+    """
+    claims = await decode_token(refresh.refresh_token, token_type="refresh")
+    response = await users_table.get_item(Key={'username': claims["sub"]}, ProjectionExpression="username, email")
+    if 'Item' not in response:
+        raise HTTPException(status_code=401, detail="User no longer exists.")
+    role = await _user_role(response['Item'])
+    # Checked again after the awaits above: another refresh with this token may have won meanwhile
+    if not await run_dynamodb_write(claim_session, claims):
+        raise HTTPException(status_code=401, detail="Refresh token already used.")
+    return create_tokens(claims["sub"], role)
+
+@router.post("/batch", response_model=UserBatch)
+async def get_users_batch(request: UserBatchRequest, claims: dict = Depends(token_claims)):
+    """
+    Public profiles (name, profile picture, veteran status) of up to 100 users in one call,
+    for screens that show many authors at once. Users not cached are read with BatchGetItem.
+    """
+    usernames = list(dict.fromkeys(request.usernames))
+    profiles = {}
+    for username in usernames:
+        profile = profile_cache.get(username)
+        if profile is not None:
+            profiles[username] = profile
+
+    uncached = [username for username in usernames if username not in profiles]
+    if uncached:
+        try:
+            items = await run_dynamodb(
+                batch_get_items, "users", [{"username": username} for username in uncached], **PUBLIC_PROFILE_PROJECTION
+            )
+        except (ClientError, RuntimeError) as e:
+            logger.error(f"Failed to batch load users: {e}")
+            raise HTTPException(status_code=500, detail="Failed to load users.")
+        for item in items:
+            profile = {field: item.get(field) for field in PublicProfile.__fields__}
+            profile["profilePic"] = rendition_url(profile["profilePic"], "avatar")
+            profile_cache.set(item["username"], profile)
+            profiles[item["username"]] = profile
+
+    return {"users": profiles, "missing": [username for username in usernames if username not in profiles]}
 
 @router.get("/logout")
-def logout(user: dict = Depends(login_manager)):
+def logout(claims: dict = Depends(token_claims)):
+    # Ends the session: its access token and refresh token stop working on every worker
+    revoke_session(claims)
     return RedirectResponse(url="/", status_code=303)
 
+async def _scan_veterans(limit: Optional[int] = None, start_key: Optional[dict] = None):
+    """
+    Scan veteran users with only the UserResponse attributes projected, so password
+    hashes are never read. Stops once `limit` users are found (all users when None).
+    Returns the users and the key to resume from, or None when exhausted.
+
+    Scan's Limit caps items read before the filter, so pages are read at a fixed
+    size and the result trimmed; a trimmed page resumes after its last returned user.
+    """
+    scan_kwargs = {
+        **ADMIN_USER_PROJECTION,
+        "FilterExpression": Attr("isVeteran").eq(True),
+        "Limit": SCAN_PAGE_SIZE,
+    }
+    users = []
+    while True:
+        if start_key:
+            scan_kwargs["ExclusiveStartKey"] = start_key
+        response = await users_table.scan(**scan_kwargs)
+        users.extend(response.get("Items", []))
+        start_key = response.get("LastEvaluatedKey")
+        if limit is not None and len(users) >= limit:
+            if len(users) > limit:
+                users = users[:limit]
+                start_key = {"username": users[-1]["username"]}
+            return users, start_key
+        if not start_key:
+            return users, None
+
+async def _save_user_fields(username: str, update_fields: dict, profilePic: Optional[UploadFile],
+                            background_tasks: BackgroundTasks) -> Optional[dict]:
+    """
+    Save the fields that are not None (and a new profile picture) with a single
+    update_item conditioned on the user existing, and return the updated user.
+    Returns None when there is nothing to save; raises 404 for unknown users.
+
+    ALL_OLD rather than ALL_NEW is returned because the feed needs the previous
+    interests; the new item is the old one with the SET fields applied.
+    """
+    values = {field: value for field, value in update_fields.items() if value is not None}
+    if "password" in values:
+        values["password"] = await hash_password(values["password"])
+    if profilePic is not None:
+        values["profilePic"] = await upload_image("profile-pictures", profilePic)
+    if not values:
+        return None
+
+    try:
+        response = await users_table.update_item(
+            Key={"username": username},
+            UpdateExpression="SET " + ", ".join(f"#{field} = :{field}" for field in values),
+            ConditionExpression="attribute_exists(username)",
+            ExpressionAttributeNames={f"#{field}": field for field in values},
+            ExpressionAttributeValues={f":{field}": value for field, value in values.items()},
+            ReturnValues="ALL_OLD",
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            raise
+        if "profilePic" in values:
+            try:
+                await delete_image("profile-pictures", values["profilePic"])
+            except Exception as cleanup_error:
+                logger.warning(f"Failed to delete orphaned profile picture {values['profilePic']}: {cleanup_error}")
+        raise HTTPException(status_code=404, detail="User not found.")
+
+    previous = response["Attributes"]
+    updated_user = {**previous, **values}
+    invalidate_user(username)
+    profile_cache.delete(username)
+    if "interests" in values:
+        background_tasks.add_task(set_user_interests, username, previous.get("interests"), values["interests"])
+        invalidate_recommendations(username)
+    user_search_index.upsert(updated_user)
+    return updated_user
+
 @router.get("/admin/all", response_model=List[UserResponse])
-async def get_all_users(user: dict = Depends(login_manager)):
+async def get_all_users(user: dict = Depends(require_admin)):
     """
     Retrieve all users in the system.
     Only admin users can access this endpoint.
-    Returns only veteran users.
+    Returns only veteran users. Prefer /admin/page or /admin/export for large user bases.
     """
     try:
-        # Comment out admin check for development
-        # admin_response = admins_table.get_item(Key={'email': user.get('email', '')})
-        # if 'Item' not in admin_response:
-        #     raise HTTPException(status_code=403, detail="Access forbidden. Admin privileges required.")
-        
-        # Scan the users table to get all users
-        response = users_table.scan()
-        users = response.get('Items', [])
-        
-        # Handle pagination if there are more results
-        while 'LastEvaluatedKey' in response:
-            response = users_table.scan(ExclusiveStartKey=response['LastEvaluatedKey'])
-            users.extend(response.get('Items', []))
-        
-        # Format user data to match response model, filtering for veterans only
-        formatted_users = []
-        for user_data in users:
-            # Only include users where isVeteran is True
-            if user_data.get("isVeteran", False):
-                formatted_user = {
-                    "username": user_data.get("username"),
-                    "firstName": user_data.get("firstName"),
-                    "lastName": user_data.get("lastName"),
-                    "email": user_data.get("email"),
-                    "phoneNumber": user_data.get("phoneNumber"),
-                    "interests": user_data.get("interests", []),
-                    "isVeteran": user_data.get("isVeteran", False),
-                    "profilePic": user_data.get("profilePic"),
-                    "employmentStatus": user_data.get("employmentStatus"),
-                    "workLocation": user_data.get("workLocation"),
-                    "liveLocation": user_data.get("liveLocation"),
-                    "height": user_data.get("height"),
-                    "weight": user_data.get("weight")
-                }
-                formatted_users.append(formatted_user)
-            
-        logger.info(f"Retrieved {len(formatted_users)} veteran users from database")
-        return formatted_users
+        users, _ = await _scan_veterans()
+        logger.info(f"Retrieved {len(users)} veteran users from database")
+        return users
     except ClientError as e:
         logger.error(f"Failed to retrieve users from DynamoDB: {e}")
         raise HTTPException(status_code=500, detail="Failed to retrieve users.")
 
+@router.get("/admin/page", response_model=UserPage)
+async def get_users_page(
+    limit: int = Query(50, ge=1, le=500, description="Maximum number of users to return"),
+    cursor: str = Query(None, description="Cursor returned by the previous page"),
+    user: dict = Depends(require_admin),
+):
+    """
+    Retrieve one page of veteran users.
+    Only admin users can access this endpoint.
+    """
+    try:
+        users, next_key = await _scan_veterans(limit, decode_cursor(cursor))
+        return {"users": users, "nextCursor": encode_cursor(next_key)}
+    except ClientError as e:
+        logger.error(f"Failed to retrieve users from DynamoDB: {e}")
+        raise HTTPException(status_code=500, detail="Failed to retrieve users.")
+
+@router.get("/admin/export")
+async def export_users(user: dict = Depends(require_admin)):
+    """
+    Stream every veteran user as newline-delimited JSON, one scan page at a time,
+    so memory stays flat however many users there are.
+    Only admin users can access this endpoint.
+    """
+    async def lines():
+        start_key = None
+        while True:
+            users, start_key = await _scan_veterans(EXPORT_PAGE_SIZE, start_key)
+            for user_data in users:
+                yield UserResponse(**user_data).json() + "\n"
+            if not start_key:
+                return
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": 'attachment; filename="users.ndjson"'},
+    )
+
 # 2. ADMIN ROUTES WITH PARAMETERS
 @router.put("/admin/{username}/update", response_model=UserResponse)
 async def admin_update_user(
     username: str,
+    background_tasks: BackgroundTasks,
     firstName: Optional[str] = Form(None),
     lastName: Optional[str] = Form(None),
     password: Optional[str] = Form(None),
@@ -201,27 +358,14 @@ async def admin_update_user(
     height: Optional[int] = Form(None),
     weight: Optional[int] = Form(None),
     profilePic: Optional[UploadFile] = File(None),
-    user: dict = Depends(login_manager),
+    user: dict = Depends(require_admin),
 ):
     """
     Update user information as an admin.
     Only admin users can access this endpoint.
     """
     try:
-        # Comment out admin check for development
-        # admin_response = admins_table.get_item(Key={'email': user.get('email', '')})
-        # if 'Item' not in admin_response:
-        #     raise HTTPException(status_code=403, detail="Access forbidden. Admin privileges required.")
-            
-        # Check if the user to update exists
-        response = users_table.get_item(Key={"username": username})
-        if 'Item' not in response:
-            raise HTTPException(status_code=404, detail="User not found.")
-
-        update_expression = "SET "
-        expression_attribute_values = {}
-
-        # Build update fields dynamically
+        # Fields left as None are not changed
         update_fields = {
             "firstName": firstName,
             "lastName": lastName,
@@ -236,32 +380,10 @@ async def admin_update_user(
             "height": height,
             "weight": weight,
         }
-
-        for field, value in update_fields.items():
-            if value is not None:
-                update_expression += f"{field} = :{field}, "
-                expression_attribute_values[f":{field}"] = value
-
-        if profilePic is not None:
-            url = await upload_image("profile-pictures", profilePic)
-            update_expression += "profilePic = :profilePic, "
-            expression_attribute_values[":profilePic"] = url
-
-        update_expression = update_expression.rstrip(", ")
-
-        if not expression_attribute_values:
+        updated_user = await _save_user_fields(username, update_fields, profilePic, background_tasks)
+        if updated_user is None:
             return {"message": "No fields to update."}
 
-        users_table.update_item(
-            Key={"username": username},
-            UpdateExpression=update_expression,
-            ExpressionAttributeValues=expression_attribute_values,
-        )
-
-        # Fetch the updated user data
-        updated_response = users_table.get_item(Key={"username": username})
-        updated_user = updated_response['Item']
-
         # Return the updated user data as a UserResponse object
         return UserResponse(
             username=updated_user.get("username"),
@@ -286,29 +408,29 @@ async def admin_update_user(
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.delete("/admin/{username}")
-async def admin_delete_user(username: str, user: dict = Depends(login_manager)):
+async def admin_delete_user(username: str, background_tasks: BackgroundTasks, user: dict = Depends(require_admin)):
     """
     Delete a user as an admin.
     Only admin users can access this endpoint.
     """
     try:
-        # Comment out admin check for development
-        # admin_response = admins_table.get_item(Key={'email': user.get('email', '')})
-        # if 'Item' not in admin_response:
-        #     raise HTTPException(status_code=403, detail="Access forbidden. Admin privileges required.")
-        
         # Check if the user to delete exists
-        response = users_table.get_item(Key={"username": username})
+        response = await users_table.get_item(Key={"username": username})
         if 'Item' not in response:
             raise HTTPException(status_code=404, detail="User not found.")
         
         # Delete profile pic if it exists
         user_item = response['Item']
-        if "profilePic" in user_item:
-            delete_image(user_item["profilePic"], "profile-pictures")
+        if user_item.get("profilePic"):
+            background_tasks.add_task(delete_image, "profile-pictures", user_item["profilePic"])
         
         # Delete the user
-        users_table.delete_item(Key={"username": username})
+        await users_table.delete_item(Key={"username": username})
+        invalidate_user(username)
+        profile_cache.delete(username)
+        background_tasks.add_task(remove_user_feed, username, user_item.get("interests"))
+        user_search_index.remove(username)
+        invalidate_recommendations(username)
         return {"message": f"User {username} deleted successfully."}
     except ClientError as e:
         logger.error(f"Failed to delete user from DynamoDB: {e}")
@@ -323,7 +445,7 @@ async def get_user_picture(username: str):
     """
     try:
         logger.info(f"Fetching user data for: {username}")
-        response = users_table.get_item(Key={"username": username})
+        response = await users_table.get_item(Key={"username": username})
         if "Item" not in response:
             raise HTTPException(status_code=404, detail="User not found.")
         
@@ -332,7 +454,7 @@ async def get_user_picture(username: str):
         if not profile_pic:  # If profilePic is missing, null, or empty
             return {"profilePic": None}
         
-        return {"profilePic": profile_pic}  # Return the profilePic field
+        return {"profilePic": rendition_url(profile_pic, "avatar")}  # Small rendition, this is shown as an avatar
     except ClientError as e:
         logger.error(f"Failed to retrieve user from DynamoDB: {e}")
         raise HTTPException(status_code=500, detail="Internal server error.")
@@ -343,7 +465,7 @@ async def get_other_user(username: str, user: dict = Depends(login_manager)):
     Retrieve user information for the specified username.
     """
     # Fetch user from DynamoDB
-    table_result = users_table.get_item(Key={"username": username})
+    table_result = await users_table.get_item(Key={"username": username})
     
     user_data = table_result.get("Item")
 
@@ -372,48 +494,62 @@ async def get_other_user(username: str, user: dict = Depends(login_manager)):
     }
     return public_user_info
 
+def _load_search_users():
+    """
+    Yield every user with only the attributes the search index keeps.
+    """
+    scan_kwargs = {
+        "ProjectionExpression": ", ".join(f"#{field}" for field in SUMMARY_FIELDS),
+        "ExpressionAttributeNames": {f"#{field}": field for field in SUMMARY_FIELDS},
+    }
+    while True:
+        response = users_table.table.scan(**scan_kwargs)
+        yield from response.get("Items", [])
+        if "LastEvaluatedKey" not in response:
+            return
+        scan_kwargs["ExclusiveStartKey"] = response["LastEvaluatedKey"]
+
+@router.on_event("startup")
+def warm_search_index():
+    # Build the index while the worker starts, so the first search does not pay for the users scan
+    user_search_index.warm_up(_load_search_users)
+
+def _recommend_users(username: str, interests: List[str], limit: int) -> List[dict]:
+    # Runs in the threadpool, like _search_users: scoring holds the index lock
+    user_search_index.ensure_fresh(_load_search_users)
+    matched_users = recommend_users(username, interests, limit)
+
+    # Always suggest at least 5 people, padding with users who share no interests
+    if len(matched_users) < 5:
+        exclude = {username, *(user["username"] for user in matched_users)}
+        matched_users += user_search_index.sample_users(5 - len(matched_users), exclude)
+    return matched_users
+
+def _search_users(query: str, limit: int) -> List[dict]:
+    # Runs in the threadpool: the index lock may be held by a rebuild swapping in fresh data
+    user_search_index.ensure_fresh(_load_search_users)
+    return user_search_index.search(query, limit)
+
 @router.get("/{logged_in_user}/search")
-def search_users(logged_in_user: str, query: str = None):
+async def search_users(
+    logged_in_user: str,
+    query: str = None,
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of users to return")
+):
     try:
         if query:
-            # Perform a scan on DynamoDB to find users matching the query
-            query = query.split(" ")
-            filter_expression = None
-            for term in query:
-                term_filter = (Attr("username").contains(term.lower()) |
-                            Attr("firstName").contains(term.lower()) |
-                            Attr("lastName").contains(term.lower()))
-                filter_expression = term_filter if filter_expression is None else filter_expression | term_filter
-
-            if not filter_expression:
-                return []
-            response = users_table.scan(FilterExpression=filter_expression)
-            users = response.get("Items", [])
-
-            return users
+            # Prefix and typo-tolerant matches on names, ranked, from the in-process index
+            results = await run_in_threadpool(_search_users, query, limit)
+            for result in results:
+                result["profilePic"] = rendition_url(result.get("profilePic"), "avatar")
+            return results
         else:
-            logged_in_user_data = users_table.get_item(Key={"username": logged_in_user}).get("Item", {})
-            current_user_interests = set(logged_in_user_data.get("interests", []))
-
-            # Scan all users
-            response = users_table.scan()
-            all_users = response.get("Items", [])
-            interest_matches = sorted(
-                [
-                    user for user in all_users 
-                    if (common_interests := set(user.get("interests", [])) & current_user_interests and user.get("username") != logged_in_user)
-                ],
-                key=lambda user: len(set(user.get("interests", [])) & current_user_interests),
-                reverse=True  # Sort in descending order so users with more common interests appear first
-            )
-        
-            non_interest_matches = [user for user in all_users if user not in interest_matches and user.get("username") != logged_in_user]
+            logged_in_user_data = (await users_table.get_item(Key={"username": logged_in_user})).get("Item", {})
 
-            # If we have 5 or more interest matches, return all of them
-            if len(interest_matches) >= 5:
-                matched_users = interest_matches
-            else:
-                matched_users = interest_matches + non_interest_matches[:5 - len(interest_matches)]
+            # Most similar users first, shared rare interests weighing more than common ones
+            matched_users = await run_in_threadpool(
+                _recommend_users, logged_in_user, logged_in_user_data.get("interests", []), limit
+            )
 
             # Format response
             response_data = []
@@ -424,7 +560,7 @@ def search_users(logged_in_user: str, query: str = None):
                     "lastName": user.get("lastName"),
                     "isVeteran": user.get("isVeteran"),
                     "interests": user.get("interests"),
-                    "profilePic": user.get("profilePic")
+                    "profilePic": rendition_url(user.get("profilePic"), "avatar")
                 }
                 if not logged_in_user_data.get("isVeteran"):
                     user_info.update({
@@ -441,9 +577,9 @@ def search_users(logged_in_user: str, query: str = None):
         raise HTTPException(status_code=500, detail="Failed to search users.")
 
 @router.get("/{logged_in_user}/{username}")
-def search_users_by_username(username: str, logged_in_user:str):
+async def search_users_by_username(username: str, logged_in_user:str):
     # Scan the DynamoDB table to find users with partial match
-    response = users_table.get_item(Key={"username": username})
+    response = await users_table.get_item(Key={"username": username})
     return RedirectResponse(url=f"/profile/{username}")
 
 # 4. GENERAL USER ROUTES (basic CRUD operations with the same path)
@@ -454,7 +590,7 @@ async def get_user(username: str, user: dict = Depends(login_manager)):
     Only the authenticated user can access their data.
     """
     response = []
-    table_result = users_table.get_item(Key={"username": username})
+    table_result = await users_table.get_item(Key={"username": username})
     user_data = table_result.get("Item")
 
     if user["username"] == username:
@@ -473,6 +609,7 @@ async def get_user(username: str, user: dict = Depends(login_manager)):
 @router.put("/{username}", response_model=UserResponse)
 async def update_user(
     username: str,
+    background_tasks: BackgroundTasks,
     firstName: Optional[str] = Form(None),
     lastName: Optional[str] = Form(None),
     password: Optional[str] = Form(None),
@@ -492,14 +629,7 @@ async def update_user(
         raise HTTPException(status_code=403, detail="Access forbidden.")
 
     try:
-        response = users_table.get_item(Key={"username": username})
-        if 'Item' not in response:
-            raise HTTPException(status_code=404, detail="User not found.")
-
-        update_expression = "SET "
-        expression_attribute_values = {}
-
-        # Build update fields dynamically
+        # Fields left as None are not changed
         update_fields = {
             "firstName": firstName,
             "lastName": lastName,
@@ -514,28 +644,11 @@ async def update_user(
             "height": height,
             "weight": weight,
         }
-
-        for field, value in update_fields.items():
-            if value is not None:
-                update_expression += f"{field} = :{field}, "
-                expression_attribute_values[f":{field}"] = value
-
-        if profilePic is not None:
-            url = await upload_image("profile-pictures", profilePic)
-            update_expression += "profilePic = :profilePic, "
-            expression_attribute_values[":profilePic"] = url
-
-        update_expression = update_expression.rstrip(", ")
-
-        users_table.update_item(
-            Key={"username": username},
-            UpdateExpression=update_expression,
-            ExpressionAttributeValues=expression_attribute_values,
-        )
-
-        # Fetch the updated user data
-        updated_response = users_table.get_item(Key={"username": username})
-        updated_user = updated_response['Item']
+        updated_user = await _save_user_fields(username, update_fields, profilePic, background_tasks)
+        if updated_user is None:
+            updated_user = (await users_table.get_item(Key={"username": username})).get("Item")
+            if updated_user is None:
+                raise HTTPException(status_code=404, detail="User not found.")
 
         # Return the updated user data as a UserResponse object
         return UserResponse(
@@ -556,26 +669,34 @@ async def update_user(
         logger.error(f"Failed to update user in DynamoDB: {e}")
         raise HTTPException(status_code=500, detail="Failed to update user.")
     
-@router.get("/{username}/is-admin", response_model=bool)
-async def get_is_admin(username: str):
-    response = admins_table.get_item(Key={"email": username})
+@router.get("/{username}/is-admin", response_model=Dict[str, bool])
+async def get_is_admin(username: str, claims: dict = Depends(token_claims)):
+    # The caller's own role is signed into their token; only other users need a lookup
+    if claims.get("sub") == username and "role" in claims:
+        return {"isAdmin": claims["role"] == "admin"}
+    response = await admins_table.get_item(Key={"email": username})
     return {"isAdmin": "Item" in response}
 
 @router.delete("/{username}", response_model=UserResponse)
-async def delete_user(username: str, user: dict = Depends(login_manager)):
+async def delete_user(username: str, background_tasks: BackgroundTasks, user: dict = Depends(login_manager)):
     if user["username"] != username:
         raise HTTPException(status_code=403, detail="Access forbidden.")
     try:
-        response = users_table.get_item(Key={"username": username})
+        response = await users_table.get_item(Key={"username": username})
         if 'Item' not in response:
             raise HTTPException(status_code=404, detail="User not found.")
         
         # delete profile pic
         user_item = response['Item']
-        if "profilePic" in user_item:
-            delete_image(user_item["profilePic"], "profile-pictures")
-
-        users_table.delete_item(Key={"username": username})
+        if user_item.get("profilePic"):
+            background_tasks.add_task(delete_image, "profile-pictures", user_item["profilePic"])
+
+        await users_table.delete_item(Key={"username": username})
+        invalidate_user(username)
+        profile_cache.delete(username)
+        background_tasks.add_task(remove_user_feed, username, user_item.get("interests"))
+        user_search_index.remove(username)
+        invalidate_recommendations(username)
         return {"message": "User deleted successfully."}
     except ClientError as e:
         logger.error(f"Failed to delete user from DynamoDB: {e}")
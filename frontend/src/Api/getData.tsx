@@ -119,16 +119,17 @@ interface Post {
   images: string[];
   likes: number;
   likedBy: string[];
+  isLiked?: boolean;
   timestamp: string;
 }
 
-export const getFilteredTopics = async (selectedTopics: string[], toast: ReturnType<typeof useToast>) => {
+export const getFilteredTopics = async (selectedTopics: string[], viewer: string | null, toast: ReturnType<typeof useToast>) => {
   try {
     const encodedTopics = selectedTopics.join(",");
     const response = await axios.get<Post[]>(
       "http://127.0.0.1:8000/posts/filter/topics",
       {
-        params: { topics: encodedTopics },
+        params: { topics: encodedTopics, viewer: viewer ?? undefined },
       }
     );
 
@@ -176,6 +176,7 @@ export type GroupData = {
     name: string;
     description: string;
     image: string;
+    avatar?: string;
   }
 
   export const putGroupInfoData = async (groupId: string, name: string, description: string, image: File | null) : Promise<GroupInfoData> => {
@@ -31,6 +31,7 @@ interface Post {
   images: string[];
   likes: number;
   likedBy: string[];
+  isLiked?: boolean;
   timestamp: string;
 }
 
@@ -38,16 +39,16 @@ const fetcher = (url: string) => axios.get(url).then((res) => res.data);
 
 const Feed = () => {
   const toast = useToast();
+  const { username } = useAuth();
+  const postsUrl = `http://127.0.0.1:8000/posts?viewer=${encodeURIComponent(username ?? "")}`;
   const { data: posts, error, mutate } = useSWR<Post[]>(
-    "http://127.0.0.1:8000/posts",
+    postsUrl,
     fetcher
   );
   const [selectedTopics, setSelectedTopics] = useState<string[]>([]);
   const [activePosts, setActivePosts] = useState<Post[]>([]);
   const [isLoadingTrending, setIsLoadingTrending] = useState(true);
 
-  const { username } = useAuth();
-
   const handleCheckboxChange = (topic: string) => {
     setSelectedTopics((prevSelected) => {
       if (prevSelected.includes(topic)) {
@@ -68,7 +69,7 @@ const Feed = () => {
         return;
       }
 
-      const filtered_response = await getFilteredTopics(selectedTopics, toast);
+      const filtered_response = await getFilteredTopics(selectedTopics, username, toast);
       const sortedFilteredPosts = [...filtered_response].sort((a, b) => {
         return new Date(b.timestamp).getTime() - new Date(a.timestamp).getTime();
       });
@@ -97,7 +98,7 @@ const Feed = () => {
   const handleMutate = async () => {
     try {
       const updatedPosts = await mutate(async () => {
-        const response = await fetcher("http://127.0.0.1:8000/posts");
+        const response = await fetcher(postsUrl);
         return response.sort((a: Post, b: Post) => new Date(b.timestamp).getTime() - new Date(a.timestamp).getTime());
       }, false);
 
@@ -256,6 +257,7 @@ const Feed = () => {
                     images={post.images}
                     likes={post.likes}
                     likedBy={post.likedBy || []}
+                    isLiked={post.isLiked}
                     onDelete={handleDeletePost}
                   />
                 </Box>
@@ -39,6 +39,7 @@ interface Group {
   name: string;
   description: string;
   image: string;
+  avatar?: string;
 }
 
 interface GroupSearchSidebarProps {
@@ -217,7 +218,7 @@ const GroupSearchSidebar: React.FC<GroupSearchSidebarProps> = ({
       setSearchResults(prev => 
         prev.map(group => 
           group.groupId === groupId 
-            ? { ...group, name, description, image: response.image }
+            ? { ...group, name, description, image: response.image, avatar: response.avatar }
             : group
         )
       );
@@ -435,7 +436,7 @@ const GroupSearchSidebar: React.FC<GroupSearchSidebarProps> = ({
               <HStack width="100%" justifyContent="space-between">
                 <HStack spacing={4} overflow="hidden">
                   <Avatar 
-                    src={group.image} 
+                    src={group.avatar || group.image} 
                     name={group.name} 
                     size="md" 
                     bgColor={buttonBgColor}
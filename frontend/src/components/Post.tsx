@@ -15,6 +15,7 @@ interface PostProps {
   images: string[];
   likes: number;
   likedBy: string[];
+  isLiked?: boolean;
   isVeteran?: boolean;
   onDelete?: (postId: string) => void;
 }
@@ -27,13 +28,14 @@ interface Comment {
   profilePic: string;
 }
 
-const Post: React.FC<PostProps> = ({ postId, author, content, topics, images, likes, likedBy, onDelete }) => {
+const Post: React.FC<PostProps> = ({ postId, author, content, topics, images, likes, likedBy, isLiked: initiallyLiked, onDelete }) => {
   const { username } = useAuth();
   const [likeCount, setLikeCount] = useState(likes);
   const [comments, setComments] = useState<Comment[]>([]);
   const [newComment, setNewComment] = useState("");
   const [loadingComments, setLoadingComments] = useState(false);
-  const [isLiked, setIsLiked] = useState(likedBy.includes(username ?? ''));
+  // The API only reports the viewer's own like (isLiked); likedBy is empty unless the viewer was sent
+  const [isLiked, setIsLiked] = useState(initiallyLiked ?? likedBy.includes(username ?? ''));
   const [profilePic, setProfilePic] = useState<string>('')
   const [isVeteran, setIsVeteran] = useState<boolean | undefined>(true);
   const toast = useToast();